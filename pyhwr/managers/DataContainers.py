@@ -0,0 +1,696 @@
+import json
+import logging
+from collections.abc import Mapping
+
+import numpy as np
+
+class SamplesView():
+    """
+    Vista perezosa sobre el dataset RawData/Samples de un archivo .hdf5 del g.HIAMP.
+
+    No carga las muestras en memoria: cada acceso lee del archivo sólo la ventana pedida.
+    Se indexa igual que el array original, con forma (muestras, canales):
+      view[1000:2000]          -> todas las columnas entre las muestras 1000 y 2000
+      view[:, 3]               -> canal 3 completo
+      view[t0:t1, [0, 4, 7]]   -> canales elegidos en una ventana temporal
+    np.asarray(view) materializa el registro completo (usar sólo si realmente se necesita); view.T,
+    view.transpose() y view.swapaxes() también, para los scripts escritos contra el np.ndarray que
+    retornaba raw_data antes.
+    """
+
+    def __init__(self, dataset):
+        """
+        Parámetros
+        ----------
+        dataset: h5py.Dataset. Dataset 2D con forma (muestras, canales).
+        """
+        self._dataset = dataset
+
+    @property
+    def shape(self):
+        return self._dataset.shape
+
+    @property
+    def dtype(self):
+        return self._dataset.dtype
+
+    @property
+    def ndim(self):
+        return self._dataset.ndim
+
+    @property
+    def size(self):
+        return self._dataset.size
+
+    @property
+    def nbytes(self):
+        return self.size * self.dtype.itemsize
+
+    def __len__(self):
+        return self.shape[0]
+
+    def _normalize_index(self, index, length):
+        """
+        Convierte un índice de filas o columnas en algo que h5py pueda leer directamente
+        (int o slice con paso positivo) más un índice a aplicar luego sobre lo leído en memoria.
+        Los índices de tipo lista/array (o máscaras booleanas) se leen como el rango que los
+        contiene y se seleccionan después, porque h5py sólo admite listas crecientes y es lento con ellas.
+        """
+        if isinstance(index, (int, np.integer)):
+            return int(index), None
+
+        if isinstance(index, slice):
+            start, stop, step = index.indices(length)
+            if step > 0:
+                return slice(start, stop, step), slice(None)
+            #pasos negativos: se lee el rango ascendente y se invierte en memoria
+            index = np.arange(start, stop, step)
+
+        index = np.asarray(index)
+        if index.dtype == bool:
+            if index.shape != (length,):
+                raise IndexError(f"La máscara booleana debe tener largo {length}.")
+            index = np.flatnonzero(index)
+
+        if index.ndim != 1:
+            raise IndexError("Sólo se admiten índices de una dimensión por eje.")
+
+        if index.size == 0:
+            return slice(0, 0), slice(None)
+
+        index = np.where(index < 0, index + length, index)
+        first, last = int(index.min()), int(index.max())
+        if first < 0 or last >= length:
+            raise IndexError(f"Índice fuera de rango para un eje de largo {length}.")
+
+        return slice(first, last + 1), index - first
+
+    def __getitem__(self, key):
+        if not isinstance(key, tuple):
+            key = (key,)
+
+        if any(k is Ellipsis for k in key):
+            key = tuple(slice(None) if k is Ellipsis else k for k in key)
+
+        if len(key) > 2:
+            raise IndexError("SamplesView admite a lo sumo dos índices: (muestras, canales).")
+
+        rows = key[0]
+        cols = key[1] if len(key) == 2 else slice(None)
+
+        rows_read, rows_post = self._normalize_index(rows, self.shape[0])
+        cols_read, cols_post = self._normalize_index(cols, self.shape[1])
+
+        data = self._dataset[rows_read, cols_read]
+
+        #selecciones posteriores (sobre la ventana ya leída)
+        if isinstance(rows_post, np.ndarray):
+            data = data[rows_post]
+
+        if isinstance(cols_post, np.ndarray):
+            data = data[..., cols_post]
+
+        return data
+
+    def __array__(self, dtype=None, copy=None):
+        data = self._dataset[()]
+        if dtype is not None:
+            data = data.astype(dtype, copy=False)
+        return data
+
+    @property
+    def T(self):
+        """Registro completo transpuesto, (canales, muestras). Lee todas las muestras del archivo."""
+        return np.asarray(self).T
+
+    def transpose(self, *axes):
+        """Igual que np.ndarray.transpose() sobre el registro completo. Lee todas las muestras del archivo."""
+        return np.asarray(self).transpose(*axes)
+
+    def swapaxes(self, axis1, axis2):
+        """Igual que np.ndarray.swapaxes() sobre el registro completo. Lee todas las muestras del archivo."""
+        return np.asarray(self).swapaxes(axis1, axis2)
+
+    def iter_chunks(self, chunk_size=None, channels=None, start=0, stop=None):
+        """
+        Recorre el registro en bloques consecutivos de muestras.
+
+        Parámetros
+        ----------
+        chunk_size: int | None. Cantidad de muestras por bloque. Si es None se usa el tamaño de chunk
+            del dataset (o 65536 muestras si el dataset no está particionado).
+        channels: índice de columnas a leer (int, slice, lista o máscara). None lee todos los canales.
+        start, stop: int. Rango de muestras a recorrer.
+
+        Retorna
+        -------
+        Generador de tuplas (muestra_inicial, bloque) donde bloque tiene forma (muestras, canales).
+        """
+        if chunk_size is None:
+            chunks = self._dataset.chunks
+            chunk_size = chunks[0] if chunks else 65536
+
+        if chunk_size < 1:
+            raise ValueError("chunk_size debe ser mayor que cero.")
+
+        if channels is None:
+            channels = slice(None)
+
+        stop = self.shape[0] if stop is None else min(stop, self.shape[0])
+
+        for block_start in range(start, stop, chunk_size):
+            block_stop = min(block_start + chunk_size, stop)
+            yield block_start, self[block_start:block_stop, channels]
+
+    def __repr__(self):
+        return f"SamplesView(shape={self.shape}, dtype={self.dtype})"
+
+class SampleTimes():
+    """
+    Eje temporal de las muestras calculado a demanda: times[i] = i * step, donde step es
+    1/sample_rate (tiempos en segundos) o 1 (tiempos en muestras).
+
+    No materializa la lista completa de tiempos. Se indexa como un array (times[i], times[a:b],
+    times[[...]]) y np.asarray(times) construye el vector completo sólo si se lo pide.
+    """
+
+    def __init__(self, n_samples, sample_rate, normalize_time=True):
+        """
+        Parámetros
+        ----------
+        n_samples: int. Cantidad de muestras del registro.
+        sample_rate: float. Frecuencia de muestreo en Hz.
+        normalize_time: bool. Si es True los tiempos se expresan en segundos, si no en muestras.
+        """
+        self.n_samples = int(n_samples)
+        self.sample_rate = float(sample_rate)
+        self.normalize_time = normalize_time
+        self.step = 1.0 / self.sample_rate if normalize_time else 1.0
+
+    @property
+    def shape(self):
+        return (self.n_samples,)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    @property
+    def ndim(self):
+        return 1
+
+    def __len__(self):
+        return self.n_samples
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += self.n_samples
+            if not 0 <= index < self.n_samples:
+                raise IndexError(f"Índice {key} fuera de rango para {self.n_samples} muestras.")
+            return index * self.step
+
+        if isinstance(key, slice):
+            return np.arange(*key.indices(self.n_samples), dtype=np.float64) * self.step
+
+        index = np.asarray(key)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        index = np.where(index < 0, index + self.n_samples, index)
+        if index.size and (index.min() < 0 or index.max() >= self.n_samples):
+            raise IndexError(f"Índice fuera de rango para {self.n_samples} muestras.")
+        return index.astype(np.float64) * self.step
+
+    def __iter__(self):
+        for index in range(self.n_samples):
+            yield index * self.step
+
+    def __array__(self, dtype=None, copy=None):
+        times = np.arange(self.n_samples, dtype=np.float64) * self.step
+        if dtype is not None:
+            times = times.astype(dtype, copy=False)
+        return times
+
+    def to_time(self, samples):
+        """
+        Convierte índices de muestra a tiempo (segundos o muestras según normalize_time).
+        Acepta escalares o arrays.
+        """
+        return np.asarray(samples, dtype=np.float64) * self.step
+
+    def to_sample(self, times):
+        """
+        Convierte tiempos (segundos o muestras según normalize_time) al índice de muestra más cercano.
+        Acepta escalares o arrays.
+        """
+        samples = np.rint(np.asarray(times, dtype=np.float64) / self.step).astype(np.int64)
+        return samples if samples.ndim else int(samples)
+
+    def __repr__(self):
+        unidad = "s" if self.normalize_time else "muestras"
+        return f"SampleTimes(n_samples={self.n_samples}, sample_rate={self.sample_rate}, unidad={unidad})"
+
+def _as_basic_index(channels):
+    """
+    Convierte una selección de canales en un slice cuando es posible (None, int, lista contigua creciente),
+    para que la lectura sea una vista o una única lectura rectangular del archivo. Un canal suelto se
+    convierte en un slice de un elemento, para que cada ventana mantenga la forma (muestras, canales).
+    """
+    if channels is None:
+        return slice(None)
+    if isinstance(channels, (int, np.integer)):
+        return slice(int(channels), int(channels) + 1 or None)
+    if isinstance(channels, slice):
+        return channels
+
+    index = np.asarray(channels)
+    if index.dtype == bool:
+        index = np.flatnonzero(index)
+    if index.ndim == 1 and index.size > 0 and np.all(np.diff(index) == 1) and index[0] >= 0:
+        return slice(int(index[0]), int(index[-1]) + 1)
+    return index
+
+class TrialEpochs():
+    """
+    Ventanas de muestras (una por trial) sobre un registro del g.HIAMP, de largo variable.
+
+    No copia el registro: guarda los límites (en muestras) de cada ventana y lee cada trial al pedirlo.
+    Si las muestras están precargadas (np.ndarray) y los canales se pueden expresar como un slice, cada
+    trial es una vista del array; si el registro se lee del archivo (SamplesView), cada trial es una única
+    lectura de la ventana y los canales pedidos. La conversión de tipo (dtype) se aplica sólo a lo leído.
+
+      epochs[i]          -> array (muestras_i, canales) del trial i
+      epochs.times(i)    -> tiempos de ese trial relativos a su ancla (s)
+      epochs.labels[i]   -> etiqueta del trial (p. ej. la letra)
+    """
+
+    def __init__(self, samples, anchors, starts, stops, sample_rate, channels=None, dtype=None,
+                 labels=None, trial_index=None):
+        """
+        Parámetros
+        ----------
+        samples: np.ndarray | SamplesView. Registro con forma (muestras, canales).
+        anchors: array-like de int. Muestra de referencia (t = 0) de cada trial.
+        starts, stops: array-like de int. Primera muestra y muestra final (excluida) de cada ventana.
+        sample_rate: float. Frecuencia de muestreo en Hz.
+        channels: índice de columnas (int, slice, lista o máscara). None usa todos los canales.
+        dtype: np.dtype | None. Tipo al que se convierte cada ventana leída. None mantiene el del registro.
+        labels: array-like | None. Etiqueta de cada trial.
+        trial_index: array-like de int | None. Posición de cada ventana en la lista original de trials
+            (las ventanas fuera del registro se descartan).
+        """
+        self._samples = samples
+        self.anchors = np.asarray(anchors, dtype=np.int64)
+        self.starts = np.asarray(starts, dtype=np.int64)
+        self.stops = np.asarray(stops, dtype=np.int64)
+        self.sample_rate = float(sample_rate)
+        self.channels = _as_basic_index(channels)
+        self.dtype = np.dtype(dtype) if dtype is not None else None
+        self.labels = np.asarray(labels) if labels is not None else None
+        self.trial_index = np.arange(len(self.starts)) if trial_index is None else np.asarray(trial_index)
+
+    @classmethod
+    def from_bounds(cls, samples, sample_rate, anchors, tmin=0.0, tmax=None, stops=None, channels=None,
+                    dtype=None, labels=None):
+        """
+        Arma las ventanas a partir de anclas en muestras: [ancla + tmin, ancla + tmax] para ventanas de largo
+        fijo, o [ancla + tmin, stop + tmax] si se pasan los finales de cada trial (largo variable; tmax es
+        entonces el margen posterior, 0 por defecto). Las ventanas que no entran completas en el registro se
+        descartan; sus posiciones quedan fuera de trial_index.
+        """
+        anchors = np.asarray(anchors, dtype=np.float64)
+        starts = np.rint(anchors + tmin * sample_rate)
+
+        if stops is not None:
+            stops = np.rint(np.asarray(stops, dtype=np.float64) + (tmax or 0.0) * sample_rate)
+        elif tmax is not None:
+            stops = starts + np.rint((tmax - tmin) * sample_rate)
+        else:
+            raise ValueError("Hay que indicar tmax o los finales de cada ventana (stops).")
+
+        stops = stops + 1 #se incluye la muestra final, como en mne.Epochs
+        n_samples = samples.shape[0]
+        keep = np.isfinite(starts) & np.isfinite(stops) & (starts >= 0) & (stops <= n_samples) & (stops > starts)
+        trial_index = np.flatnonzero(keep)
+
+        return cls(samples, np.rint(anchors[keep]), starts[keep], stops[keep], sample_rate, channels, dtype,
+                   labels=np.asarray(labels)[keep] if labels is not None else None, trial_index=trial_index)
+
+    def __len__(self):
+        return len(self.starts)
+
+    @property
+    def lengths(self):
+        """Cantidad de muestras de cada ventana."""
+        return self.stops - self.starts
+
+    @property
+    def n_channels(self):
+        if isinstance(self.channels, slice):
+            return len(range(self._samples.shape[1])[self.channels])
+        return len(self.channels)
+
+    def __getitem__(self, index):
+        if not isinstance(index, (int, np.integer)):
+            raise TypeError("TrialEpochs se indexa con un entero (un trial por vez).")
+        start, stop = self.starts[index], self.stops[index]
+        data = self._samples[start:stop, self.channels]
+        if self.dtype is not None:
+            data = data.astype(self.dtype, copy=False)
+        return data
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def times(self, index):
+        """Tiempos (s) de las muestras del trial, relativos a su ancla."""
+        return (np.arange(self.starts[index], self.stops[index]) - self.anchors[index]) / self.sample_rate
+
+    def to_list(self):
+        """Lee todas las ventanas y las retorna como lista de arrays (muestras_i, canales)."""
+        return list(self)
+
+    def to_array(self, length=None, fill_value=np.nan):
+        """
+        Retorna un array (trials, muestras, canales). Cada trial se recorta a length muestras (por defecto,
+        el largo de la ventana más larga) y los trials más cortos se completan con fill_value.
+        """
+        length = int(self.lengths.max()) if length is None and len(self) else int(length or 0)
+        dtype = self.dtype if self.dtype is not None else self._samples.dtype
+        if np.issubdtype(dtype, np.integer) and np.isnan(fill_value):
+            dtype = np.float64
+
+        out = np.full((len(self), length, self.n_channels), fill_value, dtype=dtype)
+        for i in range(len(self)):
+            stop = min(self.stops[i], self.starts[i] + length)
+            out[i, :stop - self.starts[i]] = self._samples[self.starts[i]:stop, self.channels]
+        return out
+
+    def __repr__(self):
+        lengths = self.lengths
+        rango = f"{lengths.min()}-{lengths.max()} muestras" if len(self) else "vacío"
+        return f"TrialEpochs(trials={len(self)}, canales={self.n_channels}, largo={rango})"
+
+def _to_column(values):
+    """
+    Convierte una lista de valores de un mismo campo en un array: int64 si todos son enteros,
+    float64 si son numéricos, str si son strings y object en cualquier otro caso (listas, None, mezclas).
+    """
+    kinds = {type(value) for value in values}
+
+    if values and kinds <= {int}:
+        return np.array(values, dtype=np.int64)
+    if values and kinds <= {int, float}:
+        return np.array(values, dtype=np.float64)
+    if values and kinds <= {str}:
+        return np.array(values, dtype=str)
+
+    column = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        column[i] = value
+    return column
+
+class TrialTable():
+    """
+    Tabla columnar con los trials de un streamer de LSL.
+
+    Cada campo de los mensajes JSON (trialID, letter, trialStartTime, ...) se guarda como un array con
+    un elemento por trial, de modo que table["trialCueTime"] es una búsqueda directa de columna. Las
+    coordenadas de los trazos se guardan aparte (una entrada por trial), porque no tienen largo fijo.
+    positions guarda la posición (desde 1) de cada trial dentro del stream, que es la clave usada
+    en LSLDataManager.trials_info.
+    """
+
+    def __init__(self, columns, positions, fields=None, coordinates=None):
+        """
+        Parámetros
+        ----------
+        columns: dict[str, np.ndarray]. Un array por campo, todos con el mismo largo.
+        positions: array-like de int. Posición (desde 1) de cada trial dentro del stream.
+        fields: list[str] | None. Orden original de los campos (incluye "coordinates" si existía).
+        coordinates: list | None. Coordenadas de cada trial, o None si el stream no tiene trazos.
+        """
+        self.columns = columns
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.fields = list(columns) if fields is None else list(fields)
+        self.coordinates = coordinates
+        self._rows_by_position = None
+
+    @classmethod
+    def from_messages(cls, messages):
+        """
+        Arma la tabla a partir de los mensajes ya decodificados de un streamer (uno por muestra).
+        Los mensajes vacíos o que no son diccionarios se descartan, pero se respeta su posición.
+        """
+        fields = []
+        seen = set()
+        positions = []
+        rows = []
+
+        for position, message in enumerate(messages, start=1):
+            if not isinstance(message, dict) or not message:
+                continue
+            positions.append(position)
+            rows.append(message)
+            for key in message:
+                if key not in seen:
+                    seen.add(key)
+                    fields.append(key)
+
+        columns = {
+            field: _to_column([row.get(field) for row in rows])
+            for field in fields if field != "coordinates"
+        }
+        coordinates = [row.get("coordinates") for row in rows] if "coordinates" in seen else None
+
+        return cls(columns, positions, fields, coordinates)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __contains__(self, field):
+        return field in self.columns or (field == "coordinates" and self.coordinates is not None)
+
+    def __getitem__(self, field):
+        """Retorna la columna de un campo (o la lista de coordenadas). KeyError si no existe."""
+        if field == "coordinates" and self.coordinates is not None:
+            return self.coordinates
+        return self.columns[field]
+
+    def get(self, field, default=None):
+        return self[field] if field in self else default
+
+    def numeric(self, field):
+        """
+        Retorna la columna como float64, con NaN donde falta el valor. None si el campo no existe.
+        """
+        if field not in self.columns:
+            return None
+
+        column = self.columns[field]
+        if column.dtype != object:
+            return column.astype(np.float64)
+
+        return np.array([np.nan if value is None else value for value in column], dtype=np.float64)
+
+    def row(self, index):
+        """
+        Retorna el trial de la fila index como diccionario (con valores de Python, no escalares de numpy).
+        """
+        row = {}
+        for field in self.fields:
+            if field == "coordinates":
+                row[field] = self.coordinates[index] if self.coordinates is not None else None
+                continue
+            value = self.columns[field][index]
+            row[field] = value.item() if isinstance(value, np.generic) else value
+        return row
+
+    def row_index(self, position):
+        """
+        Retorna la fila correspondiente a una posición (clave de trials_info), o None si no existe.
+        """
+        if self._rows_by_position is None:
+            self._rows_by_position = {position: i for i, position in enumerate(self.positions.tolist())}
+        return self._rows_by_position.get(position)
+
+    def to_arrays(self):
+        """
+        Retorna la tabla como diccionario de arrays sin tipo object (para guardarla en un .npz sin pickle).
+        Las columnas object (listas, None, mezclas) se guardan como strings JSON y las coordenadas en
+        formato CSR (points + offsets). Lanza ValueError si alguna coordenada no es un array (n, 3).
+        """
+        arrays = {"fields": np.array(self.fields, dtype=str), "positions": self.positions}
+
+        for field, column in self.columns.items():
+            if column.dtype == object:
+                arrays[f"json__{field}"] = np.array([json.dumps(value) for value in column.tolist()], dtype=str)
+            else:
+                arrays[f"col__{field}"] = column
+
+        if self.coordinates is not None:
+            present = np.array([value is not None for value in self.coordinates], dtype=bool)
+            blocks = []
+            for value in self.coordinates:
+                if value is None:
+                    continue
+                if not isinstance(value, np.ndarray) or value.ndim != 2 or value.shape[1] != 3:
+                    raise ValueError("Coordenadas con formato inesperado; la tabla no se puede guardar como arrays.")
+                blocks.append(value)
+
+            offsets = np.zeros(len(blocks) + 1, dtype=np.int64)
+            np.cumsum([len(block) for block in blocks], out=offsets[1:])
+            arrays["coordinates__present"] = present
+            arrays["coordinates__offsets"] = offsets
+            arrays["coordinates__points"] = np.concatenate(blocks) if blocks else np.empty((0, 3), dtype=np.float64)
+
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Inversa de to_arrays()."""
+        fields = arrays["fields"].tolist()
+        columns = {}
+        for field in fields:
+            if f"col__{field}" in arrays:
+                columns[field] = arrays[f"col__{field}"]
+            elif f"json__{field}" in arrays:
+                column = np.empty(len(arrays[f"json__{field}"]), dtype=object)
+                for i, value in enumerate(arrays[f"json__{field}"].tolist()):
+                    column[i] = json.loads(value)
+                columns[field] = column
+
+        coordinates = None
+        if "coordinates__present" in arrays:
+            points, offsets = arrays["coordinates__points"], arrays["coordinates__offsets"]
+            blocks = iter(points[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1))
+            coordinates = [next(blocks) if present else None for present in arrays["coordinates__present"].tolist()]
+
+        return cls(columns, arrays["positions"], fields, coordinates)
+
+    def __repr__(self):
+        return f"TrialTable(trials={len(self)}, campos={self.fields})"
+
+class CoordinatesStore(Mapping):
+    """
+    Trazos de todos los trials de un registro en formato "ragged" tipo CSR.
+
+    Todas las coordenadas se guardan en un único array contiguo points de forma (N_puntos, 3) con
+    columnas (x, y, t), donde t es relativo al primer punto de cada trazo. offsets tiene un elemento
+    más que la cantidad de trials: las coordenadas del trial i son points[offsets[i]:offsets[i+1]].
+
+    Se comporta como el diccionario que retornaba antes get_coordinates_info():
+      store[trialID] -> {"letter": ..., "coordinates": vista (n, 3) o None si no hubo trazo}
+    store.coordinates(trialID) retorna directamente la vista (sin copiar). Las vistas son de sólo lectura.
+    """
+
+    def __init__(self, points, offsets, trial_ids, letters):
+        """
+        Parámetros
+        ----------
+        points: np.ndarray. Array (N_puntos, 3) con todas las coordenadas concatenadas.
+        offsets: np.ndarray. Array (n_trials + 1,) con el inicio de cada trial dentro de points.
+        trial_ids: np.ndarray. Array (n_trials,) con el trialID de cada trial.
+        letters: np.ndarray. Array (n_trials,) con la letra de cada trial.
+        """
+        self.points = np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 3)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.trial_ids = np.asarray(trial_ids, dtype=np.int64)
+        self.letters = np.asarray(letters, dtype=str)
+
+        if self.offsets.shape != (len(self.trial_ids) + 1,) or len(self.letters) != len(self.trial_ids):
+            raise ValueError("offsets debe tener un elemento más que trial_ids, y letters el mismo largo que trial_ids.")
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.points) or np.any(np.diff(self.offsets) < 0):
+            raise ValueError("offsets debe ser creciente, empezar en 0 y terminar en la cantidad de puntos.")
+
+        self.points.flags.writeable = False
+        self._index = {trial_id: i for i, trial_id in enumerate(self.trial_ids.tolist())}
+
+    @classmethod
+    def from_trials(cls, trial_ids, letters, coordinates):
+        """
+        Arma el store a partir de las coordenadas de cada trial (arrays (n, 3), listas de ternas o None).
+        Los tiempos se expresan relativos al primer punto de cada trazo.
+        """
+        arrays = []
+        for trial_id, trial_coordinates in zip(trial_ids, coordinates):
+            if trial_coordinates is None:
+                arrays.append(np.empty((0, 3), dtype=np.float64))
+                continue
+            try:
+                arrays.append(np.asarray(trial_coordinates, dtype=np.float64).reshape(-1, 3))
+            except (TypeError, ValueError):
+                logging.warning(f"Coordenadas con formato inválido en el trial {trial_id}; se ignoran.")
+                arrays.append(np.empty((0, 3), dtype=np.float64))
+
+        lengths = np.array([len(array) for array in arrays], dtype=np.int64)
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        points = np.concatenate(arrays) if arrays else np.empty((0, 3), dtype=np.float64)
+        if len(points):
+            #resto el primer timestamp de cada trazo a todos sus tiempos
+            first_times = points[offsets[:-1][lengths > 0], 2]
+            points[:, 2] -= np.repeat(first_times, lengths[lengths > 0])
+
+        return cls(points, offsets, trial_ids, letters)
+
+    def __len__(self):
+        return len(self.trial_ids)
+
+    def __iter__(self):
+        return iter(self.trial_ids.tolist())
+
+    def __contains__(self, trial_id):
+        return trial_id in self._index
+
+    def __getitem__(self, trial_id):
+        i = self._index[trial_id]
+        return {"letter": str(self.letters[i]), "coordinates": self._slice(i)}
+
+    def _slice(self, i):
+        start, stop = self.offsets[i], self.offsets[i + 1]
+        return self.points[start:stop] if stop > start else None
+
+    def coordinates(self, trial_id):
+        """Retorna la vista (n, 3) con las coordenadas del trial, o None si no existe o no hubo trazo."""
+        i = self._index.get(trial_id)
+        return None if i is None else self._slice(i)
+
+    def letter(self, trial_id):
+        """Retorna la letra del trial, o None si el trial no existe."""
+        i = self._index.get(trial_id)
+        return None if i is None else str(self.letters[i])
+
+    @property
+    def lengths(self):
+        """Cantidad de puntos de cada trial (en el orden de trial_ids)."""
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        return self.points.nbytes + self.offsets.nbytes + self.trial_ids.nbytes + self.letters.nbytes
+
+    def to_arrays(self):
+        """Retorna los arrays que definen el store (points, offsets, trial_ids, letters) como diccionario."""
+        return {"points": self.points, "offsets": self.offsets, "trial_ids": self.trial_ids, "letters": self.letters}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Inversa de to_arrays(). Acepta un diccionario o el resultado de np.load sobre un .npz."""
+        return cls(arrays["points"], arrays["offsets"], arrays["trial_ids"], arrays["letters"])
+
+    def save(self, filename):
+        """Guarda el store en un archivo .npz (sin pickle)."""
+        np.savez(filename, **self.to_arrays())
+
+    @classmethod
+    def load(cls, filename):
+        """Carga un store guardado con save()."""
+        with np.load(filename, allow_pickle=False) as data:
+            return cls.from_arrays(data)
+
+    def __repr__(self):
+        return f"CoordinatesStore(trials={len(self)}, puntos={len(self.points)})"
@@ -1,13 +1,18 @@
 import logging
-import pyxdf
+import re
 import h5py
-import json
 import numpy as np
 from datetime import datetime, timezone, timedelta
 import pandas as pd
 import matplotlib.pyplot as plt
 from collections import defaultdict
 import xml.etree.ElementTree as ET
+from functools import cached_property
+from pyhwr.managers.DataContainers import SamplesView, SampleTimes, TrialTable, CoordinatesStore, TrialEpochs
+from pyhwr.utils.xdf_reader import XDFStreamReader
+from pyhwr.utils.marker_decoder import decode_trial_message
+from pyhwr.utils.RunCache import frame_to_json, frame_from_json
+from pyhwr.utils.ClockSynchronizer import ClockSynchronizer, DEFAULT_MARKERS
 
 class GHiampDataManager():
     """
@@ -15,24 +20,169 @@ class GHiampDataManager():
     El archivo es un .hdf5 que contiene toda la información.
     """
 
-    def __init__(self, filename, subject="Test", normalize_time=True):
+    def __init__(self, filename, subject="Test", normalize_time=True, preload=False, metadata_only=False, cache=None):
         """
         Parámetros
         ----------
         filename: str.  Ruta al archivo .hdf5 con los datos.
         normalize_time: bool. Si es True, los tiempos de los marcadores se normalizan a segundos.
+        preload: bool. Si es True, las muestras se cargan completas en memoria (np.ndarray). Por defecto
+            raw_data es un SamplesView que lee del archivo sólo la ventana pedida.
+        metadata_only: bool. Si es True sólo se lee el encabezado: fecha de registro, frecuencia de muestreo
+            (desde AcquisitionTaskDescription), cantidad de muestras/canales y la tabla de marcadores.
+            No se parsean los XML de canales (channels_info queda en None), raw_data queda en None y el
+            archivo se cierra al terminar. Pensado para recorrer carpetas con muchos registros.
+        cache: RunCache | None. Cache en disco de registros parseados (ver pyhwr.utils.RunCache). Guarda
+            fecha, frecuencia de muestreo, información de canales y marcadores; las muestras se siguen
+            leyendo del .hdf5. Con metadata_only=True y el registro en el cache, el .hdf5 no se abre.
         """
         self.filename = filename
         self.subject = subject
-        self.file_data = self._read_data(self.filename)
         self.normalize_time = normalize_time
-        self.fecha_registro, self.timestamp_registro = self._get_datetime()
-        self.raw_data = self._get_samples() ##muestras del g.H
-        self.channels_info = self._get_channels_info()
-        self.sample_rate = self.channels_info["used_channels"]["SampleRate"][0]
-        self.markers_info = self._get_markers_info()
+        self.preload = preload
+        self.metadata_only = metadata_only
+        self.cache = cache
+        self.file_data = None
+
+        header = self._load_header()
+        self.fecha_registro, self.timestamp_registro = header["fecha_registro"], header["timestamp_registro"]
+        self.n_samples, self.n_channels = header["n_samples"], header["n_channels"]
+        self.sample_rate = header["sample_rate"]
+        self.channels_info = header["channels_info"]
+
+        if metadata_only:
+            self.raw_data = None
+        else:
+            self.raw_data = self._get_samples() ##muestras del g.H
+
+        self.markers_info = self._get_markers_info(header["type_ids"], header["event_samples"])
         self.times = self._get_times()
 
+        if metadata_only:
+            self.close()
+
+    @classmethod
+    def open_header(cls, filename, subject="Test", normalize_time=True):
+        """
+        Abre sólo el encabezado del archivo .hdf5 (equivalente a metadata_only=True).
+
+        Retorna un GHiampDataManager con fecha_registro, sample_rate, n_samples, n_channels,
+        markers_info y events, sin leer muestras ni parsear los XML de canales.
+        """
+        return cls(filename, subject=subject, normalize_time=normalize_time, metadata_only=True)
+
+    def _open_file(self):
+        """Abre el .hdf5 si todavía no está abierto y lo retorna."""
+        if self.file_data is None:
+            self.file_data = self._read_data(self.filename)
+        return self.file_data
+
+    def _read_header(self, channels=True):
+        """
+        Lee del .hdf5 todo lo que no son muestras: fecha de registro, forma de Samples, frecuencia de
+        muestreo, información de canales (si channels es True) y los marcadores crudos (TypeID, Time).
+        """
+        self._open_file()
+        asynchron = self.file_data["AsynchronData"]
+        channels_info = self._get_channels_info() if channels else None
+        if channels_info is not None:
+            sample_rate = float(channels_info["used_channels"]["SampleRate"][0])
+        else:
+            sample_rate = self._get_sample_rate()
+        fecha_registro, timestamp_registro = self._get_datetime()
+        n_samples, n_channels = self.file_data["RawData"]["Samples"].shape
+
+        return {
+            "fecha_registro": fecha_registro,
+            "timestamp_registro": timestamp_registro,
+            "n_samples": int(n_samples),
+            "n_channels": int(n_channels),
+            "sample_rate": sample_rate,
+            "channels_info": channels_info,
+            "type_ids": asynchron["TypeID"][:].reshape(-1),
+            "event_samples": asynchron["Time"][:].reshape(-1),
+        }
+
+    def _load_header(self):
+        """
+        Retorna el encabezado del registro (ver _read_header) desde el cache si está disponible, o
+        leyéndolo del .hdf5 (y guardándolo en el cache) si no. Si no se piden sólo metadatos, el .hdf5
+        queda abierto para leer las muestras.
+        """
+        if not self.metadata_only:
+            self._open_file()
+
+        if self.cache is None:
+            return self._read_header(channels=not self.metadata_only)
+
+        entry = self.cache.load(self.filename, "ghiamp")
+        if entry is not None:
+            header = self._header_from_cache(*entry)
+            if header["channels_info"] is not None or self.metadata_only:
+                return header
+
+        header = self._read_header(channels=not self.metadata_only)
+        self.cache.save(self.filename, "ghiamp", *self._header_to_cache(header))
+        return header
+
+    def _header_to_cache(self, header):
+        """Convierte el encabezado en (arrays, metadatos) para RunCache."""
+        arrays = {"type_ids": header["type_ids"], "event_samples": header["event_samples"]}
+        channels_info = header["channels_info"]
+        meta = {
+            "fecha_registro": header["fecha_registro"].isoformat() if header["fecha_registro"] else None,
+            "timestamp_registro": header["timestamp_registro"],
+            "n_samples": header["n_samples"],
+            "n_channels": header["n_channels"],
+            "sample_rate": header["sample_rate"],
+            "channels_info": None if channels_info is None else {
+                name: frame_to_json(df) for name, df in channels_info.items()
+            },
+        }
+        return arrays, meta
+
+    def _header_from_cache(self, arrays, meta):
+        """Inversa de _header_to_cache()."""
+        header = dict(meta, type_ids=arrays["type_ids"], event_samples=arrays["event_samples"])
+        if meta["fecha_registro"] is not None:
+            header["fecha_registro"] = datetime.fromisoformat(meta["fecha_registro"])
+        if self.metadata_only:
+            header["channels_info"] = None
+        elif meta["channels_info"] is not None:
+            header["channels_info"] = {name: frame_from_json(df) for name, df in meta["channels_info"].items()}
+        return header
+
+    def close(self):
+        """
+        Cierra el archivo .hdf5. Luego de cerrarlo, raw_data deja de poder leerse si no fue precargado.
+        """
+        if self.file_data is not None:
+            self.file_data.close()
+            self.file_data = None
+
+    def __getstate__(self):
+        """
+        Estado para pickle (p. ej. para enviar el manager entre procesos). El archivo .hdf5 abierto no se
+        copia: si raw_data era una vista perezosa, el archivo se vuelve a abrir al reconstruir el objeto.
+        """
+        state = self.__dict__.copy()
+        state["file_data"] = None
+        if isinstance(self.raw_data, SamplesView):
+            state["raw_data"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self.raw_data is None and not self.metadata_only:
+            self._open_file()
+            self.raw_data = self._get_samples()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def _read_data(self, filename):
         return h5py.File(filename, "r")
 
@@ -73,6 +223,17 @@ class GHiampDataManager():
             # "matched": df_match
         }
 
+    def _get_sample_rate(self):
+        """
+        Obtiene la frecuencia de muestreo directamente del XML de AcquisitionTaskDescription
+        (primer <SampleRate>), sin armar el DataFrame de canales.
+        """
+        used_xml = self.file_data["RawData"]["AcquisitionTaskDescription"][0]
+        match = re.search(rb"<SampleRate>\s*([^<\s]+)\s*</SampleRate>", used_xml)
+        if match is None:
+            raise ValueError(f"No se encontró <SampleRate> en AcquisitionTaskDescription de {self.filename}.")
+        return float(match.group(1))
+
     def _resume_channels_from_xml(self, xml_bytes, root_tag="ChannelProperties"):
         """
         Parsea un XML con estructura de canales (ya sea AcquisitionTaskDescription
@@ -121,47 +282,195 @@ class GHiampDataManager():
 
     def _get_samples(self):
         """
-        Función para obtener los datos de EEG con self.file_data["RawData"]["Samples"][:]
+        Función para obtener los datos de EEG de self.file_data["RawData"]["Samples"].
+
+        Si self.preload es True se leen todas las muestras (np.ndarray). Si no, se retorna un SamplesView
+        que lee del archivo sólo la ventana solicitada (ej: raw_data[t0:t1, canales]).
+        """
+        samples = self.file_data["RawData"]["Samples"]
+        if self.preload:
+            return samples[:]
+        return SamplesView(samples)
+
+    def load_samples(self):
+        """
+        Carga todas las muestras en memoria (equivalente a preload=True) y retorna el array.
         """
-        return self.file_data["RawData"]["Samples"][:]
+        if not isinstance(self.raw_data, np.ndarray):
+            self.raw_data = np.asarray(self.raw_data)
+            self.preload = True
+        return self.raw_data
     
-    def _get_times(self, tinit = 0, tend = None):
+    def _get_times(self):
         """
         Función para obtener los tiempos de las muestras a partir de la
-        frecuencia de muestreo. Por defecto retorna en segundos y desde t=0
+        frecuencia de muestreo. Por defecto retorna en segundos y desde t=0.
+
+        Retorna un SampleTimes que calcula cada tiempo a demanda (índice/sample_rate), sin armar
+        la lista completa de tiempos.
         """
-        n_samples = self.raw_data.shape[0]
-        if tend is None:
-            tend = n_samples / self.sample_rate
+        return SampleTimes(self.n_samples, self.sample_rate, self.normalize_time)
 
-        times = np.linspace(0, n_samples / self.sample_rate, n_samples, endpoint=False)
+    def sample_to_time(self, samples):
+        """
+        Convierte índices de muestra a tiempo, en la misma unidad que markers_info
+        (segundos si normalize_time es True, muestras si no).
+        """
+        return self.times.to_time(samples)
 
-        if self.normalize_time:
-            return times.tolist()
-        else:
-            return (times * self.sample_rate).tolist()
+    def time_to_sample(self, times):
+        """
+        Convierte tiempos (en la misma unidad que markers_info) al índice de muestra más cercano.
+        """
+        return self.times.to_sample(times)
 
-    def _get_markers_info(self):
+    def _channel_positions(self, channels):
+        """
+        Convierte una selección de canales en posiciones de columna de raw_data. Acepta los índices que
+        admite raw_data (int, slice, lista, máscara) o uno o varios tipos de canal ("EEG", ["EEG", "EOG"])
+        según channels_info["used_channels"]["ChannelType"].
+        """
+        if isinstance(channels, str):
+            channels = [channels]
+
+        if isinstance(channels, (list, tuple)) and channels and all(isinstance(c, str) for c in channels):
+            if self.channels_info is None:
+                raise ValueError("No hay información de canales (el archivo se abrió con metadata_only=True).")
+            used = self.channels_info["used_channels"]
+            return np.flatnonzero(used["ChannelType"].isin(channels).to_numpy())
+
+        return channels
+
+    def get_epochs(self, onsets, tmin=0.0, tmax=None, offsets=None, channels=None, dtype=None, labels=None):
+        """
+        Corta una ventana de muestras por trial, sin copiar el registro (ver TrialEpochs).
+
+        Con tmax se arman ventanas de largo fijo [onset + tmin, onset + tmax] (p. ej. centradas en el cue).
+        Con offsets se arman ventanas de largo variable [onset + tmin, offset + tmax] (p. ej. trialTablet → rest),
+        donde tmax es el margen posterior (0 por defecto). Las ventanas que no entran completas en el
+        registro se descartan (TrialEpochs.trial_index indica a qué trial corresponde cada ventana).
+
+        Parámetros
+        ----------
+        onsets: array-like. Tiempo de anclaje de cada trial, en la misma unidad que markers_info.
+        tmin, tmax: float. Inicio y fin de la ventana relativos al ancla (o al offset), en segundos.
+        offsets: array-like | None. Fin de cada trial, en la misma unidad que onsets.
+        channels: selección de canales (índices de raw_data o tipos de canal, p. ej. "EEG"). None usa todos.
+        dtype: np.dtype | None. Tipo al que se convierte cada ventana leída (sólo los canales pedidos).
+        labels: array-like | None. Etiqueta de cada trial (p. ej. la letra).
+        """
+        if self.raw_data is None:
+            raise ValueError("No hay muestras disponibles (el archivo se abrió con metadata_only=True).")
+
+        #anclas y finales en muestras
+        scale = self.sample_rate if self.normalize_time else 1.0
+        onsets = np.asarray(onsets, dtype=np.float64) * scale
+        if offsets is not None:
+            offsets = np.asarray(offsets, dtype=np.float64) * scale
+
+        return TrialEpochs.from_bounds(self.raw_data, self.sample_rate, onsets, tmin=tmin, tmax=tmax,
+                                       stops=offsets, channels=self._channel_positions(channels),
+                                       dtype=dtype, labels=labels)
+
+    def get_trial_epochs(self, lsl_manager, streamer="Tablet_Markers", lock="trialStartTime", end="trialRestTime",
+                         tmin=0.0, tmax=None, channels="EEG", dtype=None):
+        """
+        Ventanas por trial a partir de los tiempos de un streamer de LSL, llevados al reloj del g.HIAMP con
+        un ClockSynchronizer (offset + deriva ajustados entre trialStartTime y el trigger de hardware).
+
+        Con lock="trialStartTime" cada trial se ancla en su trigger de hardware (trialTablet/trialLaptop);
+        si el trigger se perdió se usa su trialStartTime sincronizado.
+          manager.get_trial_epochs(lsl_manager)                              -> trialTablet → rest
+          manager.get_trial_epochs(lsl_manager, lock="trialCueTime", tmin=-0.5, tmax=2.0)  -> centrado en el cue
+
+        Parámetros
+        ----------
+        lsl_manager: LSLDataManager.
+        streamer: str. "Tablet_Markers" o "Laptop_Markers".
+        lock: str. Campo del streamer (en ms) usado como ancla.
+        end: str | None. Campo del streamer que marca el fin de cada trial. Se usa sólo si tmax es None.
+        tmin, tmax, channels, dtype: ver get_epochs().
+        """
+        if not self.normalize_time:
+            raise ValueError("get_trial_epochs requiere normalize_time=True (marcadores en segundos).")
+
+        sync = ClockSynchronizer.from_managers(self, lsl_manager, streamer)
+        table = lsl_manager._get_table(streamer)
+
+        onsets = sync.transform(table.numeric(lock) / 1000)
+        if lock == "trialStartTime":
+            source_idx, target_idx = sync.pairs
+            hardware = np.asarray(self.markers_info[DEFAULT_MARKERS[streamer]], dtype=np.float64)
+            onsets[source_idx[sync.inliers]] = hardware[target_idx[sync.inliers]]
+
+        offsets = sync.transform(table.numeric(end) / 1000) if tmax is None and end is not None else None
+        labels = table["letter"] if "letter" in table else None
+
+        return self.get_epochs(onsets, tmin=tmin, tmax=tmax, offsets=offsets, channels=channels, dtype=dtype,
+                               labels=labels)
+
+    def _get_markers_info(self, type_ids=None, event_samples=None):
         """Función para obtener los marcadores del experimento.
         
         Retornaría una lista con los marcadores, un array con los tiempos,
         un diccionario con los keys siendo cada id enviado por el ghiamp y el
-        valor sería el nombre. Por defecto es el mismo que envía el ampli"""
+        valor sería el nombre. Por defecto es el mismo que envía el ampli.
+
+        Los eventos se ordenan una única vez por id (argsort estable) y cada marcador guarda
+        sus tiempos como una vista de ese array ordenado. Además se arma self.events, una tabla
+        estructurada con los campos (id, sample, seconds) de todos los eventos, en orden de registro.
+
+        type_ids, event_samples: arrays con los marcadores crudos (AsynchronData/TypeID y Time). Si son
+        None se leen del archivo."""
+        if type_ids is None or event_samples is None:
+            asynchron = self.file_data["AsynchronData"]
+            type_ids, event_samples = asynchron["TypeID"][:], asynchron["Time"][:]
+        list_ids = np.asarray(type_ids).reshape(-1).astype(np.int64)
+        samples = np.asarray(event_samples).reshape(-1).astype(np.float64)
+
+        if list_ids.size > 0:
+            list_ids -= list_ids.min()
+            list_ids += 1
+
+        self.events = np.empty(list_ids.size, dtype=[("id", np.int64), ("sample", np.float64), ("seconds", np.float64)])
+        self.events["id"] = list_ids
+        self.events["sample"] = samples
+        self.events["seconds"] = samples / self.sample_rate
+
+        #un único ordenamiento por id. Estable para mantener el orden temporal dentro de cada marcador
+        self._events_order = np.argsort(list_ids, kind="stable")
+        ids, starts, counts = np.unique(list_ids[self._events_order], return_index=True, return_counts=True)
+
+        times = self.events["seconds"] if self.normalize_time else self.events["sample"]
+        sorted_times = times[self._events_order]
+
         markers_info = {}
-        list_ids = self.file_data["AsynchronData"]["TypeID"][:].reshape(-1)
-        list_ids -= list_ids.min()
-        list_ids += 1
-        ids = np.array(sorted(list(set(list_ids))))
-        times = np.astype(self.file_data["AsynchronData"]["Time"][:][:].reshape(-1), float)
-
-        for marker_id in ids:
-            filter = np.where(list_ids==marker_id)
-            if self.normalize_time:
-                markers_info[marker_id] = (times[filter]/self.sample_rate).tolist()
-            else:
-                markers_info[marker_id] = times[filter].tolist()
+        self._marker_ids = {}
+        self._events_bounds = {}
+        for marker_id, start, count in zip(ids.tolist(), starts.tolist(), counts.tolist()):
+            markers_info[marker_id] = sorted_times[start:start + count]
+            self._marker_ids[marker_id] = marker_id
+            self._events_bounds[marker_id] = (start, start + count)
 
         return markers_info
+
+    def get_events(self, marker=None):
+        """
+        Retorna las filas de self.events (campos id, sample, seconds).
+
+        Parámetros
+        ----------
+        marker: int | str | None. Id o nombre (luego de changeMarkersNames) del marcador.
+            Si es None se retornan todos los eventos en orden de registro.
+        """
+        if marker is None:
+            return self.events
+
+        if marker not in self._marker_ids:
+            return self.events[:0]
+
+        start, stop = self._events_bounds[self._marker_ids[marker]]
+        return self.events[self._events_order[start:stop]]
     
     def changeMarkersNames(self, new_names: dict):
         """Función para cambiar los nombres de los marcadores.
@@ -171,6 +480,7 @@ class GHiampDataManager():
         for marker_id, new_name in new_names.items():
             if marker_id in self.markers_info:
                 self.markers_info[new_name] = self.markers_info.pop(marker_id)
+                self._marker_ids[new_name] = self._marker_ids.pop(marker_id)
             else:
                 logging.warning(f"Al parecer no hay marcador con id {marker_id}. No se puede establecer {new_name}")
 
@@ -238,9 +548,14 @@ class GHiampDataManager():
     
     def __str__(self):
         # Contar canales usados por tipo
-        if "ChannelType" in self.channels_info["used_channels"].columns:
+        if self.channels_info is None:
+            n_canales = self.n_channels
+            canales_por_tipo = "Sin dato (sólo encabezado)"
+        elif "ChannelType" in self.channels_info["used_channels"].columns:
+            n_canales = len(self.channels_info["used_channels"])
             canales_por_tipo = self.channels_info["used_channels"]["ChannelType"].value_counts().to_dict()
         else:
+            n_canales = len(self.channels_info["used_channels"])
             canales_por_tipo = {"Desconocido": len(self.channels_info["used_channels"])}
 
         info = (
@@ -249,7 +564,7 @@ class GHiampDataManager():
             f"Sujeto: {self.subject}\n"
             f"Fecha registro: {self.fecha_registro}\n"
             f"Frecuencia de muestreo: {self.sample_rate:.2f} Hz\n"
-            f"Total de canales usados: {len(self.channels_info['used_channels'])}\n"
+            f"Total de canales usados: {n_canales}\n"
             f"Canales por tipo: {canales_por_tipo}\n"
             f"Cantidad de eventos: {sum(len(v) for v in self.markers_info.values())}\n"
             f"IDs de marcadores: {list(self.markers_info.keys())}"
@@ -267,53 +582,160 @@ class LSLDataManager():
     """
     Clase para gestionar los datos registrados desde LSL.
     """
-    def __init__(self, filename, tablet_name = "Tablet_Markers", laptop_name = "Laptop_Markers"):
-        """
-        filename: str.  Ruta al archivo .xdf con los datos."""
+    def __init__(self, filename, tablet_name = "Tablet_Markers", laptop_name = "Laptop_Markers", json_backend=None,
+                 cache=None):
+        """
+        filename: str.  Ruta al archivo .xdf con los datos.
+        json_backend: str | None. Librería para decodificar los mensajes ("orjson", "msgspec" o "json").
+            None usa la más rápida disponible (ver pyhwr.utils.marker_decoder).
+        cache: RunCache | None. Cache en disco de registros parseados (ver pyhwr.utils.RunCache). Si el
+            registro ya está en el cache no se lee ni se decodifica el .xdf."""
         ##agregar chequeos de que hay al menos un trial con datos por streamer sino arrojar error.
         self.filename = filename
         self.tab_name = tablet_name
         self.lap_name = laptop_name
-        self.raw_data, self.header = self._read_data(self.filename)
+        self.json_backend = json_backend
+        self.cache = cache
+        self.raw_data, self.header, self.trials_tables = self._load_parsed()
         self.streamers_names = self._get_streamers_names()
         self.streamers_keys = self._get_streamers_keys()
-        self.time_series = self._get_timeseries()
         self.fecha_registro, self.timestamp_registro = self._get_datetime()
-        self.trials_info = self._get_trials_info()
         self.first_lsl_timestamp = self._get_first_lsl_timestamp() #esta en tiempo interno de LSL
         self.first_timestamp = self._get_first_run_timestamp() #tiempo del primer trial registrado en cada streamer, que se asume es el inicio de la primera ronda
-        self.coordinates_info = self.get_coordinates_info()
-        self.pendown_delays = self.get_pendownDelays()
-        self.trials_times = self.trialsTimes()
-        self.traces_duration = self.get_tracesDuration()
+        ##coordinates_info, pendown_delays, trials_times y traces_duration se calculan recién al usarse (ver propiedades)
         ##agregar método para obtener tiempo promedio entre triasl, duración total de la sesión,
         ##tiempo promedio entre cues y otras cosas relevantes.
 
+    _CACHED_ATTRIBUTES = ("trials_info", "time_series", "coordinates_info", "pendown_delays",
+                          "trials_times", "traces_duration")
+
+    @cached_property
+    def coordinates_info(self):
+        """Trazos de cada trial (CoordinatesStore). Se calcula al primer acceso. Ver get_coordinates_info()."""
+        return self.get_coordinates_info()
+
+    @cached_property
+    def pendown_delays(self):
+        """Demora entre el cue y el primer penDown de cada trial. Se calcula al primer acceso. Ver get_pendownDelays()."""
+        return self.get_pendownDelays()
+
+    @cached_property
+    def trials_times(self):
+        """Tiempos relativos de cada trial por streamer. Se calcula al primer acceso. Ver trialsTimes()."""
+        return self.trialsTimes()
+
+    @cached_property
+    def traces_duration(self):
+        """Duración de los trazos de cada trial. Se calcula al primer acceso. Ver get_tracesDuration()."""
+        return self.get_tracesDuration()
+
+    def invalidate_cache(self, *names):
+        """
+        Descarta los valores derivados ya calculados para que se vuelvan a calcular en el próximo acceso.
+
+        Parámetros
+        ----------
+        names: str. Nombres de los atributos a descartar (p. ej. "pendown_delays"). Sin argumentos se
+            descartan todos (trials_info, time_series, coordinates_info, pendown_delays, trials_times,
+            traces_duration).
+        """
+        names = names or self._CACHED_ATTRIBUTES
+        for name in names:
+            if name not in self._CACHED_ATTRIBUTES:
+                raise ValueError(f"'{name}' no es un atributo cacheado. Opciones: {self._CACHED_ATTRIBUTES}")
+            self.__dict__.pop(name, None)
+
     def _read_data(self, filename):
         """
         Lee los datos del archivo .xdf y retorna el contenido crudo y el encabezado.
+
+        Sólo se decodifican los streams de marcadores (tablet y laptop); los chunks del resto de los
+        streams (p. ej. EEG) se saltean sin decodificar. Ver XDFStreamReader.
+        """
+        return XDFStreamReader(filename, select_streams=[self.tab_name, self.lap_name]).read()
+
+    def _load_parsed(self):
         """
-        return pyxdf.load_xdf(filename)
+        Retorna (raw_data, header, trials_tables), desde el cache si el registro ya fue parseado,
+        o leyendo y decodificando el .xdf (y guardando el resultado en el cache) si no.
+
+        Los registros recuperados del cache no guardan las muestras crudas: raw_data[...]["time_series"]
+        queda vacío (los mensajes ya están decodificados en trials_tables).
+        """
+        cache_kind = f"lsl|{self.tab_name}|{self.lap_name}"
+
+        if self.cache is not None:
+            entry = self.cache.load(self.filename, cache_kind)
+            if entry is not None:
+                return self._from_cache_arrays(*entry)
+
+        raw_data, header = self._read_data(self.filename)
+        trials_tables = self._get_trials_tables(raw_data)
+
+        if self.cache is not None:
+            try:
+                self.cache.save(self.filename, cache_kind, *self._to_cache_arrays(raw_data, header, trials_tables))
+            except ValueError as error:
+                logging.warning(f"No se guardó {self.filename} en el cache: {error}")
+
+        return raw_data, header, trials_tables
+
+    def _to_cache_arrays(self, raw_data, header, trials_tables):
+        """
+        Convierte el registro parseado en (arrays, metadatos) para RunCache.
+        """
+        arrays = {}
+        streams = []
+        for k, data in enumerate(raw_data):
+            name = data["info"]["name"][0]
+            arrays[f"s{k}__time_stamps"] = np.asarray(data["time_stamps"], dtype=np.float64)
+            for key, value in trials_tables[name].to_arrays().items():
+                arrays[f"s{k}__{key}"] = value
+            streams.append({
+                "info": data["info"],
+                "footer": data["footer"],
+                "clock_times": list(data.get("clock_times", [])),
+                "clock_values": list(data.get("clock_values", [])),
+            })
+
+        return arrays, {"header": header, "streams": streams}
+
+    def _from_cache_arrays(self, arrays, meta):
+        """Inversa de _to_cache_arrays()."""
+        raw_data = []
+        trials_tables = {}
+        for k, stream in enumerate(meta["streams"]):
+            prefix = f"s{k}__"
+            table_arrays = {key[len(prefix):]: value for key, value in arrays.items() if key.startswith(prefix)}
+            raw_data.append(dict(stream, time_series=[], time_stamps=table_arrays.pop("time_stamps")))
+            trials_tables[stream["info"]["name"][0]] = TrialTable.from_arrays(table_arrays)
+
+        return raw_data, meta["header"], trials_tables
+
+    def __getstate__(self):
+        """
+        Estado para pickle (p. ej. para enviar el manager entre procesos). No se copian los mensajes
+        crudos (raw_data[...]["time_series"]), que ya están decodificados en trials_tables.
+        """
+        state = self.__dict__.copy()
+        state["raw_data"] = [dict(data, time_series=[]) for data in self.raw_data]
+        state.pop("time_series", None)
+        return state
+
+    def iter_marker_samples(self):
+        """
+        Generador sobre las muestras de los streams de marcadores leídas directamente del archivo,
+        como tuplas (nombre_stream, timestamp, valores).
+        """
+        return XDFStreamReader(self.filename, select_streams=[self.tab_name, self.lap_name]).iter_samples()
     
     def _parse_trial_message(self, raw):
         """
         Función para parsear el mensaje JSON de cada trial.
-        Retorna un diccionario con la información del trial.
+        Retorna un diccionario con la información del trial. Las coordenadas del trazo ("coordinates")
+        se entregan como np.ndarray float64 de forma (n, 3).
         """
-        # 1) Si viene como bytes (a veces pasa con sockets/LSL)
-        if isinstance(raw, (bytes, bytearray)):
-            raw = raw.decode("utf-8", errors="replace")
-
-        if raw is None or raw == "":
-            return []
-        
-        # 2) Limpieza simple
-        raw = raw.strip()
-        # 3) Si por logging quedó envuelto en comillas, las quitamos (solo las exteriores)
-        if raw and raw[0] in "\"'" and raw[-1] == raw[0]:
-            raw = raw[1:-1]
-        # 4) Parseo JSON → dict
-        return json.loads(raw)
+        return decode_trial_message(raw, backend=self.json_backend)
     
     def _get_streamers_names(self):
         """
@@ -321,28 +743,23 @@ class LSLDataManager():
         """
         return [data["info"]["name"][0] for data in self.raw_data]
     
-    def _get_streamers_keys(self):
+    def _get_trials_tables(self, raw_data=None):
         """
-        Obtiene las keys registradas en cada streamer.
+        Decodifica (una única vez) los mensajes JSON de cada streamer y arma una tabla columnar
+        por streamer (TrialTable): un array por campo y las coordenadas guardadas aparte.
         """
-        streamers_keys = {}
-
-        for data in self.raw_data:
-            streamer_name = data["info"]["name"][0]
-
-            if len(data["time_series"]) == 0:
-                streamers_keys[streamer_name] = []
-                continue
-
-            time_series_temp = data["time_series"][0][0]
-            parsed = self._parse_trial_message(time_series_temp)
+        trials_tables = {}
+        for data in (self.raw_data if raw_data is None else raw_data):
+            messages = [self._parse_trial_message(sample[0]) for sample in data["time_series"]]
+            trials_tables[data["info"]["name"][0]] = TrialTable.from_messages(messages)
 
-            if isinstance(parsed, dict):
-                streamers_keys[streamer_name] = list(parsed.keys())
-            else:
-                streamers_keys[streamer_name] = []
+        return trials_tables
 
-        return streamers_keys
+    def _get_streamers_keys(self):
+        """
+        Obtiene las keys registradas en cada streamer.
+        """
+        return {name: list(table.fields) for name, table in self.trials_tables.items()}
     
     @property
     def trials_qty(self):
@@ -351,23 +768,20 @@ class LSLDataManager():
         """
         trials_qty = {}
         for streamer in self.streamers_names:
-            trials_qty[streamer] = len(self.trials_info[streamer])
+            trials_qty[streamer] = len(self.trials_tables[streamer])
 
         return trials_qty
     
-    def _get_timeseries(self):
+    @cached_property
+    def time_series(self):
         """
-        Función para obtener las series de tiempo de cada stream.
+        Mensajes de cada stream como lista de diccionarios (uno por trial).
+        Se arma a demanda desde trials_tables; se mantiene por compatibilidad.
         """
-        timeseries_dict = {}
-        for data in self.raw_data:
-            streamer_timeseries = []
-            for time_series in data["time_series"]:
-                streamer_timeseries.append(self._parse_trial_message(time_series[0]))
-            
-            timeseries_dict[data["info"]["name"][0]] = streamer_timeseries
-
-        return timeseries_dict
+        return {
+            name: [table.row(i) for i in range(len(table))]
+            for name, table in self.trials_tables.items()
+        }
     
     def trialsTimes(self):
         """
@@ -376,11 +790,11 @@ class LSLDataManager():
         """
         trials_time_dic = {}
         for name in self.streamers_names:
-            df = pd.DataFrame(self.trials_info[name]).T[["letter", "trialStartTime", "trialCueTime", "trialRestTime"]]
+            table = self.trials_tables[name]
             first_timestamp = self.first_timestamp[name]
-            values = df[["trialStartTime", "trialCueTime", "trialRestTime"]].values
-            values = (values - first_timestamp)/1000
-            df[["trialStartTime", "trialCueTime", "trialRestTime"]] = values
+            df = pd.DataFrame({"letter": table.get("letter")}, index=table.positions)
+            for column in ["trialStartTime", "trialCueTime", "trialRestTime"]:
+                df[column] = (table.numeric(column) - first_timestamp)/1000
             trials_time_dic[name] = df
 
         return trials_time_dic
@@ -389,7 +803,7 @@ class LSLDataManager():
         """
         Indica si un streamer existe en el archivo XDF.
         """
-        return streamer_name in self.time_series
+        return streamer_name in self.trials_tables
     
     @property
     def has_tablet_stream(self) -> bool:
@@ -414,42 +828,37 @@ class LSLDataManager():
         """
         return self.trials_info.get(streamer_name, {})
 
-    def get_coordinates_info(self):
+    def _get_table(self, streamer_name: str):
         """
-        Función para obtener las coordenadas de los trazos registrados. Se retorna un diccionario
-        donde cada key es el trialID y los valores son otro diccionario con, letra, lista de ternas (x,y,t) donde t
-        es el tiempo relativo al inicio del trazo (primer timestamp de la primera coordenada).
+        Retorna la TrialTable de un streamer, o None si el streamer no existe o no tiene trials.
         """
+        table = self.trials_tables.get(streamer_name, None)
+        if table is None or len(table) == 0:
+            return None
+        return table
 
-        coordinates_info = {}
-        
+    def get_coordinates_info(self):
+        """
+        Función para obtener las coordenadas de los trazos registrados. Se retorna un CoordinatesStore
+        que se usa como diccionario donde cada key es el trialID y los valores son otro diccionario con
+        letra y array (n, 3) de ternas (x,y,t) donde t es el tiempo relativo al inicio del trazo (primer
+        timestamp de la primera coordenada), o None si el trial no tiene trazo.
+
+        Todos los trazos quedan en un único array contiguo (coordinates_info.points) indexado por offsets,
+        de modo que las coordenadas de cada trial son vistas sobre ese array (sin copias).
+        """
         if not self.has_tablet_stream:
             logging.warning(
                 f"No se encontró el streamer '{self.tab_name}'. "
                 "No se computará información de coordenadas."
             )
-            return coordinates_info
+            return CoordinatesStore.from_trials([], [], [])
         
-        ##recorro cada trial registrado en el streamer Tablet_Markers de self.time_series
-
-        for trial in self.time_series[self.tab_name]:
-            coordinates_trial = np.array(trial["coordinates"])
-            letter_trial = trial["letter"]
-            if len(coordinates_trial) > 0:
-                first_timestamp = coordinates_trial[0,2]
-                #resto el primer timestamp a todos los tiempos para tenerlos relativos al inicio del trazo
-                coordinates_trial[:,2] = coordinates_trial[:,2] - first_timestamp
-                coordinates_info[trial["trialID"]] = {
-                    "letter": letter_trial,
-                    "coordinates": [(x, y, t) for x, y, t in coordinates_trial]
-                }
-            else:
-                coordinates_info[trial["trialID"]] = {
-                    "letter": trial["letter"],
-                    "coordinates": None
-                    }
+        ##recorro cada trial registrado en el streamer Tablet_Markers de self.trials_tables
+        table = self.trials_tables[self.tab_name]
+        coordinates = table.get("coordinates") or [None] * len(table)
 
-        return coordinates_info
+        return CoordinatesStore.from_trials(table["trialID"], table["letter"], coordinates)
 
     def getTrialCoordinates(self, trialID):
         """
@@ -458,23 +867,10 @@ class LSLDataManager():
         Retorna
         -------
         np.ndarray | None
-            Retorna un array si hay coordenadas.
+            Retorna una vista (n, 3) de sólo lectura sobre coordinates_info.points si hay coordenadas.
             Retorna None si no hay tablet, no existe el trial o no hay coordenadas.
         """
-        if not self.coordinates_info:
-            return None
-
-        trial_info = self.coordinates_info.get(trialID, None)
-
-        if trial_info is None:
-            return None
-
-        coordinates = trial_info.get("coordinates", None)
-
-        if coordinates is None:
-            return None
-
-        return np.array(coordinates)
+        return self.coordinates_info.coordinates(trialID)
 
     def _get_datetime(self):
         """
@@ -497,7 +893,13 @@ class LSLDataManager():
         first_timestamp = {}
         for data in self.raw_data:
             streamer_name = data["info"]["name"][0]
-            first_timestamp[streamer_name] = float(data["footer"]["info"]["first_timestamp"][0])
+            if data["footer"] is not None:
+                first_timestamp[streamer_name] = float(data["footer"]["info"]["first_timestamp"][0])
+            elif len(data["time_stamps"]) > 0:
+                #sin footer (archivo cortado): se usa el primer timestamp leído
+                first_timestamp[streamer_name] = float(data["time_stamps"][0])
+            else:
+                first_timestamp[streamer_name] = None
 
         return first_timestamp
     
@@ -509,35 +911,32 @@ class LSLDataManager():
         dic = {}
 
         for name in self.streamers_names:
-            trials = self.trials_info.get(name, {})
+            table = self._get_table(name)
 
-            if not trials:
+            if table is None or "sessionStartTime" not in table:
                 dic[name] = None
                 continue
 
-            first_key = list(trials.keys())[0]
-            dic[name] = trials[first_key].get("sessionStartTime", None)
+            first_value = table["sessionStartTime"][0]
+            dic[name] = first_value.item() if isinstance(first_value, np.generic) else first_value
 
         return dic
 
-    def _get_trials_info(self):
+    @cached_property
+    def trials_info(self):
         """
         Función para exrtaer toda la información de los trials registrados por cada streamer.
         La función retorna un diccionario con los keys siendo los nombres de los streamers. Cada key es otro
         diccionario con los keys siendo los IDs de los trials y los values siendo listas con los datos de cada trial.
+
+        Se arma a demanda (una única vez) a partir de trials_tables. Para consultar un campo de todos
+        los trials conviene usar directamente las columnas: lsl_manager["streamer", "campo", :].
         """
         trials_info = {}
         for streamer in self.streamers_names:
-            keys = self.streamers_keys[streamer]
-            trials_data = self.time_series[streamer]
-            trials_info[streamer] = {i+1: dict(zip(keys, trials_data[i].values()) if isinstance(trials_data[i], dict)
-                                               else trials_data[i])
-                                               for i in range(len(trials_data))}
-            
-        ##para cada streamer, elimino los trials que no tienen datos (diccionarios vacíos
-        for streamer in trials_info:
-            trials_info[streamer] = {k: v for k, v in trials_info[streamer].items() if v}
-            
+            table = self.trials_tables[streamer]
+            trials_info[streamer] = {position: table.row(i) for i, position in enumerate(table.positions.tolist())}
+
         return trials_info
     
     def _describe_one_streamer(self, streamer_name: str) -> dict:
@@ -555,63 +954,47 @@ class LSLDataManager():
             "letters": None,
         }
 
-        trials_info = self._get_trials_from_streamer(streamer_name)
+        table = self._get_table(streamer_name)
 
-        if not trials_info:
+        if table is None:
             return empty_dict
 
-        keys = list(trials_info.keys())
-        first_key = keys[0]
-        last_key = keys[-1]
-
-        first_trial = trials_info[first_key]
-        last_trial = trials_info[last_key]
-
-        session_start = first_trial.get("sessionStartTime", None)
-        session_final = last_trial.get("sessionFinalTime", None)
+        session_start = table.numeric("sessionStartTime")
+        session_final = table.numeric("sessionFinalTime")
 
         out = empty_dict.copy()
 
         if session_start is not None and session_final is not None:
-            out["duration"] = round(float((session_final - session_start) / 1000), 2)
+            duration = (session_final[-1] - session_start[0]) / 1000
+            if not np.isnan(duration):
+                out["duration"] = round(float(duration), 2)
 
-        out["trials"] = len(trials_info)
+        out["trials"] = len(table)
 
-        trial_times = [
-            trial.get("trialStartTime", None)
-            for trial in trials_info.values()
-            if trial.get("trialStartTime", None) is not None
-        ]
-
-        if len(trial_times) >= 2:
-            trial_times_diff = np.abs(np.diff(trial_times))
-            out["trials_avg_time"] = round(float(np.mean(trial_times_diff) / 1000), 2)
-            out["trials_time_std"] = round(float(np.std(trial_times_diff) / 1000), 2)
+        trial_times = table.numeric("trialStartTime")
+        if trial_times is not None:
+            trial_times = trial_times[~np.isnan(trial_times)]
 
-        cue_times = []
-        rest_times = []
+            if len(trial_times) >= 2:
+                trial_times_diff = np.abs(np.diff(trial_times))
+                out["trials_avg_time"] = round(float(np.mean(trial_times_diff) / 1000), 2)
+                out["trials_time_std"] = round(float(np.std(trial_times_diff) / 1000), 2)
 
-        for trial in trials_info.values():
-            cue = trial.get("trialCueTime", None)
-            rest = trial.get("trialRestTime", None)
+        cue_times = table.numeric("trialCueTime")
+        rest_times = table.numeric("trialRestTime")
 
-            if cue is not None and rest is not None:
-                cue_times.append(cue)
-                rest_times.append(rest)
+        if cue_times is not None and rest_times is not None:
+            cue_durations = np.abs(rest_times - cue_times)
+            cue_durations = cue_durations[~np.isnan(cue_durations)]
 
-        if len(cue_times) > 0:
-            cue_durations = np.abs(np.array(rest_times) - np.array(cue_times))
-            out["cues_avg_time"] = round(float(np.mean(cue_durations) / 1000), 2)
-            out["cues_time_std"] = round(float(np.std(cue_durations) / 1000), 2)
+            if len(cue_durations) > 0:
+                out["cues_avg_time"] = round(float(np.mean(cue_durations) / 1000), 2)
+                out["cues_time_std"] = round(float(np.std(cue_durations) / 1000), 2)
 
-        letters = [
-            trial.get("letter", None)
-            for trial in trials_info.values()
-            if trial.get("letter", None) is not None
-        ]
+        letters = [letter for letter in table.get("letter", []) if letter is not None]
 
         if letters:
-            out["letters"] = sorted(list(set(letters)))
+            out["letters"] = sorted(set(str(letter) for letter in letters))
 
         return out
     
@@ -639,29 +1022,30 @@ class LSLDataManager():
         """
         delays = {}
 
-        tablet_trials = self._get_trials_from_streamer(self.tab_name)
+        table = self._get_table(self.tab_name)
 
-        if not tablet_trials:
+        if table is None:
             logging.warning(
                 f"No hay trials para '{self.tab_name}'. "
                 "No se computarán delays de penDown."
             )
             return delays
 
-        for trial in tablet_trials.values():
-            pendownmarker = trial["penDownMarkers"]
+        columns = zip(table["trialID"].tolist(), table["letter"].tolist(),
+                      table["penDownMarkers"].tolist(), table.numeric("trialCueTime"))
+
+        for trialID, letter, pendownmarker, trialCueTime in columns:
             if len(pendownmarker) > 0: #hubo un evento de penDown registrado
                 penDownTime = pendownmarker[0] #tiempo del primer penDown registrado
-                trialCueTime = trial["trialCueTime"] #tiempo del cue
                 delay = penDownTime - trialCueTime #diferencia entre ambos tiempos
-                delays[trial["trialID"]] = {
-                    "letter": trial["letter"],
+                delays[trialID] = {
+                    "letter": letter,
                     "delay": round(float(delay)/1000,2) #segundos
                 }
                 
             else:
-                delays[trial["trialID"]] = {
-                    "letter": trial["letter"],
+                delays[trialID] = {
+                    "letter": letter,
                     "delay": None
                 }
                 continue
@@ -704,28 +1088,29 @@ class LSLDataManager():
         """
         durations = {}
 
-        tablet_trials = self._get_trials_from_streamer(self.tab_name)
+        table = self._get_table(self.tab_name)
 
-        if not tablet_trials:
+        if table is None:
             logging.warning(
                 f"No hay trials para '{self.tab_name}'. "
                 "No se computarán duraciones de trazos."
             )
             return durations
         
-        for trial in tablet_trials.values():
-            traces = np.array(trial["coordinates"])
-            if len(traces) > 0: #se registró al menos un punto de trazado
-                first_point = traces[0,2] #tiempo del último penDown registrado
-                last_point = traces[-1,2] #tiempo del último penDown registrado
-                durations[trial["trialID"]] = {
-                    "letter": trial["letter"],
+        coordinates = table.get("coordinates") or [None] * len(table)
+
+        for trialID, letter, traces in zip(table["trialID"].tolist(), table["letter"].tolist(), coordinates):
+            if traces is not None and len(traces) > 0: #se registró al menos un punto de trazado
+                first_point = traces[0][2] #tiempo del primer punto registrado
+                last_point = traces[-1][2] #tiempo del último punto registrado
+                durations[trialID] = {
+                    "letter": letter,
                     "duration": round(float((last_point-first_point)/1000),2) #segundos
                 }
 
             else:
-                durations[trial["trialID"]] = {
-                    "letter": trial["letter"],
+                durations[trialID] = {
+                    "letter": letter,
                     "duration": None
                 }
                 continue
@@ -772,12 +1157,14 @@ class LSLDataManager():
         if not self.has_tablet_stream:
             return None
 
-        tablet_trials = self._get_trials_from_streamer(self.tab_name)
-        info_trial = tablet_trials.get(trialID, None)
+        table = self.trials_tables[self.tab_name]
+        row_index = table.row_index(trialID)
 
-        if info_trial is None:
+        if row_index is None:
             return None
 
+        info_trial = table.row(row_index)
+
         first_timestamp = self.first_timestamp.get(self.tab_name, None)
 
         info_dict = {
@@ -838,19 +1225,18 @@ class LSLDataManager():
 
             Si no hay tablet, trials_ids_tablet será [].
         """
-        trial_ids_tablet = []
-        trials_ids_laptop = []
+        trials_ids = []
 
-        laptop_trials = self._get_trials_from_streamer(self.lap_name)
-        tablet_trials = self._get_trials_from_streamer(self.tab_name)
+        for streamer in (self.lap_name, self.tab_name):
+            table = self._get_table(streamer)
 
-        for trialID, info in laptop_trials.items():
-            if info.get("letter", None) == letter:
-                trials_ids_laptop.append(trialID)
+            if table is None or "letter" not in table:
+                trials_ids.append([])
+                continue
+
+            trials_ids.append(table.positions[table["letter"] == letter].tolist())
 
-        for trialID, info in tablet_trials.items():
-            if info.get("letter", None) == letter:
-                trial_ids_tablet.append(trialID)
+        trials_ids_laptop, trial_ids_tablet = trials_ids
 
         return trials_ids_laptop, trial_ids_tablet
     
@@ -1023,30 +1409,22 @@ class LSLDataManager():
         streamer, label, idx = key
 
         # Validación de streamer
-        if streamer not in self.time_series:
+        table = self.trials_tables.get(streamer, None)
+        if table is None or label not in table:
             return None
 
-        trials = self.time_series[streamer]
-
-        # Filtrar por trialID
-        filtered = []
-        for t in trials:
-            if isinstance(t, dict) and label in t:
-                filtered.append(t[label])
-
-        if not filtered:
-            return None
+        column = table[label]
 
-        # Aplicar slicing / indexing
+        # Aplicar slicing / indexing directamente sobre la columna
         try:
-            return filtered[idx]
+            return column[idx]
         except Exception:
             return None
         
     def __str__(self):
         resumen_streams = []
-        for streamer, trials in self.time_series.items():
-            num_markers = sum(len(trial.keys()) for trial in trials if isinstance(trial, dict))
+        for streamer, table in self.trials_tables.items():
+            num_markers = len(table) * len(table.fields)
             resumen_streams.append(f"    - {streamer}: {num_markers} marcadores")
 
         # Agregar detalle de trials
@@ -1055,8 +1433,8 @@ class LSLDataManager():
             try:
                 # Intentamos obtener las letras de este streamer
                 letras = self[streamer, "letter", :]
-                if letras:
-                    letras = list(letras)
+                if letras is not None and len(letras) > 0:
+                    letras = np.asarray(letras).tolist()
                     resumen_trials.append(
                         f"    - {streamer}: {len(letras)} trials / Letras → {letras}"
                     )
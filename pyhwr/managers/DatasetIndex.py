@@ -0,0 +1,325 @@
+import json
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from pyhwr.managers.DataManagers import LSLDataManager, GHiampDataManager
+from pyhwr.managers.DatasetLoader import DatasetLoader, RunKey
+
+#versión del esquema; cambiarla hace que se vuelva a armar el índice completo
+INDEX_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    sub TEXT NOT NULL,
+    ses TEXT NOT NULL,
+    task TEXT NOT NULL,
+    run TEXT NOT NULL,
+    xdf_path TEXT,
+    xdf_size INTEGER,
+    xdf_mtime_ns INTEGER,
+    hdf5_path TEXT,
+    hdf5_size INTEGER,
+    hdf5_mtime_ns INTEGER,
+    fecha_registro TEXT,
+    timestamp_registro REAL,
+    eeg_fecha_registro TEXT,
+    sample_rate REAL,
+    n_channels INTEGER,
+    n_samples INTEGER,
+    has_tablet INTEGER NOT NULL DEFAULT 0,
+    has_laptop INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    indexed_at REAL,
+    UNIQUE (sub, ses, task, run)
+);
+CREATE TABLE IF NOT EXISTS streams (
+    run_id INTEGER NOT NULL REFERENCES runs (run_id) ON DELETE CASCADE,
+    streamer TEXT NOT NULL,
+    trials INTEGER NOT NULL,
+    valid_trials INTEGER NOT NULL,
+    letters TEXT,
+    PRIMARY KEY (run_id, streamer)
+);
+CREATE INDEX IF NOT EXISTS runs_by_subject ON runs (sub, ses, task);
+"""
+
+_RUN_COLUMNS = ["sub", "ses", "task", "run", "xdf_path", "xdf_size", "xdf_mtime_ns", "hdf5_path", "hdf5_size",
+                "hdf5_mtime_ns", "fecha_registro", "timestamp_registro", "eeg_fecha_registro", "sample_rate",
+                "n_channels", "n_samples", "has_tablet", "has_laptop", "error", "indexed_at"]
+
+def _file_stat(filename):
+    """Retorna (tamaño, mtime_ns) de un archivo, o (None, None) si no se indica archivo."""
+    if filename is None:
+        return None, None
+    stat = os.stat(filename)
+    return stat.st_size, stat.st_mtime_ns
+
+def _valid_trials(table):
+    """
+    Cantidad de trials válidos de una TrialTable: con trialStartTime registrado y, si el streamer
+    registra trazos, con al menos una coordenada.
+    """
+    valid = np.ones(len(table), dtype=bool)
+
+    start_times = table.numeric("trialStartTime")
+    if start_times is not None:
+        valid &= ~np.isnan(start_times)
+
+    if table.coordinates is not None:
+        valid &= np.array([coordinates is not None and len(coordinates) > 0 for coordinates in table.coordinates],
+                          dtype=bool)
+
+    return int(valid.sum())
+
+def _summarize_run(key, files, lsl_kwargs=None):
+    """
+    Abre los archivos de una ronda y resume lo que se guarda en el índice. Función de módulo para poder
+    ejecutarse en otro proceso; retorna (key, fila de runs, filas de streams).
+    """
+    xdf_path, hdf5_path = files.get("xdf"), files.get("hdf5")
+    xdf_size, xdf_mtime_ns = _file_stat(xdf_path)
+    hdf5_size, hdf5_mtime_ns = _file_stat(hdf5_path)
+
+    row = dict(zip(_RUN_COLUMNS, [None] * len(_RUN_COLUMNS)))
+    row.update(sub=key.sub, ses=key.ses, task=key.task, run=key.run,
+               xdf_path=xdf_path, xdf_size=xdf_size, xdf_mtime_ns=xdf_mtime_ns,
+               hdf5_path=hdf5_path, hdf5_size=hdf5_size, hdf5_mtime_ns=hdf5_mtime_ns,
+               has_tablet=0, has_laptop=0, indexed_at=time.time())
+    streams = []
+    errors = []
+
+    if xdf_path is not None:
+        try:
+            lsl = LSLDataManager(xdf_path, **(lsl_kwargs or {}))
+            row["fecha_registro"] = lsl.fecha_registro.isoformat() if lsl.fecha_registro is not None else None
+            row["timestamp_registro"] = lsl.timestamp_registro
+            row["has_tablet"] = int(lsl.has_tablet_stream)
+            row["has_laptop"] = int(lsl.has_laptop_stream)
+            for streamer, table in lsl.trials_tables.items():
+                letters = sorted({str(letter) for letter in table.get("letter", []) if letter is not None})
+                streams.append({"streamer": streamer, "trials": len(table), "valid_trials": _valid_trials(table),
+                                "letters": json.dumps(letters)})
+        except Exception as error:
+            errors.append(f"{xdf_path}: {error}")
+
+    if hdf5_path is not None:
+        try:
+            with GHiampDataManager.open_header(hdf5_path, subject=f"sub-{key.sub}") as ghiamp:
+                row["eeg_fecha_registro"] = ghiamp.fecha_registro.isoformat() if ghiamp.fecha_registro is not None else None
+                row["sample_rate"] = ghiamp.sample_rate
+                row["n_channels"] = ghiamp.n_channels
+                row["n_samples"] = ghiamp.n_samples
+        except Exception as error:
+            errors.append(f"{hdf5_path}: {error}")
+
+    row["error"] = "\n".join(errors) or None
+    return key, row, streams
+
+class DatasetIndex():
+    """
+    Índice persistente (SQLite) de las rondas registradas en un dataset con estructura tipo BIDS.
+
+    Por cada ronda guarda sujeto, sesión, tarea y ronda, tamaño y fecha de modificación de los archivos,
+    fecha de registro, frecuencia de muestreo y cantidad de canales del g.HIAMP, y por cada streamer la
+    cantidad de trials, los trials válidos y las letras presentadas. refresh() sólo vuelve a abrir las rondas
+    cuyos archivos cambiaron (tamaño o mtime), de modo que las consultas no tocan los archivos crudos.
+
+    Uso:
+        index = DatasetIndex("D:\\dataset\\DataBase")
+        index.refresh(n_jobs=4)
+        index.runs(subjects=6, streamer="Tablet_Markers", min_valid_trials=30)
+    """
+
+    def __init__(self, root, db_path=None):
+        """
+        Parámetros
+        ----------
+        root: str. Carpeta raíz del dataset (la que contiene las carpetas sub-XX).
+        db_path: str | None. Archivo SQLite del índice. None usa root/pyhwr_index.sqlite.
+        """
+        self.root = root
+        self.db_path = db_path if db_path is not None else os.path.join(root, "pyhwr_index.sqlite")
+        self._connection = sqlite3.connect(self.db_path)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._create_schema()
+
+    def _create_schema(self):
+        version = self._connection.execute("PRAGMA user_version").fetchone()[0]
+        if version != INDEX_VERSION:
+            self._connection.executescript("DROP TABLE IF EXISTS streams; DROP TABLE IF EXISTS runs;")
+        self._connection.executescript(_SCHEMA)
+        self._connection.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+        self._connection.commit()
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _indexed_signatures(self):
+        """Retorna {RunKey: (run_id, xdf_path, xdf_size, xdf_mtime_ns, hdf5_path, hdf5_size, hdf5_mtime_ns)}."""
+        rows = self._connection.execute(
+            "SELECT sub, ses, task, run, run_id, xdf_path, xdf_size, xdf_mtime_ns, hdf5_path, hdf5_size, hdf5_mtime_ns "
+            "FROM runs"
+        )
+        return {RunKey(*row[:4]): tuple(row[4:]) for row in rows}
+
+    @staticmethod
+    def _signature(files):
+        xdf_size, xdf_mtime_ns = _file_stat(files.get("xdf"))
+        hdf5_size, hdf5_mtime_ns = _file_stat(files.get("hdf5"))
+        return files.get("xdf"), xdf_size, xdf_mtime_ns, files.get("hdf5"), hdf5_size, hdf5_mtime_ns
+
+    def _store(self, key, row, streams):
+        connection = self._connection
+        connection.execute("DELETE FROM runs WHERE sub = ? AND ses = ? AND task = ? AND run = ?", key)
+        cursor = connection.execute(
+            f"INSERT INTO runs ({', '.join(_RUN_COLUMNS)}) VALUES ({', '.join('?' * len(_RUN_COLUMNS))})",
+            [row[column] for column in _RUN_COLUMNS],
+        )
+        connection.executemany(
+            "INSERT INTO streams (run_id, streamer, trials, valid_trials, letters) VALUES (?, ?, ?, ?, ?)",
+            [(cursor.lastrowid, s["streamer"], s["trials"], s["valid_trials"], s["letters"]) for s in streams],
+        )
+
+    def refresh(self, n_jobs=1, progress=None, lsl_kwargs=None):
+        """
+        Actualiza el índice: agrega las rondas nuevas, vuelve a leer las que cambiaron y elimina las
+        que ya no existen.
+
+        Parámetros
+        ----------
+        n_jobs: int | None. Procesos usados para leer las rondas. None usa os.cpu_count().
+        progress: callable | None. Se llama como progress(leidas, total, key) al terminar cada ronda.
+        lsl_kwargs: dict | None. Argumentos extra para LSLDataManager (p. ej. {"cache": RunCache()}).
+
+        Retorna
+        -------
+        dict con las listas de RunKey agregadas ("added"), actualizadas ("updated") y eliminadas ("removed").
+        """
+        found = DatasetLoader(self.root).discover()
+        indexed = self._indexed_signatures()
+
+        pending = {}
+        for key, files in found.items():
+            previous = indexed.get(key)
+            if previous is None or previous[1:] != self._signature(files):
+                pending[key] = files
+
+        removed = [key for key in indexed if key not in found]
+        with self._connection:
+            for key in removed:
+                self._connection.execute("DELETE FROM runs WHERE sub = ? AND ses = ? AND task = ? AND run = ?", key)
+
+        n_jobs = n_jobs or os.cpu_count() or 1
+        if n_jobs == 1 or len(pending) <= 1:
+            results = (_summarize_run(key, files, lsl_kwargs) for key, files in pending.items())
+            executor = None
+        else:
+            executor = ProcessPoolExecutor(max_workers=n_jobs)
+            results = executor.map(_summarize_run, pending.keys(), pending.values(),
+                                   [lsl_kwargs] * len(pending))
+
+        try:
+            for done, (key, row, streams) in enumerate(results, start=1):
+                if row["error"] is not None:
+                    logging.warning(f"Error al indexar {key}: {row['error']}")
+                with self._connection:
+                    self._store(key, row, streams)
+                if progress is not None:
+                    progress(done, len(pending), key)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        return {
+            "added": [key for key in pending if key not in indexed],
+            "updated": [key for key in pending if key in indexed],
+            "removed": removed,
+        }
+
+    def query(self, sql, params=()):
+        """Ejecuta una consulta SQL sobre el índice (tablas runs y streams) y retorna un DataFrame."""
+        return pd.read_sql_query(sql, self._connection, params=params)
+
+    def runs(self, subjects=None, sessions=None, tasks=None, streamer=None, min_trials=None,
+             min_valid_trials=None, has_tablet=None, has_laptop=None):
+        """
+        Retorna un DataFrame con las rondas indexadas que cumplen los filtros, una fila por ronda.
+
+        Parámetros
+        ----------
+        subjects, sessions, tasks: valor o lista. Los números se comparan también con dos dígitos (6 -> "06").
+        streamer: str | None. Si se indica, se agregan las columnas trials, valid_trials y letters de ese
+            streamer y se descartan las rondas que no lo tienen.
+        min_trials, min_valid_trials: int | None. Mínimo de trials (o trials válidos) del streamer indicado.
+        has_tablet, has_laptop: bool | None. Filtra por presencia de cada streamer.
+        """
+        if (min_trials is not None or min_valid_trials is not None) and streamer is None:
+            raise ValueError("min_trials y min_valid_trials requieren indicar el streamer.")
+
+        conditions, params = [], []
+        for column, values in (("sub", subjects), ("ses", sessions), ("task", tasks)):
+            if values is None:
+                continue
+            if isinstance(values, (str, int)):
+                values = [values]
+            allowed = {str(value) for value in values}
+            allowed |= {f"{int(value):02d}" for value in allowed if value.isdigit()}
+            conditions.append(f"runs.{column} IN ({', '.join('?' * len(allowed))})")
+            params.extend(sorted(allowed))
+
+        for column, value in (("has_tablet", has_tablet), ("has_laptop", has_laptop)):
+            if value is not None:
+                conditions.append(f"runs.{column} = ?")
+                params.append(int(value))
+
+        sql = "SELECT runs.*"
+        if streamer is not None:
+            sql += ", streams.trials, streams.valid_trials, streams.letters FROM runs " \
+                   "JOIN streams ON streams.run_id = runs.run_id AND streams.streamer = ?"
+            params.insert(0, streamer)
+            if min_trials is not None:
+                conditions.append("streams.trials >= ?")
+                params.append(min_trials)
+            if min_valid_trials is not None:
+                conditions.append("streams.valid_trials >= ?")
+                params.append(min_valid_trials)
+        else:
+            sql += " FROM runs"
+
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY runs.sub, runs.ses, runs.task, runs.run"
+
+        df = self.query(sql, params)
+        if "letters" in df:
+            df["letters"] = [json.loads(letters) if letters is not None else None for letters in df["letters"]]
+        return df
+
+    def streams(self):
+        """Retorna un DataFrame con los trials por streamer de todas las rondas indexadas."""
+        df = self.query(
+            "SELECT runs.sub, runs.ses, runs.task, runs.run, streams.streamer, streams.trials, "
+            "streams.valid_trials, streams.letters FROM streams JOIN runs ON streams.run_id = runs.run_id "
+            "ORDER BY runs.sub, runs.ses, runs.task, runs.run, streams.streamer"
+        )
+        df["letters"] = [json.loads(letters) if letters is not None else None for letters in df["letters"]]
+        return df
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+
+    def __repr__(self):
+        return f"DatasetIndex(root={self.root!r}, db_path={self.db_path!r}, rondas={len(self)})"
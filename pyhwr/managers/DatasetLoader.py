@@ -0,0 +1,302 @@
+import logging
+import os
+import re
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+
+from pyhwr.managers.DataManagers import LSLDataManager, GHiampDataManager
+from pyhwr.managers.DataContainers import SamplesView
+
+#nombres tipo BIDS que generan InitAPP.create_bids_structure y SessionInfo:
+#sub-XX_ses-XX_task-<tarea>_run-XX_<sufijo>.<xdf|hdf5>
+_RUN_FILENAME = re.compile(
+    r"^sub-(?P<sub>[^_]+)_ses-(?P<ses>[^_]+)_task-(?P<task>[^_]+)_run-(?P<run>[^_]+)_(?P<suffix>[^_.]+)\.(?P<ext>xdf|hdf5)$"
+)
+
+RunKey = namedtuple("RunKey", ["sub", "ses", "task", "run"])
+
+def _as_filter(values):
+    """Normaliza un filtro (valor suelto, lista o None) a un set de strings, o None si no hay filtro."""
+    if values is None:
+        return None
+    if isinstance(values, (str, int)):
+        values = [values]
+    normalized = set()
+    for value in values:
+        value = str(value)
+        normalized.add(value)
+        if value.isdigit():
+            normalized.add(f"{int(value):02d}")
+    return normalized
+
+def _load_run(key, files, lsl_kwargs, ghiamp_kwargs, cache):
+    """
+    Carga los archivos de una ronda. Función de módulo para poder ejecutarse en otro proceso.
+    Retorna (key, lsl, ghiamp, errores) donde lsl/ghiamp son None si el archivo no existe o falló.
+    """
+    lsl, ghiamp, errors = None, None, []
+
+    if "xdf" in files:
+        try:
+            lsl = LSLDataManager(files["xdf"], cache=cache, **lsl_kwargs)
+        except Exception as error:
+            errors.append(f"{files['xdf']}: {error}")
+
+    if "hdf5" in files:
+        try:
+            ghiamp = GHiampDataManager(files["hdf5"], subject=f"sub-{key.sub}", cache=cache, **ghiamp_kwargs)
+        except Exception as error:
+            errors.append(f"{files['hdf5']}: {error}")
+
+    return key, lsl, ghiamp, errors
+
+def estimate_nbytes(manager):
+    """
+    Estima la memoria (en bytes) que ocupa un LSLDataManager o GHiampDataManager ya cargado.
+    Cuenta los arrays principales (tablas de trials, coordenadas, muestras precargadas, eventos).
+    """
+    if manager is None:
+        return 0
+
+    if isinstance(manager, LSLDataManager):
+        total = 0
+        for table in manager.trials_tables.values():
+            total += table.positions.nbytes
+            for column in table.columns.values():
+                #las columnas object guardan referencias a listas; se estiman 64 bytes por elemento
+                total += column.nbytes if column.dtype != object else 64 * len(column)
+            for coordinates in table.coordinates or []:
+                total += getattr(coordinates, "nbytes", 0)
+        if "coordinates_info" in manager.__dict__:
+            total += manager.coordinates_info.nbytes
+        return total
+
+    total = manager.events.nbytes
+    if manager.raw_data is not None and not isinstance(manager.raw_data, SamplesView):
+        total += np.asarray(manager.raw_data).nbytes
+    return total
+
+class LoadedRuns(Mapping):
+    """
+    Rondas cargadas por DatasetLoader: mapeo RunKey(sub, ses, task, run) -> (lsl, ghiamp).
+
+    Si se fija max_bytes, se mantienen en memoria sólo las rondas usadas más recientemente que entren
+    en ese presupuesto; las demás se descartan y se vuelven a cargar (en este proceso) al pedirlas.
+    Con un RunCache, volver a cargar una ronda cuesta pocos milisegundos.
+    """
+
+    def __init__(self, loader, files, max_bytes=None):
+        """
+        Parámetros
+        ----------
+        loader: DatasetLoader. Loader usado para recargar las rondas descartadas.
+        files: dict[RunKey, dict]. Archivos de cada ronda (ver DatasetLoader.discover()).
+        max_bytes: int | None. Presupuesto de memoria para las rondas cargadas. None no limita.
+        """
+        self._loader = loader
+        self._files = files
+        self.max_bytes = max_bytes
+        self._loaded = OrderedDict() #RunKey -> (lsl, ghiamp), del menos al más recientemente usado
+        self._sizes = {}
+        self.errors = {}
+
+    @property
+    def nbytes(self):
+        """Memoria estimada de las rondas que están cargadas."""
+        return sum(self._sizes.values())
+
+    def _store(self, key, lsl, ghiamp):
+        self._loaded[key] = (lsl, ghiamp)
+        self._loaded.move_to_end(key)
+        self._sizes[key] = estimate_nbytes(lsl) + estimate_nbytes(ghiamp)
+
+        if self.max_bytes is None:
+            return
+
+        #se descartan las rondas usadas hace más tiempo (nunca la recién guardada). Sólo se suelta la
+        #referencia: quien ya tenga el manager lo puede seguir usando, y el archivo .hdf5 se cierra cuando
+        #el manager deja de usarse
+        while self.nbytes > self.max_bytes and len(self._loaded) > 1:
+            old_key, _ = self._loaded.popitem(last=False)
+            self._sizes.pop(old_key)
+            logging.debug(f"Ronda {old_key} descartada de memoria (presupuesto de {self.max_bytes} bytes).")
+
+    def is_loaded(self, key):
+        """Indica si la ronda está en memoria (sin cargarla)."""
+        return key in self._loaded
+
+    def __getitem__(self, key):
+        if key not in self._files:
+            raise KeyError(key)
+
+        if key in self._loaded:
+            self._loaded.move_to_end(key)
+            return self._loaded[key]
+
+        _, lsl, ghiamp, errors = _load_run(key, self._files[key], self._loader.lsl_kwargs,
+                                           self._loader.ghiamp_kwargs, self._loader.cache)
+        if errors:
+            self.errors[key] = errors
+        self._store(key, lsl, ghiamp)
+        return lsl, ghiamp
+
+    def __iter__(self):
+        return iter(self._files)
+
+    def __len__(self):
+        return len(self._files)
+
+    def __repr__(self):
+        return f"LoadedRuns(rondas={len(self)}, en_memoria={len(self._loaded)}, bytes={self.nbytes})"
+
+class DatasetLoader():
+    """
+    Busca y carga en paralelo las rondas de un dataset con estructura tipo BIDS
+    (root/sub-XX/ses-XX/[eeg/]sub-XX_ses-XX_task-<tarea>_run-XX_eeg.{xdf,hdf5}).
+
+    Cada ronda se carga en un proceso (o hilo) del pool: LSLDataManager para el .xdf y
+    GHiampDataManager para el .hdf5. El resultado es un LoadedRuns, un mapeo
+    RunKey(sub, ses, task, run) -> (lsl, ghiamp) con presupuesto de memoria opcional.
+
+    Uso:
+        loader = DatasetLoader("D:\\dataset\\DataBase", n_jobs=4, cache=RunCache())
+        runs = loader.load(subjects=[6], tasks="ejecutada", progress=lambda hechas, total, key: print(hechas, total))
+        lsl, ghiamp = runs[RunKey("06", "01", "ejecutada", "01")]
+    """
+
+    def __init__(self, root, n_jobs=None, executor="process", cache=None, max_bytes=None,
+                 lsl_kwargs=None, ghiamp_kwargs=None):
+        """
+        Parámetros
+        ----------
+        root: str. Carpeta raíz del dataset (la que contiene las carpetas sub-XX).
+        n_jobs: int | None. Cantidad de procesos/hilos. None usa os.cpu_count(); 1 carga en este proceso.
+        executor: str. "process" (ProcessPoolExecutor) o "thread" (ThreadPoolExecutor).
+        cache: RunCache | None. Cache en disco compartido por todos los workers.
+        max_bytes: int | None. Presupuesto de memoria para las rondas cargadas (ver LoadedRuns).
+        lsl_kwargs, ghiamp_kwargs: dict | None. Argumentos extra para LSLDataManager y GHiampDataManager
+            (p. ej. ghiamp_kwargs={"metadata_only": True}).
+        """
+        if executor not in ("process", "thread"):
+            raise ValueError("executor debe ser 'process' o 'thread'.")
+
+        self.root = root
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.executor = executor
+        self.cache = cache
+        self.max_bytes = max_bytes
+        self.lsl_kwargs = dict(lsl_kwargs or {})
+        self.ghiamp_kwargs = dict(ghiamp_kwargs or {})
+
+    def discover(self, subjects=None, sessions=None, tasks=None, runs=None, suffix="eeg"):
+        """
+        Recorre root y retorna {RunKey: {"xdf": ruta, "hdf5": ruta}} con las rondas encontradas,
+        ordenadas por sujeto, sesión, tarea y ronda. Los filtros aceptan un valor o una lista
+        (los números se comparan también con dos dígitos: 6 -> "06").
+        """
+        filters = {
+            "sub": _as_filter(subjects),
+            "ses": _as_filter(sessions),
+            "task": _as_filter(tasks),
+            "run": _as_filter(runs),
+        }
+
+        found = {}
+        for folder, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                match = _RUN_FILENAME.match(filename)
+                if match is None or match["suffix"] != suffix:
+                    continue
+                if any(allowed is not None and match[field] not in allowed for field, allowed in filters.items()):
+                    continue
+
+                key = RunKey(match["sub"], match["ses"], match["task"], match["run"])
+                files = found.setdefault(key, {})
+                if match["ext"] in files:
+                    logging.warning(f"Archivo repetido para {key}: {os.path.join(folder, filename)}. Se ignora.")
+                    continue
+                files[match["ext"]] = os.path.join(folder, filename)
+
+        return dict(sorted(found.items()))
+
+    def _make_executor(self):
+        if self.executor == "thread":
+            return ThreadPoolExecutor(max_workers=self.n_jobs)
+        return ProcessPoolExecutor(max_workers=self.n_jobs)
+
+    def iter_load(self, files=None, progress=None, **filters):
+        """
+        Carga las rondas en el pool y las entrega a medida que terminan, como tuplas
+        (key, lsl, ghiamp, errores).
+
+        Para acotar la memoria, nunca hay más de 2 * n_jobs rondas pendientes de entregar.
+
+        Parámetros
+        ----------
+        files: dict[RunKey, dict] | None. Rondas a cargar. None usa discover(**filters).
+        progress: callable | None. Se llama como progress(cargadas, total, key) al terminar cada ronda.
+        """
+        if files is None:
+            files = self.discover(**filters)
+
+        total = len(files)
+        pending_keys = iter(files.items())
+        done_count = 0
+
+        if self.n_jobs == 1:
+            for key, run_files in pending_keys:
+                result = _load_run(key, run_files, self.lsl_kwargs, self.ghiamp_kwargs, self.cache)
+                done_count += 1
+                if progress is not None:
+                    progress(done_count, total, key)
+                yield result
+            return
+
+        with self._make_executor() as pool:
+            running = set()
+            while True:
+                while len(running) < 2 * self.n_jobs:
+                    item = next(pending_keys, None)
+                    if item is None:
+                        break
+                    key, run_files = item
+                    running.add(pool.submit(_load_run, key, run_files, self.lsl_kwargs, self.ghiamp_kwargs, self.cache))
+
+                if not running:
+                    break
+
+                finished, running = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    result = future.result()
+                    done_count += 1
+                    if progress is not None:
+                        progress(done_count, total, result[0])
+                    yield result
+
+    def load(self, progress=None, **filters):
+        """
+        Busca y carga las rondas (ver discover() para los filtros subjects, sessions, tasks, runs).
+
+        Retorna
+        -------
+        LoadedRuns
+            Mapeo RunKey -> (lsl, ghiamp). Los errores de carga se informan con logging y quedan en
+            LoadedRuns.errors; el manager correspondiente queda en None.
+        """
+        files = self.discover(**filters)
+        loaded = LoadedRuns(self, files, max_bytes=self.max_bytes)
+
+        for key, lsl, ghiamp, errors in self.iter_load(files, progress=progress):
+            for error in errors:
+                logging.warning(f"Error al cargar {error}")
+            if errors:
+                loaded.errors[key] = errors
+            loaded._store(key, lsl, ghiamp)
+
+        return loaded
+
+    def __repr__(self):
+        return f"DatasetLoader(root={self.root!r}, n_jobs={self.n_jobs}, executor={self.executor!r})"
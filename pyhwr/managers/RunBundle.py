@@ -0,0 +1,376 @@
+import json
+import logging
+import os
+import shutil
+import uuid
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+
+from pyhwr.managers.DataContainers import TrialTable, CoordinatesStore, TrialEpochs, SamplesView
+from pyhwr.utils.ClockSynchronizer import ClockSynchronizer
+
+#versión del formato del bundle
+BUNDLE_VERSION = 1
+
+#campos de tiempo (ms) de los mensajes de LSL que se agregan a la tabla unificada de eventos
+_LSL_EVENT_FIELDS = ("trialStartTime", "trialCueTime", "trialFadeOffTime", "trialRestTime")
+
+#contenido de la carpeta de un bundle; write(overwrite=True) sólo reemplaza carpetas con esta estructura
+_BUNDLE_ENTRIES = {"meta.json", "eeg.npy", "events.npy", "trials"}
+
+_EVENTS_DTYPE = [("source", "U16"), ("name", "U32"), ("trial", np.int64), ("lsl_ms", np.float64),
+                 ("seconds", np.float64), ("sample", np.int64)]
+
+def _save_arrays(folder, arrays):
+    """Guarda cada array del diccionario como folder/<nombre>.npy."""
+    folder.mkdir(parents=True, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(folder / f"{name}.npy", np.asarray(array), allow_pickle=False)
+
+def _load_arrays(folder, mmap_mode="r"):
+    """Inversa de _save_arrays(): retorna {nombre: array mapeado en memoria}."""
+    return {path.stem: np.load(path, mmap_mode=mmap_mode, allow_pickle=False) for path in sorted(folder.glob("*.npy"))}
+
+def _is_bundle(path):
+    """
+    True si path es la carpeta de un bundle: tiene un meta.json con la versión del formato y sólo las
+    entradas de _BUNDLE_ENTRIES.
+    """
+    if not path.is_dir() or not (path / "meta.json").is_file():
+        return False
+    if any(entry.name not in _BUNDLE_ENTRIES for entry in path.iterdir()):
+        return False
+    try:
+        with open(path / "meta.json", "r", encoding="utf-8") as f:
+            return "version" in json.load(f)
+    except (OSError, ValueError):
+        return False
+
+def _sibling_dir(path, suffix):
+    """Crea y retorna una carpeta nueva junto a path (mismo disco, para poder moverla con os.replace)."""
+    sibling = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}{suffix}"
+    sibling.mkdir()
+    return sibling
+
+def _channel_names(ghiamp_manager):
+    """Nombres y tipos de los canales del g.HIAMP (los de channels_info["used_channels"], en orden de columna)."""
+    n_channels = ghiamp_manager.raw_data.shape[1]
+    used = ghiamp_manager.channels_info["used_channels"] if ghiamp_manager.channels_info is not None else None
+
+    if used is None or len(used) != n_channels:
+        return [f"Ch{i + 1}" for i in range(n_channels)], ["Desconocido"] * n_channels
+
+    names = used["ChannelName"] if "ChannelName" in used else None
+    names = names.iloc[:, 0] if names is not None and names.ndim == 2 else names
+    types = used["ChannelType"] if "ChannelType" in used else None
+    types = types.iloc[:, 0] if types is not None and types.ndim == 2 else types
+
+    names = [str(name) for name in names] if names is not None else [f"Ch{i + 1}" for i in range(n_channels)]
+    types = [str(kind) for kind in types] if types is not None else ["Desconocido"] * n_channels
+    return names, types
+
+def _events_table(ghiamp_manager, lsl_manager):
+    """
+    Tabla unificada de eventos: los marcadores de hardware del g.HIAMP y los tiempos de cada trial de los
+    streamers de LSL. Los eventos de LSL se llevan al reloj del g.HIAMP con un ClockSynchronizer cuando es
+    posible (si no, seconds y sample quedan en NaN / -1).
+    """
+    blocks = []
+
+    if ghiamp_manager is not None:
+        names_by_id = {marker_id: str(name) for name, marker_id in ghiamp_manager._marker_ids.items()}
+        events = ghiamp_manager.events
+        block = np.empty(len(events), dtype=_EVENTS_DTYPE)
+        block["source"] = "ghiamp"
+        block["name"] = [names_by_id.get(marker_id, str(marker_id)) for marker_id in events["id"].tolist()]
+        block["trial"] = -1
+        block["lsl_ms"] = np.nan
+        block["sample"] = events["sample"].astype(np.int64)
+        block["seconds"] = events["sample"] / ghiamp_manager.sample_rate
+        blocks.append(block)
+
+    if lsl_manager is not None:
+        for streamer in lsl_manager.streamers_names:
+            table = lsl_manager._get_table(streamer)
+            if table is None:
+                continue
+
+            sync = None
+            if ghiamp_manager is not None and ghiamp_manager.normalize_time:
+                try:
+                    sync = ClockSynchronizer.from_managers(ghiamp_manager, lsl_manager, streamer)
+                except (ValueError, KeyError) as error:
+                    logging.info(f"No se sincronizaron los eventos de {streamer} con el g.HIAMP: {error}")
+
+            for field in _LSL_EVENT_FIELDS:
+                times = table.numeric(field)
+                if times is None:
+                    continue
+                block = np.empty(len(times), dtype=_EVENTS_DTYPE)
+                block["source"] = streamer
+                block["name"] = field
+                block["trial"] = table.positions
+                block["lsl_ms"] = times
+                if sync is not None:
+                    seconds = sync.transform(times / 1000)
+                    block["seconds"] = seconds
+                    block["sample"] = np.where(np.isnan(seconds), -1,
+                                               np.rint(np.nan_to_num(seconds) * ghiamp_manager.sample_rate))
+                else:
+                    block["seconds"] = np.nan
+                    block["sample"] = -1
+                blocks.append(block)
+
+    if not blocks:
+        return np.empty(0, dtype=_EVENTS_DTYPE)
+
+    events = np.concatenate(blocks)
+    #orden temporal (los eventos sin tiempo en el reloj del g.HIAMP quedan al final, en orden de registro)
+    return events[np.argsort(np.where(np.isnan(events["seconds"]), np.inf, events["seconds"]), kind="stable")]
+
+class RunBundle():
+    """
+    Ronda exportada a una carpeta de arrays .npy, lista para análisis y entrenamiento de modelos.
+
+    Estructura:
+        <ruta>/
+          meta.json                       información de la ronda, canales y streamers
+          eeg.npy                         muestras float32 con forma (canales, muestras)
+          events.npy                      tabla unificada de eventos (g.HIAMP + LSL)
+          trials/<streamer>/*.npy         TrialTable de cada streamer (ver TrialTable.to_arrays()); los
+                                          trazos quedan en formato plano: coordinates__points (N, 3) y
+                                          coordinates__offsets (inicio de cada trazo)
+
+    Al abrir el bundle todos los arrays se mapean en memoria (np.load con mmap_mode="r"): leer un canal o
+    una ventana de tiempo sólo lee esas muestras del disco. Las muestras se guardan canal por canal, de
+    modo que cada canal es un bloque contiguo del archivo.
+
+    Uso:
+        RunBundle.write("D:\\bundles\\sub-06_ses-01_task-ejecutada_run-01", ghiamp_manager, lsl_manager)
+        bundle = RunBundle("D:\\bundles\\sub-06_ses-01_task-ejecutada_run-01")
+        eeg = bundle.samples[:, bundle.channel_picks("EEG")]   #(muestras, canales), lee sólo esos canales
+        epocas = bundle.get_epochs(bundle.event_times("Tablet_Markers", "trialCueTime"), tmin=-0.5, tmax=2.0)
+    """
+
+    def __init__(self, path, mmap_mode="r", tablet_name="Tablet_Markers"):
+        """
+        Parámetros
+        ----------
+        path: str | Path. Carpeta del bundle.
+        mmap_mode: str | None. Modo de np.load para los arrays ("r" mapea en memoria; None los carga).
+        tablet_name: str. Streamer con los trazos (para coordinates).
+        """
+        self.path = Path(path)
+        self.tab_name = tablet_name
+        with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+
+        if self.meta.get("version") != BUNDLE_VERSION:
+            raise ValueError(f"Versión de bundle no soportada: {self.meta.get('version')}.")
+
+        eeg_path = self.path / "eeg.npy"
+        self.eeg = np.load(eeg_path, mmap_mode=mmap_mode, allow_pickle=False) if eeg_path.exists() else None
+        self.events = np.load(self.path / "events.npy", mmap_mode=mmap_mode, allow_pickle=False)
+
+        trials_folder = self.path / "trials"
+        self.trials_tables = {
+            streamer: TrialTable.from_arrays(_load_arrays(trials_folder / streamer, mmap_mode))
+            for streamer in self.meta["streamers"]
+        }
+
+    @classmethod
+    def write(cls, path, ghiamp_manager=None, lsl_manager=None, channels=None, chunk_size=None, overwrite=False):
+        """
+        Exporta una ronda. Las muestras se copian por bloques de tiempo, sin cargar el registro completo.
+
+        Parámetros
+        ----------
+        path: str | Path. Carpeta de destino.
+        ghiamp_manager: GHiampDataManager | None. Fuente de las muestras y marcadores de hardware. Conviene
+            nombrar antes los marcadores (changeMarkersNames) para que los eventos de LSL se sincronicen.
+        lsl_manager: LSLDataManager | None. Fuente de las tablas de trials y los trazos.
+        channels: selección de canales (índices o tipos, p. ej. "EEG"). None exporta todos.
+        chunk_size: int | None. Muestras por bloque al copiar el EEG (ver SamplesView.iter_chunks()).
+        overwrite: bool. Si es True reemplaza un bundle existente. Sólo se reemplazan carpetas con la
+            estructura de un bundle (meta.json, eeg.npy, events.npy, trials/); cualquier otra cosa en path
+            lanza ValueError y no se toca.
+
+        El bundle se escribe en una carpeta temporal junto a path y se mueve a path al terminar: si la
+        exportación falla (p. ej. coordenadas que no se pueden convertir a arrays) no queda una carpeta a
+        medio escribir y el bundle anterior, si lo había, sigue intacto.
+
+        Retorna
+        -------
+        RunBundle abierto sobre la carpeta escrita.
+        """
+        if ghiamp_manager is None and lsl_manager is None:
+            raise ValueError("Hay que indicar al menos un GHiampDataManager o un LSLDataManager.")
+
+        path = Path(path)
+        cls._check_target(path, overwrite)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = _sibling_dir(path, ".tmp")
+        try:
+            cls._write_contents(tmp_path, ghiamp_manager, lsl_manager, channels, chunk_size)
+            cls._check_target(path, overwrite) #pudo aparecer mientras se escribía
+            if path.exists():
+                #el bundle anterior se aparta y se borra recién cuando el nuevo ya está en su lugar
+                old_path = _sibling_dir(path, ".old")
+                os.replace(path, old_path / path.name)
+                try:
+                    os.replace(tmp_path, path)
+                except OSError:
+                    os.replace(old_path / path.name, path)
+                    raise
+                shutil.rmtree(old_path, ignore_errors=True)
+            else:
+                os.replace(tmp_path, path)
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        return cls(path)
+
+    @staticmethod
+    def _check_target(path, overwrite):
+        """Verifica que se pueda escribir el bundle en path (que no exista, o que sea un bundle y overwrite)."""
+        if not path.exists():
+            return
+        if not overwrite:
+            raise FileExistsError(f"Ya existe {path}. Usar overwrite=True para reemplazarlo.")
+        if not _is_bundle(path):
+            raise ValueError(f"{path} no es un bundle (falta meta.json o tiene otros archivos); no se reemplaza.")
+
+    @classmethod
+    def _write_contents(cls, path, ghiamp_manager, lsl_manager, channels, chunk_size):
+        """Escribe los archivos del bundle en la carpeta path (ya creada)."""
+        meta = {"version": BUNDLE_VERSION, "streamers": [], "sources": {}}
+
+        if ghiamp_manager is not None:
+            if ghiamp_manager.raw_data is None:
+                raise ValueError("El GHiampDataManager no tiene muestras (se abrió con metadata_only=True).")
+
+            names, types = _channel_names(ghiamp_manager)
+            positions = ghiamp_manager._channel_positions(channels)
+            positions = np.arange(len(names))[positions if positions is not None else slice(None)]
+            positions = np.atleast_1d(positions)
+
+            cls._write_eeg(path / "eeg.npy", ghiamp_manager.raw_data, positions, chunk_size)
+            meta.update(
+                sample_rate=ghiamp_manager.sample_rate,
+                n_samples=int(ghiamp_manager.raw_data.shape[0]),
+                channel_names=[names[i] for i in positions.tolist()],
+                channel_types=[types[i] for i in positions.tolist()],
+                fecha_registro=ghiamp_manager.fecha_registro.isoformat() if ghiamp_manager.fecha_registro else None,
+                subject=ghiamp_manager.subject,
+            )
+            meta["sources"]["hdf5"] = os.path.abspath(ghiamp_manager.filename)
+
+        np.save(path / "events.npy", _events_table(ghiamp_manager, lsl_manager), allow_pickle=False)
+
+        if lsl_manager is not None:
+            for streamer, table in lsl_manager.trials_tables.items():
+                _save_arrays(path / "trials" / streamer, table.to_arrays())
+                meta["streamers"].append(streamer)
+
+            meta["lsl_fecha_registro"] = lsl_manager.fecha_registro.isoformat() if lsl_manager.fecha_registro else None
+            meta["sources"]["xdf"] = os.path.abspath(lsl_manager.filename)
+
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def _write_eeg(filename, samples, positions, chunk_size=None):
+        """Copia las columnas pedidas de samples a un .npy float32 (canales, muestras), por bloques de tiempo."""
+        n_samples = samples.shape[0]
+        out = np.lib.format.open_memmap(filename, mode="w+", dtype=np.float32, shape=(len(positions), n_samples))
+
+        if isinstance(samples, SamplesView):
+            blocks = samples.iter_chunks(chunk_size=chunk_size, channels=positions)
+        else:
+            step = chunk_size or 65536
+            blocks = ((start, samples[start:start + step, positions]) for start in range(0, n_samples, step))
+
+        for start, block in blocks:
+            out[:, start:start + len(block)] = block.T
+        out.flush()
+        del out
+
+    @cached_property
+    def coordinates(self):
+        """
+        Trazos del streamer de la tablet como CoordinatesStore (tiempos relativos al inicio de cada trazo,
+        igual que LSLDataManager.coordinates_info), o None si el bundle no tiene ese streamer.
+        Se arma a demanda a partir de los arrays planos de la tabla.
+        """
+        table = self.trials_tables.get(self.tab_name)
+        if table is None:
+            return None
+        coordinates = table.coordinates if table.coordinates is not None else [None] * len(table)
+        return CoordinatesStore.from_trials(table["trialID"], table["letter"], coordinates)
+
+    @property
+    def samples(self):
+        """Muestras con forma (muestras, canales), como GHiampDataManager.raw_data (vista, sin copia)."""
+        return self.eeg.T if self.eeg is not None else None
+
+    @property
+    def sample_rate(self):
+        return self.meta.get("sample_rate")
+
+    @property
+    def channel_names(self):
+        return self.meta.get("channel_names", [])
+
+    def channel_picks(self, channels):
+        """
+        Posiciones de canales por nombre o tipo: bundle.channel_picks("EEG"), bundle.channel_picks(["Ch1", "Ch3"]).
+        """
+        if isinstance(channels, str):
+            channels = [channels]
+        names, types = self.meta.get("channel_names", []), self.meta.get("channel_types", [])
+        return np.array([i for i, (name, kind) in enumerate(zip(names, types)) if name in channels or kind in channels],
+                        dtype=np.int64)
+
+    def get_eeg(self, channels=None, start=None, stop=None, dtype=np.float32):
+        """
+        Lee una ventana (start:stop, en muestras) de los canales pedidos (índices, nombres o tipos).
+        Retorna un array (canales, muestras); sólo se leen del disco esos canales y muestras.
+        """
+        if self.eeg is None:
+            raise ValueError("El bundle no tiene muestras de EEG.")
+        if channels is None:
+            channels = slice(None)
+        elif isinstance(channels, str) or (isinstance(channels, (list, tuple)) and all(isinstance(c, str) for c in channels)):
+            channels = self.channel_picks(channels)
+        return np.asarray(self.eeg[channels, start:stop], dtype=dtype)
+
+    def event_times(self, source, name):
+        """Tiempos (s, reloj del g.HIAMP) de un evento: bundle.event_times("ghiamp", "trialTablet")."""
+        mask = (self.events["source"] == source) & (self.events["name"] == name)
+        rows = self.events[mask]
+        if source != "ghiamp":
+            rows = rows[np.argsort(rows["trial"], kind="stable")]
+        return np.asarray(rows["seconds"])
+
+    def get_epochs(self, onsets, tmin=0.0, tmax=None, offsets=None, channels=None, dtype=None, labels=None):
+        """
+        Ventanas por trial sobre las muestras del bundle (ver GHiampDataManager.get_epochs()).
+        onsets y offsets en segundos; channels acepta índices, nombres o tipos de canal.
+        """
+        if self.eeg is None:
+            raise ValueError("El bundle no tiene muestras de EEG.")
+        if isinstance(channels, str) or (isinstance(channels, (list, tuple)) and channels
+                                         and all(isinstance(c, str) for c in channels)):
+            channels = self.channel_picks(channels)
+
+        rate = self.sample_rate
+        return TrialEpochs.from_bounds(self.samples, rate, np.asarray(onsets, dtype=np.float64) * rate, tmin=tmin,
+                                       tmax=tmax, stops=None if offsets is None else np.asarray(offsets) * rate,
+                                       channels=channels, dtype=dtype, labels=labels)
+
+    def __repr__(self):
+        eeg = f"{self.eeg.shape[0]} canales x {self.eeg.shape[1]} muestras" if self.eeg is not None else "sin EEG"
+        return f"RunBundle(path={str(self.path)!r}, {eeg}, streamers={self.meta['streamers']})"
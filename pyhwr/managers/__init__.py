@@ -2,6 +2,9 @@ from .SessionManager import SessionManager
 from .TabletMessenger import TabletMessenger
 from .MarkerManager import MarkerManager
 from .DataManagers import LSLDataManager, GHiampDataManager
+from .DatasetLoader import DatasetLoader, RunKey
+from .DatasetIndex import DatasetIndex
+from .RunBundle import RunBundle
 from .PreExperimentManager import PreExperimentManager
 
-__all__ = ["SessionManager", "TabletMessenger", "MarkerManager", "LSLDataManager", "GHiampDataManager", "PreExperimentManager"]
\ No newline at end of file
+__all__ = ["SessionManager", "TabletMessenger", "MarkerManager", "LSLDataManager", "GHiampDataManager", "DatasetLoader", "RunKey", "DatasetIndex", "RunBundle", "PreExperimentManager"]
\ No newline at end of file
@@ -0,0 +1,469 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Iterator, Sequence, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+from numpy.typing import ArrayLike, DTypeLike, NDArray
+from scipy import signal
+
+from pyhwr.report.ReportChannelsQuality import (
+    ReportChannelsQuality,
+    _amplitude_flags,
+    _flat_flags,
+    _window_geometry,
+    _window_statistics,
+    robust_zscore,
+)
+from pyhwr.report.ReportTrialsQuality import eeg_channels
+
+if TYPE_CHECKING:
+    from pyhwr.managers import GHiampDataManager
+
+
+class ChannelsQualityMonitor:
+    """
+    Versión en línea de ReportChannelsQuality: recibe la señal EEG por
+    bloques durante la adquisición (de un inlet LSL o reproduciendo un HDF5
+    del g.HIAMP) y, cada vez que se completa una ventana, calcula sus
+    métricas (rP2P, MAD, fracción plana, potencia) y criterios, y emite el
+    estado de cada canal. Así un electrodo plano o saturado se ve durante la
+    ronda y no horas después, al generar el reporte.
+
+    - Las muestras se guardan en un buffer circular de una ventana
+      (n_channels x window_samples): la memoria no depende del largo de la
+      ronda.
+    - Cada ventana usa el mismo núcleo que ReportChannelsQuality
+      (_window_statistics), así que sus estadísticos son los mismos que
+      offline sobre las mismas muestras.
+    - Los z-scores espaciales (amplitud, baja variabilidad, no
+      estacionariedad entre canales) sólo usan la ventana actual: O(canales)
+      por ventana, y dan el mismo resultado que offline.
+    - Los z-scores temporales de no estacionariedad usan las últimas
+      history_windows transiciones de cada canal (offline se usa la ronda
+      completa, incluidas las ventanas futuras).
+    - El estado de cada canal (Bueno/Revisar/Problemático/Malo, con los
+      cortes de ReportChannelsQuality) sale del % de ventanas malas entre
+      las últimas history_windows, actualizado incrementalmente.
+
+    La latencia está acotada: el estado se emite en el mismo push() que
+    completa la ventana, es decir, a lo sumo un bloque de adquisición después
+    de la última muestra de la ventana, una vez por desplazamiento entre
+    ventanas (1 s con los valores por defecto).
+
+    A diferencia del reporte offline (FIR de fase cero, no causal), la señal
+    se filtra con un IIR causal (Butterworth pasa banda + notch) cuyo estado
+    se conserva entre bloques; los valores no coinciden exactamente con los
+    del reporte, pero sí los criterios en la práctica. Con l_freq, h_freq y
+    notch_freq en None la señal se usa tal como llega (ya filtrada).
+
+    Uso típico, mostrando el estado en LauncherApp desde el hilo que lee el
+    inlet LSL:
+
+        monitor = ChannelsQualityMonitor(1200.0, ch_names, picks=eeg_positions,
+                                         callback=launcher.channels_quality_signal.emit)
+        while adquiriendo:
+            monitor.consume_inlet(inlet, timeout=0.1)
+    """
+
+    def __init__(
+        self,
+        sfreq: float,
+        ch_names: Sequence[str],
+        picks: Sequence[int] | None = None,
+        methods: Sequence[str] | None = None,
+        window_s: float = 2.0,
+        overlap: float = 0.5,
+        amplitude_z_threshold: float = 5.0,
+        relative_mad_threshold: float = 0.10,
+        flat_fraction_threshold: float = 0.95,
+        flat_epsilon: float | None = None,
+        nonstationarity_z_threshold: float = 5.0,
+        nonstationarity_minimum_ratio: float = 2.0,
+        l_freq: float | None = 4.0,
+        h_freq: float | None = 30.0,
+        notch_freq: float | None = 50.0,
+        filter_order: int = 4,
+        history_windows: int = 60,
+        dtype: DTypeLike = np.float64,
+        callback: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        """
+        Parámetros
+        ----------
+        sfreq : float
+            Frecuencia de muestreo en Hz.
+        ch_names : Sequence[str]
+            Nombre de cada canal EEG monitoreado.
+        picks : Sequence[int] | None
+            Columnas de los bloques recibidos que corresponden a ch_names
+            (p. ej. las posiciones EEG de GHiampDataManager.raw_data). None:
+            los bloques traen exactamente los canales de ch_names.
+        methods, window_s, overlap, amplitude_z_threshold,
+        relative_mad_threshold, flat_fraction_threshold, flat_epsilon,
+        nonstationarity_z_threshold, nonstationarity_minimum_ratio
+            Igual que en ReportChannelsQuality.
+        l_freq, h_freq : float | None
+            Banda del Butterworth causal (None en ambos: sin pasa banda;
+            en uno: pasa altos/pasa bajos).
+        notch_freq : float | None
+            Frecuencia del notch IIR (None: sin notch).
+        filter_order : int
+            Orden del Butterworth.
+        history_windows : int
+            Ventanas recientes usadas para el % de ventanas malas (estado) y
+            para los z-scores temporales de no estacionariedad.
+        dtype : dtype
+            Tipo del buffer circular y del cómputo de las métricas (np.float32
+            o np.float64). El filtrado siempre se hace en float64.
+        callback : callable | None
+            Se llama como callback(update) con cada ventana completada (ver
+            push()), p. ej. LauncherApp.channels_quality_signal.emit.
+        """
+        if methods is None:
+            methods = ReportChannelsQuality.available_methods()
+
+        methods = tuple(methods)
+        invalid = sorted(set(methods) - set(ReportChannelsQuality.available_methods()))
+        if invalid:
+            raise ValueError(
+                f"Método(s) desconocido(s): {invalid}. "
+                f"Disponibles: {list(ReportChannelsQuality.available_methods())}."
+            )
+        if not methods:
+            raise ValueError("methods no puede estar vacío: elegí al menos un criterio.")
+        if picks is not None and len(picks) != len(ch_names):
+            raise ValueError(f"picks tiene {len(picks)} posiciones, pero hay {len(ch_names)} canales.")
+        if history_windows < 2:
+            raise ValueError("history_windows debe ser al menos 2.")
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError("dtype debe ser np.float32 o np.float64.")
+
+        self.sfreq = float(sfreq)
+        self.ch_names = list(ch_names)
+        self.picks = None if picks is None else np.asarray(picks, dtype=np.int64)
+        self.methods = methods
+        self.window_s = window_s
+        self.overlap = overlap
+        self.amplitude_z_threshold = amplitude_z_threshold
+        self.relative_mad_threshold = relative_mad_threshold
+        self.flat_fraction_threshold = flat_fraction_threshold
+        self.flat_epsilon = flat_epsilon
+        self.nonstationarity_z_threshold = nonstationarity_z_threshold
+        self.nonstationarity_minimum_ratio = nonstationarity_minimum_ratio
+        self.history_windows = history_windows
+        self.dtype = np.dtype(dtype)
+        self.callback = callback
+
+        self.window_samples, self.step_samples = _window_geometry(self.sfreq, window_s, overlap)
+        self._sos = self._design_filter(l_freq, h_freq, notch_freq, filter_order)
+        self.reset()
+
+    @classmethod
+    def from_ghiamp(cls, gmanager: "GHiampDataManager", **kwargs: Any) -> "ChannelsQualityMonitor":
+        """
+        Crea el monitor para los canales EEG de un registro del g.HIAMP
+        (mismos canales y nombres que ReportTrialsQuality), con picks
+        apuntando a sus columnas en gmanager.raw_data. Para reproducir el
+        registro: monitor.replay(gmanager.raw_data).
+        """
+        positions, ch_names = eeg_channels(gmanager.channels_info)
+        return cls(gmanager.sample_rate, ch_names, picks=positions, **kwargs)
+
+    def _design_filter(
+        self,
+        l_freq: float | None,
+        h_freq: float | None,
+        notch_freq: float | None,
+        order: int,
+    ) -> NDArray[np.float64] | None:
+        """Secciones de segundo orden del pasa banda + notch (None: sin filtro)."""
+        sections = []
+        if l_freq is not None and h_freq is not None:
+            sections.append(signal.butter(order, [l_freq, h_freq], btype="bandpass", fs=self.sfreq, output="sos"))
+        elif l_freq is not None:
+            sections.append(signal.butter(order, l_freq, btype="highpass", fs=self.sfreq, output="sos"))
+        elif h_freq is not None:
+            sections.append(signal.butter(order, h_freq, btype="lowpass", fs=self.sfreq, output="sos"))
+
+        if notch_freq is not None:
+            b, a = signal.iirnotch(notch_freq, Q=30.0, fs=self.sfreq)
+            sections.append(signal.tf2sos(b, a))
+
+        return np.vstack(sections) if sections else None
+
+    def reset(self) -> None:
+        """Descarta la señal y la historia acumuladas (p. ej. al empezar otra ronda)."""
+        n_channels = len(self.ch_names)
+        H = self.history_windows
+
+        self._buffer = np.zeros((n_channels, self.window_samples), dtype=self.dtype) ##Buffer circular de una ventana
+        self._n_samples = 0 ##Muestras recibidas desde reset()
+        self._next_window_end = self.window_samples
+        self._n_windows = 0
+        self._zi: NDArray[np.float64] | None = None ##Estado del filtro IIR
+
+        self._previous_log: NDArray[np.float64] | None = None ##log MAD / log potencia de la ventana anterior
+        self._delta_history = np.full((2, n_channels, H), np.nan) ##|Δ log| recientes (MAD, potencia)
+        self._n_deltas = 0
+
+        self._bad_history = np.zeros((n_channels, H), dtype=bool)
+        self._bad_counts = np.zeros(n_channels, dtype=np.int64)
+        self._criteria_history = {m: np.zeros((n_channels, H), dtype=bool) for m in self.methods}
+        self._criteria_counts = {m: np.zeros(n_channels, dtype=np.int64) for m in self.methods}
+        self._last: dict[str, Any] | None = None
+
+    # ── Entrada de señal ──────────────────────────────────────────────
+
+    def _filter(self, chunk: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Filtra un bloque (muestras, canales) continuando el estado del bloque anterior."""
+        if self._sos is None:
+            return chunk
+
+        if self._zi is None:
+            # Estado estacionario para la primera muestra: evita el
+            # transitorio de arranque por el nivel de continua.
+            self._zi = signal.sosfilt_zi(self._sos)[:, :, np.newaxis] * chunk[0]
+
+        filtered, self._zi = signal.sosfilt(self._sos, chunk, axis=0, zi=self._zi)
+
+        # Un NaN deja el estado del IIR en NaN para siempre: se reinicia.
+        if not np.isfinite(self._zi).all():
+            self._zi = None
+        return filtered
+
+    def _write(self, block: NDArray[np.float64]) -> None:
+        """Copia un bloque (muestras, canales), de a lo sumo una ventana, al buffer circular."""
+        first = self._n_samples % self.window_samples
+        head = min(len(block), self.window_samples - first)
+        self._buffer[:, first:first + head] = block[:head].T
+        self._buffer[:, :len(block) - head] = block[head:].T
+        self._n_samples += len(block)
+
+    def push(self, chunk: ArrayLike) -> list[dict[str, Any]]:
+        """
+        Agrega un bloque de muestras (muestras, canales), con el formato de
+        StreamInlet.pull_chunk y de GHiampDataManager.raw_data, y procesa
+        las ventanas que se completen.
+
+        Retorna
+        -------
+        Lista (posiblemente vacía) con un dict por ventana completada:
+        "window" (índice), "time" (fin de la ventana en s desde la primera
+        muestra), "ch_names", "rp2p"/"mad"/"flat_fraction"/"power" (n_channels,),
+        "criteria" {método: máscara (n_channels,)}, "bad" (n_channels,),
+        "bad_fraction" (entre las últimas history_windows ventanas) y
+        "status" (Bueno/Revisar/Problemático/Malo por canal).
+        """
+        chunk = np.asarray(chunk)
+        if chunk.ndim != 2:
+            raise ValueError("El bloque debe tener forma (muestras, canales).")
+        if self.picks is not None:
+            chunk = chunk[:, self.picks]
+        if chunk.shape[1] != len(self.ch_names):
+            raise ValueError(f"El bloque tiene {chunk.shape[1]} canales, se esperaban {len(self.ch_names)}.")
+        if len(chunk) == 0:
+            return []
+
+        x = self._filter(chunk.astype(np.float64, copy=False))
+
+        updates = []
+        position = 0
+        while position < len(x):
+            take = min(len(x) - position, self._next_window_end - self._n_samples)
+            self._write(x[position:position + take])
+            position += take
+
+            if self._n_samples == self._next_window_end:
+                updates.append(self._close_window())
+                self._next_window_end += self.step_samples
+
+        return updates
+
+    def consume_inlet(self, inlet: Any, timeout: float = 0.0, max_samples: int = 1024) -> list[dict[str, Any]]:
+        """
+        Lee un bloque de un pylsl.StreamInlet (pull_chunk) y lo procesa con
+        push(). Pensado para llamarse en un ciclo desde el hilo de adquisición.
+        """
+        samples, timestamps = inlet.pull_chunk(timeout=timeout, max_samples=max_samples)
+        if not timestamps:
+            return []
+        return self.push(np.asarray(samples))
+
+    def replay(
+        self,
+        samples: ArrayLike,
+        chunk_samples: int | None = None,
+        realtime: bool = False,
+    ) -> Iterator[dict[str, Any]]:
+        """
+        Reproduce un registro guardado (muestras, canales), p. ej.
+        GHiampDataManager.raw_data (se lee de a bloques, sin cargarlo
+        completo), y devuelve los updates de cada ventana a medida que se
+        completan.
+
+        Parámetros
+        ----------
+        samples : array-like, shape (n_samples, n_channels)
+            Registro a reproducir.
+        chunk_samples : int | None
+            Muestras por bloque (None: 100 ms, como un inlet LSL).
+        realtime : bool
+            Si es True, entrega los bloques al ritmo de sfreq (para probar la
+            visualización en vivo).
+        """
+        n_samples = samples.shape[0]
+        chunk_samples = chunk_samples or max(1, int(round(0.1 * self.sfreq)))
+        t0 = time.perf_counter()
+
+        for start in range(0, n_samples, chunk_samples):
+            stop = min(start + chunk_samples, n_samples)
+            if realtime:
+                time.sleep(max(0.0, t0 + stop / self.sfreq - time.perf_counter()))
+            yield from self.push(samples[start:stop])
+
+    # ── Métricas y estado ─────────────────────────────────────────────
+
+    def _nonstationarity(self, mad: NDArray[np.float64], power: NDArray[np.float64]) -> NDArray[np.bool_]:
+        """
+        Criterio de no estacionariedad de la ventana actual respecto de la
+        anterior (ver _nonstationarity_flags): z-score espacial sobre los
+        cambios de la ventana actual y temporal sobre las últimas
+        history_windows transiciones de cada canal.
+        """
+        epsilon = np.finfo(float).eps
+        log_values = np.log(np.maximum(np.stack([mad, power]), epsilon)) ##(2, n_channels)
+
+        previous, self._previous_log = self._previous_log, log_values
+        if previous is None:
+            return np.zeros(len(mad), dtype=bool)
+
+        delta = np.abs(log_values - previous)
+        slot = self._n_deltas % self.history_windows
+        self._delta_history[:, :, slot] = delta
+        self._n_deltas += 1
+
+        z_temporal = robust_zscore(self._delta_history, axis=2)[:, :, slot]
+        z_spatial = robust_zscore(delta, axis=1)
+
+        flags = (
+            (np.exp(delta) >= self.nonstationarity_minimum_ratio)
+            & (
+                (z_temporal >= self.nonstationarity_z_threshold)
+                | (z_spatial >= self.nonstationarity_z_threshold)
+            )
+        )
+        return flags[0] | flags[1]
+
+    def _close_window(self) -> dict[str, Any]:
+        """Calcula métricas y criterios de la ventana que termina en la última muestra recibida."""
+        # Copia en orden temporal (el núcleo ordena la ventana en el lugar).
+        oldest = self._n_samples % self.window_samples
+        window = np.concatenate([self._buffer[:, oldest:], self._buffer[:, :oldest]], axis=1)
+
+        stats = _window_statistics(
+            window, np.zeros(1, dtype=np.int64), self.window_samples, flat_epsilon=self.flat_epsilon
+        )
+
+        amplitude = _amplitude_flags(stats["rp2p"], stats["mad"], self.amplitude_z_threshold)
+        flat = _flat_flags(
+            stats["mad"],
+            stats["flat_fraction"],
+            flat_fraction_threshold=self.flat_fraction_threshold,
+            relative_mad_threshold=self.relative_mad_threshold,
+            robust_z_threshold=-self.amplitude_z_threshold,
+        )
+
+        criteria = {
+            "amplitude": (amplitude["high_amplitude"] | amplitude["low_amplitude"])[:, 0],
+            "flat": flat["flat"][:, 0],
+            "low_variability": flat["low_variability"][:, 0],
+            "nonstationary": self._nonstationarity(stats["mad"][:, 0], stats["power"][:, 0]),
+        }
+        criteria = {m: criteria[m] for m in self.methods}
+        bad = np.any(np.stack(list(criteria.values())), axis=0)
+
+        # Conteos de las últimas history_windows ventanas: se resta la que sale.
+        slot = self._n_windows % self.history_windows
+        self._bad_counts += bad.astype(np.int64) - self._bad_history[:, slot]
+        self._bad_history[:, slot] = bad
+        for m, mask in criteria.items():
+            self._criteria_counts[m] += mask.astype(np.int64) - self._criteria_history[m][:, slot]
+            self._criteria_history[m][:, slot] = mask
+        self._n_windows += 1
+
+        bad_fraction = self._bad_counts / min(self._n_windows, self.history_windows)
+
+        update = {
+            "window": self._n_windows - 1,
+            "time": self._n_samples / self.sfreq,
+            "ch_names": self.ch_names,
+            "rp2p": stats["rp2p"][:, 0],
+            "mad": stats["mad"][:, 0],
+            "flat_fraction": stats["flat_fraction"][:, 0],
+            "power": stats["power"][:, 0],
+            "criteria": criteria,
+            "bad": bad,
+            "bad_fraction": bad_fraction,
+            "status": [ReportChannelsQuality._status_from_fraction(f) for f in bad_fraction],
+        }
+
+        self._last = update
+        if self.callback is not None:
+            self.callback(update)
+        return update
+
+    @property
+    def last_update(self) -> dict[str, Any] | None:
+        """Último update emitido (None si todavía no se completó ninguna ventana)."""
+        return self._last
+
+    def channels_df(self) -> pd.DataFrame:
+        """
+        Estado actual por canal, con las mismas columnas que
+        ReportChannelsQuality.channels_df() pero sobre las últimas
+        history_windows ventanas. Ordenada de peor a mejor.
+        """
+        n_windows = min(self._n_windows, self.history_windows)
+
+        rows = []
+        for idx, ch_name in enumerate(self.ch_names):
+            fraction = self._bad_counts[idx] / n_windows if n_windows else 0.0
+            method_fractions = {
+                ReportChannelsQuality._METHOD_LABELS[m]: self._criteria_counts[m][idx] for m in self.methods
+            }
+            main_issue = max(method_fractions, key=method_fractions.get) if fraction > 0 else "-"
+
+            rows.append({
+                "Canal": ch_name,
+                "% ventanas malas": round(float(fraction) * 100, 1),
+                "Estado": ReportChannelsQuality._status_from_fraction(fraction),
+                "Criterio principal": main_issue,
+            })
+
+        df = pd.DataFrame(rows)
+        return df.sort_values("% ventanas malas", ascending=False).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import os
+
+    from pyhwr.managers import GHiampDataManager
+
+    subject_id = 6
+    session_id = 1
+    round_id = 6
+    round_type = "Ejecutada"
+
+    path = f"D:\\dataset\\DataBase\\sub-{subject_id:02d}\\ses-{session_id:02d}"
+    file_stem = f"sub-{subject_id:02d}_ses-{session_id:02d}_task-{round_type.lower()}_run-{round_id:02d}_eeg"
+
+    gmanager = GHiampDataManager(os.path.join(path, f"{file_stem}.hdf5"), normalize_time=True)
+    monitor = ChannelsQualityMonitor.from_ghiamp(gmanager)
+
+    for update in monitor.replay(gmanager.raw_data):
+        malos = [name for name, estado in zip(update["ch_names"], update["status"]) if estado != "Bueno"]
+        print(f"{update['time']:7.1f} s  {', '.join(malos) or 'todos los canales bien'}")
+
+    print(monitor.channels_df())
@@ -1,10 +1,14 @@
 from __future__ import annotations
 
-from typing import Any, Sequence, TYPE_CHECKING
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Any, Callable, Iterator, Sequence, TYPE_CHECKING
 
 import numpy as np
 import pandas as pd
-from numpy.typing import ArrayLike, NDArray
+from numpy.typing import ArrayLike, DTypeLike, NDArray
 
 if TYPE_CHECKING:
     import mne
@@ -16,23 +20,44 @@ if TYPE_CHECKING:
 # EEG.pdf" (págs. 17-27): métricas robustas por ventana temporal, pensadas
 # para señal EEG ya filtrada (banda + notch), sfreq=1200 Hz, ventanas de 2 s
 # con 50% de solapamiento.
+#
+# Todas las funciones aceptan `dtype`: con np.float32 la señal (float32
+# nativo del g.HIAMP) se procesa sin promoverla a float64, lo que reduce a la
+# mitad la memoria pico. Las estadísticas por ventana (arrays chicos de
+# n_channels x n_windows) y las acumulaciones largas (potencia media) se
+# calculan siempre en float64.
 
 
-def _validate_eeg_data(data: ArrayLike) -> NDArray[np.float64]:
+def _validate_eeg_data(
+    data: ArrayLike,
+    dtype: DTypeLike | None = np.float64,
+) -> NDArray[np.floating]:
     """
-    Valida y convierte los datos EEG a un array float64.
+    Valida y convierte los datos EEG al tipo de cómputo.
 
     Parameters
     ----------
     data : array-like, shape (n_channels, n_samples)
         Señal EEG.
+    dtype : dtype or None
+        Tipo de punto flotante del cómputo (np.float64 o np.float32). Si es
+        None se conserva el tipo de la entrada cuando ya es float32/float64
+        (cualquier otro se convierte a float64). No se copia si la entrada
+        ya tiene ese tipo.
 
     Returns
     -------
     x : ndarray, shape (n_channels, n_samples)
-        Datos convertidos a float64.
+        Datos convertidos al tipo de cómputo.
     """
-    x = np.asarray(data, dtype=np.float64)
+    if dtype is None:
+        dtype = getattr(data, "dtype", None)
+        if dtype not in (np.float32, np.float64):
+            dtype = np.float64
+    elif np.dtype(dtype) not in (np.float32, np.float64):
+        raise ValueError("dtype debe ser np.float32, np.float64 o None.")
+
+    x = np.asarray(data, dtype=dtype)
     if x.ndim != 2:
         raise ValueError(
             "Los datos deben tener forma (n_channels, n_samples)."
@@ -43,14 +68,14 @@ def _validate_eeg_data(data: ArrayLike) -> NDArray[np.float64]:
     return x
 
 
-def _window_parameters(
-    n_samples: int,
+def _window_geometry(
     sfreq: float,
     window_s: float,
     overlap: float,
-) -> tuple[NDArray[np.int64], int, NDArray[np.float64]]:
+) -> tuple[int, int]:
     """
-    Calcula los índices de inicio y los centros temporales de las ventanas.
+    Valida los parámetros de ventana y devuelve (muestras por ventana,
+    muestras de desplazamiento entre ventanas).
     """
     if sfreq <= 0:
         raise ValueError("sfreq debe ser mayor que cero.")
@@ -70,6 +95,20 @@ def _window_parameters(
     if step_samples < 1:
         raise ValueError("El desplazamiento entre ventanas es demasiado pequeño.")
 
+    return window_samples, step_samples
+
+
+def _window_parameters(
+    n_samples: int,
+    sfreq: float,
+    window_s: float,
+    overlap: float,
+) -> tuple[NDArray[np.int64], int, NDArray[np.float64]]:
+    """
+    Calcula los índices de inicio y los centros temporales de las ventanas.
+    """
+    window_samples, step_samples = _window_geometry(sfreq, window_s, overlap)
+
     if n_samples < window_samples:
         raise ValueError(
             f"La señal tiene {n_samples} muestras, pero la ventana requiere "
@@ -114,6 +153,570 @@ def robust_zscore(
     )
 
 
+# Estadísticos por ventana ──────────────────────────────────────────────
+#
+# Cada métrica se separa en dos etapas:
+# - estadísticos por ventana (pico a pico, MAD, fracción plana, potencia):
+#   sólo dependen de las muestras de cada ventana, así que pueden calcularse
+#   por bloques (ver compute_basic_channel_quality_chunked);
+# - flags: z-scores robustos y umbrales sobre los estadísticos, que son
+#   arrays chicos (n_channels, n_windows) y se calculan al final.
+
+
+#: Grupos de estadísticos que calcula _window_statistics y las claves que
+#: produce cada uno.
+_STATISTICS: dict[str, tuple[str, ...]] = {
+    "p2p": ("rp2p", "p2p"),
+    "mad": ("mad", "median"),
+    "flat_fraction": ("flat_fraction",),
+    "power": ("power",),
+}
+
+
+#: Memoria aproximada (bytes) de cada lote de ventanas que procesa
+#: _window_statistics de una vez.
+_BATCH_BYTES = 32 * 2**20
+
+
+def _sorted_percentile(ordered: NDArray[np.floating], q: float) -> NDArray[np.floating]:
+    """
+    Percentil q de cada fila de un array ya ordenado por filas. Reproduce
+    np.percentile(..., method="linear") (mismo índice virtual, mismo peso de
+    interpolación y misma fórmula), así que el resultado es idéntico.
+    """
+    n = ordered.shape[1]
+    virtual_index = (n - 1) * np.true_divide(q, 100)
+    previous = int(np.floor(virtual_index))
+    following = min(previous + 1, n - 1)
+    gamma = float(virtual_index - previous)
+
+    lower, upper = ordered[:, previous], ordered[:, following]
+    difference = upper - lower
+    if gamma >= 0.5:
+        return upper - difference * (1 - gamma)
+    return lower + difference * gamma
+
+
+def _sorted_median(ordered: NDArray[np.floating]) -> NDArray[np.floating]:
+    """Mediana de cada fila de un array ya ordenado por filas (igual a np.median)."""
+    middle = ordered.shape[1] // 2
+    if ordered.shape[1] % 2:
+        return ordered[:, middle]
+    return (ordered[:, middle - 1] + ordered[:, middle]) / 2
+
+
+def _sorted_deviation_median(ordered: NDArray[np.floating], center: NDArray[np.floating]) -> NDArray[np.floating]:
+    """
+    Mediana de |x - center| de cada fila de un array ya ordenado por filas,
+    siendo center la mediana de la fila. Sin ordenar los desvíos: las
+    muestras de la mitad inferior dan desvíos center - x crecientes hacia la
+    izquierda y las de la mitad superior x - center crecientes hacia la
+    derecha, así que los desvíos ordenados son la unión de dos secuencias
+    ordenadas y el k-ésimo se encuentra con una búsqueda binaria por fila.
+    El resultado es idéntico a np.median(np.abs(x - center), axis=1).
+    """
+    n_rows, n = ordered.shape
+    middle = n // 2
+    rows = np.arange(n_rows)
+    center = center.astype(ordered.dtype, copy=False)
+
+    def lower_deviation(i: NDArray[np.intp]) -> NDArray[np.floating]:
+        # i-ésimo desvío (creciente) de la mitad inferior, x[middle - 1 - i] <= center
+        return center - ordered[rows, middle - 1 - i]
+
+    def upper_deviation(j: NDArray[np.intp]) -> NDArray[np.floating]:
+        # j-ésimo desvío (creciente) de la mitad superior, x[middle + j] >= center
+        return ordered[rows, middle + j] - center
+
+    n_lower, n_upper = middle, n - middle
+
+    def kth_deviation(k: int) -> NDArray[np.floating]:
+        # Cuántos de los k + 1 desvíos más chicos vienen de la mitad inferior:
+        # el menor i tal que lower[i] > upper[k - i].
+        low = np.full(n_rows, max(0, k + 1 - n_upper))
+        high = np.full(n_rows, min(n_lower, k + 1))
+        while True:
+            active = low < high
+            if not active.any():
+                break
+            mid = (low + high) // 2
+            take_lower = (lower_deviation(np.minimum(mid, n_lower - 1))
+                          > upper_deviation(np.clip(k - mid, 0, n_upper - 1)))
+            high = np.where(active & take_lower, mid, high)
+            low = np.where(active & ~take_lower, mid + 1, low)
+
+        from_upper = k + 1 - low
+        last_lower = np.where(low > 0, lower_deviation(np.maximum(low - 1, 0)), -np.inf)
+        last_upper = np.where(from_upper > 0, upper_deviation(np.clip(from_upper - 1, 0, n_upper - 1)), -np.inf)
+        return np.maximum(last_lower, last_upper).astype(ordered.dtype, copy=False)
+
+    if n % 2:
+        return kth_deviation(middle)
+    return (kth_deviation(middle - 1) + kth_deviation(middle)) / 2
+
+
+def _finite_batch_statistics(
+    segments: NDArray[np.floating],
+    statistics: Sequence[str],
+    q_low: float,
+    q_high: float,
+    mad_scale: float,
+    flat_epsilon: float | None,
+) -> dict[str, NDArray]:
+    """
+    Estadísticos de un lote de ventanas sin valores no finitos, segments de
+    forma (n_ventanas, window_samples): un valor por fila. Cada fila se
+    ordena una vez (en el lugar: segments queda ordenado) y de ahí salen
+    los percentiles, el máximo/mínimo, la mediana y el MAD (sin ordenar los
+    desvíos, ver _sorted_deviation_median). Los resultados son idénticos a los de las funciones
+    nan* fila por fila.
+    """
+    result: dict[str, NDArray] = {}
+
+    # Primero lo que depende del orden temporal de las muestras.
+    if "flat_fraction" in statistics:
+        if flat_epsilon is None:
+            # Para valores finitos, a - b == 0 equivale a a == b.
+            nearly_flat = segments[:, 1:] == segments[:, :-1]
+        else:
+            nearly_flat = np.abs(np.diff(segments, axis=1)) <= flat_epsilon
+
+        result["flat_fraction"] = np.count_nonzero(nearly_flat, axis=1) / (segments.shape[1] - 1)
+
+    if "power" in statistics:
+        # Suma de ~window_samples cuadrados: se acumula en float64.
+        result["power"] = np.mean(segments**2, axis=1, dtype=np.float64)
+
+    if "p2p" not in statistics and "mad" not in statistics:
+        return result
+
+    ordered = segments
+    ordered.sort(axis=1)
+
+    if "p2p" in statistics:
+        result["rp2p"] = _sorted_percentile(ordered, q_high) - _sorted_percentile(ordered, q_low)
+        result["p2p"] = ordered[:, -1] - ordered[:, 0]
+
+    if "mad" in statistics:
+        center = _sorted_median(ordered)
+        result["median"] = center
+        result["mad"] = mad_scale * _sorted_deviation_median(ordered, center)
+
+    return result
+
+
+def _nan_batch_statistics(
+    segments: NDArray[np.floating],
+    statistics: Sequence[str],
+    q_low: float,
+    q_high: float,
+    mad_scale: float,
+    flat_epsilon: float | None,
+) -> dict[str, NDArray]:
+    """
+    Igual que _finite_batch_statistics, para ventanas con NaN/inf: usa las
+    funciones nan* de numpy (más lentas, recorren fila por fila).
+    """
+    result: dict[str, NDArray] = {}
+
+    if "p2p" in statistics:
+        result["rp2p"] = (
+            np.nanpercentile(segments, q_high, axis=1)
+            - np.nanpercentile(segments, q_low, axis=1)
+        )
+        result["p2p"] = np.nanmax(segments, axis=1) - np.nanmin(segments, axis=1)
+
+    if "mad" in statistics:
+        center = np.nanmedian(segments, axis=1)
+        absolute_deviation = np.abs(segments - center[:, np.newaxis])
+
+        result["median"] = center
+        result["mad"] = mad_scale * np.nanmedian(absolute_deviation, axis=1)
+
+    if "flat_fraction" in statistics:
+        differences = np.diff(segments, axis=1)
+        valid = np.isfinite(differences)
+
+        if flat_epsilon is None:
+            nearly_flat = differences == 0.0
+        else:
+            nearly_flat = np.abs(differences) <= flat_epsilon
+
+        numerator = np.sum(nearly_flat & valid, axis=1)
+        denominator = np.sum(valid, axis=1)
+
+        result["flat_fraction"] = np.divide(
+            numerator,
+            denominator,
+            out=np.full(len(segments), np.nan),
+            where=denominator > 0,
+        )
+
+    if "power" in statistics:
+        result["power"] = np.nanmean(segments**2, axis=1, dtype=np.float64)
+
+    return result
+
+
+def _window_statistics(
+    x: NDArray[np.floating],
+    starts: NDArray[np.int64],
+    window_samples: int,
+    statistics: Sequence[str] = tuple(_STATISTICS),
+    q_low: float = 1.0,
+    q_high: float = 99.0,
+    mad_scale: float = 1.4826,
+    flat_epsilon: float | None = None,
+) -> dict[str, NDArray[np.float64]]:
+    """
+    Núcleo único de las métricas: recorre las ventanas una sola vez y, para
+    cada una, calcula juntos los grupos de estadísticos pedidos:
+
+    - "p2p": pico a pico robusto (percentiles q_low/q_high) y convencional
+      → rp2p, p2p;
+    - "mad": mediana y MAD (multiplicado por mad_scale) → median, mad;
+    - "flat_fraction": fracción de diferencias consecutivas (casi) nulas;
+    - "power": potencia media cuadrática (acumulada en float64).
+
+    Las ventanas de todos los canales se procesan por lotes de ~_BATCH_BYTES
+    (copias de una vista sliding_window_view), con operaciones vectorizadas
+    sobre el lote completo. Las funciones nan* sólo se usan para las
+    ventanas que tienen valores no finitos; el resultado es idéntico al de
+    aplicarlas ventana por ventana.
+
+    Devuelve {clave: array (n_channels, len(starts))}, sólo con las claves
+    de los grupos pedidos.
+    """
+    unknown = sorted(set(statistics) - set(_STATISTICS))
+    if unknown:
+        raise ValueError(f"Estadístico(s) desconocido(s): {unknown}.")
+
+    n_channels = x.shape[0]
+    result = {
+        key: np.full((n_channels, len(starts)), np.nan)
+        for group in statistics
+        for key in _STATISTICS[group]
+    }
+    if len(starts) == 0:
+        return result
+
+    windows = np.lib.stride_tricks.sliding_window_view(x, window_samples, axis=1)
+    batch_windows = max(1, _BATCH_BYTES // (n_channels * window_samples * x.itemsize))
+
+    for first in range(0, len(starts), batch_windows):
+        batch = slice(first, min(first + batch_windows, len(starts)))
+
+        # (n_channels, ventanas del lote, window_samples) → una fila por
+        # ventana. Es una copia: los estadísticos la ordenan en el lugar.
+        segments = windows[:, starts[batch]].reshape(-1, window_samples)
+        nonfinite = ~np.isfinite(segments).all(axis=1)
+
+        if not nonfinite.any():
+            batch_stats = _finite_batch_statistics(
+                segments, statistics, q_low, q_high, mad_scale, flat_epsilon
+            )
+        else:
+            finite = ~nonfinite
+            batch_stats = {
+                key: np.full(len(segments), np.nan)
+                for group in statistics
+                for key in _STATISTICS[group]
+            }
+            for rows, compute in ((finite, _finite_batch_statistics), (nonfinite, _nan_batch_statistics)):
+                if rows.any():
+                    for key, values in compute(
+                        segments[rows], statistics, q_low, q_high, mad_scale, flat_epsilon
+                    ).items():
+                        batch_stats[key][rows] = values
+
+        for key, values in batch_stats.items():
+            result[key][:, batch] = values.reshape(n_channels, -1)
+
+    return result
+
+
+# Paralelismo por canales ───────────────────────────────────────────────
+#
+# Los estadísticos por ventana de un canal no dependen de los demás canales:
+# los canales se reparten en grupos contiguos entre los workers y sólo los
+# z-scores espaciales (axis=0, en _quality_from_statistics) se calculan al
+# final sobre todos los canales juntos. Cada fila se procesa igual que en un
+# solo proceso, así que el resultado es idéntico.
+
+def _channel_shards(n_channels: int, n_jobs: int) -> list[slice]:
+    """Reparte n_channels en (a lo sumo) n_jobs grupos contiguos de tamaño parecido."""
+    bounds = np.linspace(0, n_channels, min(n_jobs, n_channels) + 1).round().astype(int)
+    return [slice(int(first), int(last)) for first, last in zip(bounds[:-1], bounds[1:]) if last > first]
+
+
+def _resolve_n_jobs(n_jobs: int | None) -> int:
+    """n_jobs efectivo: None usa os.cpu_count()."""
+    n_jobs = n_jobs or os.cpu_count() or 1
+    if n_jobs < 1:
+        raise ValueError("n_jobs debe ser al menos 1.")
+    return n_jobs
+
+
+@contextmanager
+def _channel_pool(n_jobs: int, executor: str) -> Iterator[Executor | None]:
+    """
+    Pool de n_jobs workers para _sharded_window_statistics ("process" o
+    "thread"). Con n_jobs=1 devuelve None: todo en este proceso.
+    """
+    if executor not in ("process", "thread"):
+        raise ValueError("executor debe ser 'process' o 'thread'.")
+    if n_jobs == 1:
+        yield None
+        return
+
+    pool_class = ProcessPoolExecutor if executor == "process" else ThreadPoolExecutor
+    with pool_class(max_workers=n_jobs) as pool:
+        yield pool
+
+
+def _shared_window_statistics(
+    name: str,
+    shape: tuple[int, int],
+    dtype: str,
+    channels: slice,
+    starts: NDArray[np.int64],
+    window_samples: int,
+    flat_epsilon: float | None,
+) -> dict[str, NDArray[np.float64]]:
+    """
+    Función de módulo (para ejecutarse en otro proceso): estadísticos de los
+    canales `channels` de la señal guardada en la memoria compartida `name`.
+    """
+    memory = shared_memory.SharedMemory(name=name)
+    try:
+        x = np.ndarray(shape, dtype=dtype, buffer=memory.buf)
+        result = _window_statistics(x[channels], starts, window_samples, flat_epsilon=flat_epsilon)
+        del x ##no deben quedar vistas sobre el buffer antes de close()
+        return result
+    finally:
+        memory.close()
+
+
+def _sharded_window_statistics(
+    x: NDArray[np.floating],
+    starts: NDArray[np.int64],
+    window_samples: int,
+    flat_epsilon: float | None,
+    pool: Executor | None,
+    n_jobs: int,
+) -> dict[str, NDArray[np.float64]]:
+    """
+    _window_statistics repartiendo los canales de x en n_jobs grupos entre
+    los workers de pool (ver _channel_pool). Con un ThreadPoolExecutor los hilos leen x
+    directamente; con un ProcessPoolExecutor x se copia una vez a memoria
+    compartida (multiprocessing.shared_memory) y cada proceso lee de ahí
+    sólo sus canales. Los workers devuelven arrays chicos (canales x
+    ventanas), que se unen por canal.
+    """
+    if pool is None:
+        return _window_statistics(x, starts, window_samples, flat_epsilon=flat_epsilon)
+
+    shards = _channel_shards(x.shape[0], n_jobs)
+    if len(shards) == 1:
+        return _window_statistics(x, starts, window_samples, flat_epsilon=flat_epsilon)
+
+    if isinstance(pool, ThreadPoolExecutor):
+        parts = list(pool.map(
+            lambda channels: _window_statistics(x[channels], starts, window_samples, flat_epsilon=flat_epsilon),
+            shards,
+        ))
+    else:
+        memory = shared_memory.SharedMemory(create=True, size=max(1, x.nbytes))
+        try:
+            np.ndarray(x.shape, dtype=x.dtype, buffer=memory.buf)[...] = x
+            parts = list(pool.map(
+                _shared_window_statistics,
+                *zip(*[(memory.name, x.shape, x.dtype.str, channels, starts, window_samples, flat_epsilon)
+                       for channels in shards]),
+            ))
+        finally:
+            memory.close()
+            memory.unlink()
+
+    return {key: np.concatenate([part[key] for part in parts], axis=0) for key in parts[0]}
+
+
+# Flags a partir de los estadísticos ─────────────────────────────────────
+
+def _amplitude_flags(
+    rp2p: NDArray[np.float64],
+    mad: NDArray[np.float64],
+    amplitude_z_threshold: float = 5.0,
+) -> dict[str, NDArray]:
+    """
+    Criterio de amplitud atípica: z-scores robustos espaciales (entre
+    canales, por ventana) de log rP2P y log MAD.
+    """
+    epsilon = np.finfo(float).eps
+
+    z_log_rp2p = robust_zscore(
+        np.log(np.maximum(rp2p, epsilon)),
+        axis=0,
+    )
+
+    z_log_mad = robust_zscore(
+        np.log(np.maximum(mad, epsilon)),
+        axis=0,
+    )
+
+    high_amplitude = (
+        (z_log_rp2p > amplitude_z_threshold)
+        | (z_log_mad > amplitude_z_threshold)
+    )
+
+    low_amplitude = (
+        (z_log_rp2p < -amplitude_z_threshold)
+        | (z_log_mad < -amplitude_z_threshold)
+    )
+
+    return {
+        "z_log_rp2p": z_log_rp2p,
+        "z_log_mad": z_log_mad,
+        "high_amplitude": high_amplitude,
+        "low_amplitude": low_amplitude,
+    }
+
+
+def _flat_flags(
+    mad_values: NDArray[np.float64],
+    flat_fraction: NDArray[np.float64],
+    flat_fraction_threshold: float = 0.95,
+    relative_mad_threshold: float = 0.10,
+    robust_z_threshold: float = -5.0,
+) -> dict[str, NDArray]:
+    """
+    Criterios de canal plano / baja variabilidad (ver
+    detect_flat_or_low_variability).
+    """
+    epsilon = np.finfo(float).eps
+
+    spatial_median_mad = np.nanmedian(
+        mad_values,
+        axis=0,
+        keepdims=True,
+    )
+
+    relative_mad = np.divide(
+        mad_values,
+        spatial_median_mad,
+        out=np.full_like(mad_values, np.nan),
+        where=spatial_median_mad > epsilon,
+    )
+
+    log_mad = np.log(np.maximum(mad_values, epsilon))
+    z_log_mad = robust_zscore(log_mad, axis=0)
+
+    flat = flat_fraction >= flat_fraction_threshold
+
+    low_variability = (
+        (relative_mad < relative_mad_threshold)
+        | (z_log_mad < robust_z_threshold)
+    )
+
+    bad = flat | low_variability
+
+    return {
+        "mad": mad_values,
+        "flat_fraction": flat_fraction,
+        "relative_mad": relative_mad,
+        "z_log_mad": z_log_mad,
+        "flat": flat,
+        "low_variability": low_variability,
+        "bad": bad,
+    }
+
+
+def _nonstationarity_flags(
+    mad_values: NDArray[np.float64],
+    power_values: NDArray[np.float64],
+    robust_z_threshold: float = 5.0,
+    minimum_ratio: float = 2.0,
+) -> dict[str, NDArray]:
+    """
+    Criterios de no estacionariedad entre ventanas consecutivas (ver
+    windowed_nonstationarity). Los z-scores temporales usan la historia
+    completa de cada canal.
+    """
+    epsilon = np.finfo(float).eps
+
+    log_mad = np.log(np.maximum(mad_values, epsilon))
+    log_power = np.log(np.maximum(power_values, epsilon))
+
+    # Cambio absoluto logarítmico entre ventanas consecutivas.
+    delta_log_mad = np.abs(np.diff(log_mad, axis=1))
+    delta_log_power = np.abs(np.diff(log_power, axis=1))
+
+    # Equivale al mayor valor entre x_w/x_w-1 y x_w-1/x_w.
+    mad_ratio = np.exp(delta_log_mad)
+    power_ratio = np.exp(delta_log_power)
+
+    # Atipicidad respecto de la historia del propio canal.
+    z_mad_temporal = robust_zscore(delta_log_mad, axis=1)
+    z_power_temporal = robust_zscore(delta_log_power, axis=1)
+
+    # Atipicidad respecto de los demás canales en el mismo instante.
+    z_mad_spatial = robust_zscore(delta_log_mad, axis=0)
+    z_power_spatial = robust_zscore(delta_log_power, axis=0)
+
+    mad_change_flag = (
+        (mad_ratio >= minimum_ratio)
+        & (
+            (z_mad_temporal >= robust_z_threshold)
+            | (z_mad_spatial >= robust_z_threshold)
+        )
+    )
+
+    power_change_flag = (
+        (power_ratio >= minimum_ratio)
+        & (
+            (z_power_temporal >= robust_z_threshold)
+            | (z_power_spatial >= robust_z_threshold)
+        )
+    )
+
+    transition_bad = mad_change_flag | power_change_flag
+
+    # Se agrega una primera columna porque la primera ventana no tiene anterior.
+    def prepend_nan(array: NDArray[np.float64]) -> NDArray[np.float64]:
+        return np.concatenate(
+            [
+                np.full((array.shape[0], 1), np.nan),
+                array,
+            ],
+            axis=1,
+        )
+
+    def prepend_false(array: NDArray[np.bool_]) -> NDArray[np.bool_]:
+        return np.concatenate(
+            [
+                np.zeros((array.shape[0], 1), dtype=bool),
+                array,
+            ],
+            axis=1,
+        )
+
+    return {
+        "mad": mad_values,
+        "power": power_values,
+        "delta_log_mad": prepend_nan(delta_log_mad),
+        "delta_log_power": prepend_nan(delta_log_power),
+        "mad_ratio": prepend_nan(mad_ratio),
+        "power_ratio": prepend_nan(power_ratio),
+        "z_mad_temporal": prepend_nan(z_mad_temporal),
+        "z_mad_spatial": prepend_nan(z_mad_spatial),
+        "z_power_temporal": prepend_nan(z_power_temporal),
+        "z_power_spatial": prepend_nan(z_power_spatial),
+        "mad_change_flag": prepend_false(mad_change_flag),
+        "power_change_flag": prepend_false(power_change_flag),
+        "bad": prepend_false(transition_bad),
+    }
+
+
 # 1. Pico a pico robusto ────────────────────────────────────────────────
 
 def windowed_robust_peak_to_peak(
@@ -123,6 +726,7 @@ def windowed_robust_peak_to_peak(
     overlap: float = 0.5,
     q_low: float = 1.0,
     q_high: float = 99.0,
+    dtype: DTypeLike | None = np.float64,
 ) -> dict[str, NDArray[np.float64]]:
     """
     Calcula el pico a pico convencional y robusto por canal y ventana.
@@ -139,6 +743,9 @@ def windowed_robust_peak_to_peak(
         Fracción de solapamiento entre ventanas.
     q_low, q_high : float
         Percentiles utilizados para el pico a pico robusto.
+    dtype : dtype or None
+        Tipo de cómputo de la señal (ver _validate_eeg_data). Los resultados
+        se devuelven siempre en float64.
 
     Returns
     -------
@@ -147,7 +754,7 @@ def windowed_robust_peak_to_peak(
         result["p2p"] contiene el pico a pico convencional.
         result["times"] contiene el centro de cada ventana en segundos.
     """
-    x = _validate_eeg_data(data)
+    x = _validate_eeg_data(data, dtype)
 
     if not 0 <= q_low < q_high <= 100:
         raise ValueError("Los percentiles deben cumplir 0 <= q_low < q_high <= 100.")
@@ -159,27 +766,11 @@ def windowed_robust_peak_to_peak(
         overlap=overlap,
     )
 
-    n_channels = x.shape[0]
-    n_windows = len(starts)
-
-    rp2p = np.full((n_channels, n_windows), np.nan)
-    p2p = np.full((n_channels, n_windows), np.nan)
-
-    for w, start in enumerate(starts):
-        segment = x[:, start : start + window_samples]
-
-        q1 = np.nanpercentile(segment, q_low, axis=1)
-        q99 = np.nanpercentile(segment, q_high, axis=1)
-
-        rp2p[:, w] = q99 - q1
-        p2p[:, w] = (
-            np.nanmax(segment, axis=1)
-            - np.nanmin(segment, axis=1)
-        )
+    stats = _window_statistics(x, starts, window_samples, ("p2p",), q_low=q_low, q_high=q_high)
 
     return {
-        "rp2p": rp2p,
-        "p2p": p2p,
+        "rp2p": stats["rp2p"],
+        "p2p": stats["p2p"],
         "times": times,
         "starts": starts,
     }
@@ -193,6 +784,7 @@ def windowed_mad_amplitude(
     window_s: float = 2.0,
     overlap: float = 0.5,
     scale_to_sigma: bool = True,
+    dtype: DTypeLike | None = np.float64,
 ) -> dict[str, NDArray[np.float64]]:
     """
     Calcula la amplitud robusta mediante MAD por canal y ventana.
@@ -202,6 +794,8 @@ def windowed_mad_amplitude(
     scale_to_sigma : bool
         Si es True, multiplica MAD por 1.4826 para aproximar la
         desviación estándar bajo una distribución normal.
+    dtype : dtype or None
+        Tipo de cómputo de la señal (ver windowed_robust_peak_to_peak).
 
     Returns
     -------
@@ -210,7 +804,7 @@ def windowed_mad_amplitude(
         median : mediana temporal de cada ventana.
         times : centro temporal de las ventanas.
     """
-    x = _validate_eeg_data(data)
+    x = _validate_eeg_data(data, dtype)
 
     starts, window_samples, times = _window_parameters(
         n_samples=x.shape[1],
@@ -219,28 +813,12 @@ def windowed_mad_amplitude(
         overlap=overlap,
     )
 
-    n_channels = x.shape[0]
-    n_windows = len(starts)
-
-    mad_values = np.full((n_channels, n_windows), np.nan)
-    medians = np.full((n_channels, n_windows), np.nan)
-
     scale = 1.4826 if scale_to_sigma else 1.0
-
-    for w, start in enumerate(starts):
-        segment = x[:, start : start + window_samples]
-
-        median = np.nanmedian(segment, axis=1)
-        absolute_deviation = np.abs(segment - median[:, np.newaxis])
-
-        mad = scale * np.nanmedian(absolute_deviation, axis=1)
-
-        medians[:, w] = median
-        mad_values[:, w] = mad
+    stats = _window_statistics(x, starts, window_samples, ("mad",), mad_scale=scale)
 
     return {
-        "mad": mad_values,
-        "median": medians,
+        "mad": stats["mad"],
+        "median": stats["median"],
         "times": times,
         "starts": starts,
     }
@@ -257,6 +835,7 @@ def detect_flat_or_low_variability(
     flat_fraction_threshold: float = 0.95,
     relative_mad_threshold: float = 0.10,
     robust_z_threshold: float = -5.0,
+    dtype: DTypeLike | None = np.float64,
 ) -> dict[str, NDArray]:
     """
     Detecta canales planos o con variabilidad anormalmente baja.
@@ -281,101 +860,45 @@ def detect_flat_or_low_variability(
 
             MAD_canal / mediana_espacial_MAD < threshold
     robust_z_threshold : float
-        Umbral inferior para el z-score robusto espacial del log(MAD).
-
-    Returns
-    -------
-    result : dict
-        flat_fraction : fracción de diferencias consecutivas casi nulas.
-        relative_mad : MAD del canal dividido por la mediana espacial.
-        z_log_mad : z-score robusto espacial.
-        flat : máscara de ventanas planas.
-        low_variability : máscara de variabilidad baja.
-        bad : unión de ambos criterios.
-    """
-    x = _validate_eeg_data(data)
-
-    starts, window_samples, times = _window_parameters(
-        n_samples=x.shape[1],
-        sfreq=sfreq,
-        window_s=window_s,
-        overlap=overlap,
-    )
-
-    n_channels = x.shape[0]
-    n_windows = len(starts)
-
-    flat_fraction = np.full((n_channels, n_windows), np.nan)
-    mad_values = np.full((n_channels, n_windows), np.nan)
-
-    for w, start in enumerate(starts):
-        segment = x[:, start : start + window_samples]
-
-        median = np.nanmedian(segment, axis=1)
-        mad_values[:, w] = (
-            1.4826
-            * np.nanmedian(
-                np.abs(segment - median[:, np.newaxis]),
-                axis=1,
-            )
-        )
-
-        differences = np.diff(segment, axis=1)
-        valid = np.isfinite(differences)
-
-        if flat_epsilon is None:
-            nearly_flat = differences == 0.0
-        else:
-            nearly_flat = np.abs(differences) <= flat_epsilon
-
-        numerator = np.sum(nearly_flat & valid, axis=1)
-        denominator = np.sum(valid, axis=1)
-
-        flat_fraction[:, w] = np.divide(
-            numerator,
-            denominator,
-            out=np.full(n_channels, np.nan),
-            where=denominator > 0,
-        )
-
-    epsilon = np.finfo(float).eps
-
-    spatial_median_mad = np.nanmedian(
-        mad_values,
-        axis=0,
-        keepdims=True,
-    )
-
-    relative_mad = np.divide(
-        mad_values,
-        spatial_median_mad,
-        out=np.full_like(mad_values, np.nan),
-        where=spatial_median_mad > epsilon,
-    )
-
-    log_mad = np.log(np.maximum(mad_values, epsilon))
-    z_log_mad = robust_zscore(log_mad, axis=0)
+        Umbral inferior para el z-score robusto espacial del log(MAD).
+    dtype : dtype or None
+        Tipo de cómputo de la señal (ver windowed_robust_peak_to_peak). En
+        float32 las diferencias nulas de una señal float32 nativa se
+        conservan exactamente.
 
-    flat = flat_fraction >= flat_fraction_threshold
+    Returns
+    -------
+    result : dict
+        flat_fraction : fracción de diferencias consecutivas casi nulas.
+        relative_mad : MAD del canal dividido por la mediana espacial.
+        z_log_mad : z-score robusto espacial.
+        flat : máscara de ventanas planas.
+        low_variability : máscara de variabilidad baja.
+        bad : unión de ambos criterios.
+    """
+    x = _validate_eeg_data(data, dtype)
 
-    low_variability = (
-        (relative_mad < relative_mad_threshold)
-        | (z_log_mad < robust_z_threshold)
+    starts, window_samples, times = _window_parameters(
+        n_samples=x.shape[1],
+        sfreq=sfreq,
+        window_s=window_s,
+        overlap=overlap,
     )
 
-    bad = flat | low_variability
+    stats = _window_statistics(
+        x, starts, window_samples, ("mad", "flat_fraction"), flat_epsilon=flat_epsilon
+    )
 
-    return {
-        "mad": mad_values,
-        "flat_fraction": flat_fraction,
-        "relative_mad": relative_mad,
-        "z_log_mad": z_log_mad,
-        "flat": flat,
-        "low_variability": low_variability,
-        "bad": bad,
-        "times": times,
-        "starts": starts,
-    }
+    result = _flat_flags(
+        stats["mad"],
+        stats["flat_fraction"],
+        flat_fraction_threshold=flat_fraction_threshold,
+        relative_mad_threshold=relative_mad_threshold,
+        robust_z_threshold=robust_z_threshold,
+    )
+    result["times"] = times
+    result["starts"] = starts
+    return result
 
 
 # 4. No estacionariedad ──────────────────────────────────────────────────
@@ -387,6 +910,7 @@ def windowed_nonstationarity(
     overlap: float = 0.5,
     robust_z_threshold: float = 5.0,
     minimum_ratio: float = 2.0,
+    dtype: DTypeLike | None = np.float64,
 ) -> dict[str, NDArray]:
     """
     Cuantifica cambios abruptos de amplitud y potencia entre ventanas.
@@ -407,6 +931,9 @@ def windowed_nonstationarity(
         Umbral para considerar atípico un cambio respecto de:
         - la historia del propio canal;
         - los demás canales en la misma transición.
+    dtype : dtype or None
+        Tipo de cómputo de la señal (ver windowed_robust_peak_to_peak). La
+        potencia media se acumula en float64 en cualquier caso.
 
     Returns
     -------
@@ -414,7 +941,7 @@ def windowed_nonstationarity(
         Arrays de forma (n_channels, n_windows). La primera ventana no tiene
         una ventana previa, por lo que sus cambios son NaN y su flag es False.
     """
-    x = _validate_eeg_data(data)
+    x = _validate_eeg_data(data, dtype)
 
     starts, window_samples, times = _window_parameters(
         n_samples=x.shape[1],
@@ -423,179 +950,57 @@ def windowed_nonstationarity(
         overlap=overlap,
     )
 
-    n_channels = x.shape[0]
-    n_windows = len(starts)
-
-    mad_values = np.full((n_channels, n_windows), np.nan)
-    power_values = np.full((n_channels, n_windows), np.nan)
-
-    for w, start in enumerate(starts):
-        segment = x[:, start : start + window_samples]
-
-        median = np.nanmedian(segment, axis=1)
-
-        mad_values[:, w] = (
-            1.4826
-            * np.nanmedian(
-                np.abs(segment - median[:, np.newaxis]),
-                axis=1,
-            )
-        )
-
-        power_values[:, w] = np.nanmean(segment**2, axis=1)
-
-    epsilon = np.finfo(float).eps
-
-    log_mad = np.log(np.maximum(mad_values, epsilon))
-    log_power = np.log(np.maximum(power_values, epsilon))
-
-    # Cambio absoluto logarítmico entre ventanas consecutivas.
-    delta_log_mad = np.abs(np.diff(log_mad, axis=1))
-    delta_log_power = np.abs(np.diff(log_power, axis=1))
-
-    # Equivale al mayor valor entre x_w/x_w-1 y x_w-1/x_w.
-    mad_ratio = np.exp(delta_log_mad)
-    power_ratio = np.exp(delta_log_power)
-
-    # Atipicidad respecto de la historia del propio canal.
-    z_mad_temporal = robust_zscore(delta_log_mad, axis=1)
-    z_power_temporal = robust_zscore(delta_log_power, axis=1)
-
-    # Atipicidad respecto de los demás canales en el mismo instante.
-    z_mad_spatial = robust_zscore(delta_log_mad, axis=0)
-    z_power_spatial = robust_zscore(delta_log_power, axis=0)
-
-    mad_change_flag = (
-        (mad_ratio >= minimum_ratio)
-        & (
-            (z_mad_temporal >= robust_z_threshold)
-            | (z_mad_spatial >= robust_z_threshold)
-        )
-    )
+    stats = _window_statistics(x, starts, window_samples, ("mad", "power"))
 
-    power_change_flag = (
-        (power_ratio >= minimum_ratio)
-        & (
-            (z_power_temporal >= robust_z_threshold)
-            | (z_power_spatial >= robust_z_threshold)
-        )
+    result = _nonstationarity_flags(
+        stats["mad"],
+        stats["power"],
+        robust_z_threshold=robust_z_threshold,
+        minimum_ratio=minimum_ratio,
     )
-
-    transition_bad = mad_change_flag | power_change_flag
-
-    # Se agrega una primera columna porque la primera ventana no tiene anterior.
-    def prepend_nan(array: NDArray[np.float64]) -> NDArray[np.float64]:
-        return np.concatenate(
-            [
-                np.full((array.shape[0], 1), np.nan),
-                array,
-            ],
-            axis=1,
-        )
-
-    def prepend_false(array: NDArray[np.bool_]) -> NDArray[np.bool_]:
-        return np.concatenate(
-            [
-                np.zeros((array.shape[0], 1), dtype=bool),
-                array,
-            ],
-            axis=1,
-        )
-
-    return {
-        "mad": mad_values,
-        "power": power_values,
-        "delta_log_mad": prepend_nan(delta_log_mad),
-        "delta_log_power": prepend_nan(delta_log_power),
-        "mad_ratio": prepend_nan(mad_ratio),
-        "power_ratio": prepend_nan(power_ratio),
-        "z_mad_temporal": prepend_nan(z_mad_temporal),
-        "z_mad_spatial": prepend_nan(z_mad_spatial),
-        "z_power_temporal": prepend_nan(z_power_temporal),
-        "z_power_spatial": prepend_nan(z_power_spatial),
-        "mad_change_flag": prepend_false(mad_change_flag),
-        "power_change_flag": prepend_false(power_change_flag),
-        "bad": prepend_false(transition_bad),
-        "times": times,
-        "starts": starts,
-    }
+    result["times"] = times
+    result["starts"] = starts
+    return result
 
 
 # Función integradora ────────────────────────────────────────────────────
 
-def compute_basic_channel_quality(
-    data: ArrayLike,
-    sfreq: float = 1200.0,
-    window_s: float = 2.0,
-    overlap: float = 0.5,
+def _quality_from_statistics(
+    stats: dict[str, NDArray[np.float64]],
+    times: NDArray[np.float64],
     amplitude_z_threshold: float = 5.0,
     relative_mad_threshold: float = 0.10,
     flat_fraction_threshold: float = 0.95,
-    flat_epsilon: float | None = None,
     nonstationarity_z_threshold: float = 5.0,
     nonstationarity_minimum_ratio: float = 2.0,
 ) -> dict[str, NDArray]:
     """
-    Ejecuta un control básico de calidad por canal y ventana.
+    Combina los estadísticos por ventana de _window_statistics en los
+    criterios y la fracción de ventanas malas de compute_basic_channel_quality.
     """
-    rp2p_result = windowed_robust_peak_to_peak(
-        data=data,
-        sfreq=sfreq,
-        window_s=window_s,
-        overlap=overlap,
-    )
-
-    mad_result = windowed_mad_amplitude(
-        data=data,
-        sfreq=sfreq,
-        window_s=window_s,
-        overlap=overlap,
-    )
-
-    flat_result = detect_flat_or_low_variability(
-        data=data,
-        sfreq=sfreq,
-        window_s=window_s,
-        overlap=overlap,
-        flat_epsilon=flat_epsilon,
+    flat_result = _flat_flags(
+        stats["mad"],
+        stats["flat_fraction"],
         flat_fraction_threshold=flat_fraction_threshold,
         relative_mad_threshold=relative_mad_threshold,
         robust_z_threshold=-amplitude_z_threshold,
     )
 
-    nonstationarity_result = windowed_nonstationarity(
-        data=data,
-        sfreq=sfreq,
-        window_s=window_s,
-        overlap=overlap,
+    nonstationarity_result = _nonstationarity_flags(
+        stats["mad"],
+        stats["power"],
         robust_z_threshold=nonstationarity_z_threshold,
         minimum_ratio=nonstationarity_minimum_ratio,
     )
 
-    epsilon = np.finfo(float).eps
-
-    rp2p = rp2p_result["rp2p"]
-    mad = mad_result["mad"]
-
-    z_log_rp2p = robust_zscore(
-        np.log(np.maximum(rp2p, epsilon)),
-        axis=0,
-    )
-
-    z_log_mad = robust_zscore(
-        np.log(np.maximum(mad, epsilon)),
-        axis=0,
-    )
-
-    high_amplitude = (
-        (z_log_rp2p > amplitude_z_threshold)
-        | (z_log_mad > amplitude_z_threshold)
-    )
+    rp2p = stats["rp2p"]
+    mad = stats["mad"]
 
-    low_amplitude = (
-        (z_log_rp2p < -amplitude_z_threshold)
-        | (z_log_mad < -amplitude_z_threshold)
-    )
+    amplitude_result = _amplitude_flags(rp2p, mad, amplitude_z_threshold)
+    z_log_rp2p = amplitude_result["z_log_rp2p"]
+    z_log_mad = amplitude_result["z_log_mad"]
+    high_amplitude = amplitude_result["high_amplitude"]
+    low_amplitude = amplitude_result["low_amplitude"]
 
     amplitude_bad = high_amplitude | low_amplitude
 
@@ -612,9 +1017,9 @@ def compute_basic_channel_quality(
     bad_fraction = np.mean(bad_windows, axis=1)
 
     return {
-        "times": rp2p_result["times"],
+        "times": times,
         "rp2p": rp2p,
-        "p2p": rp2p_result["p2p"],
+        "p2p": stats["p2p"],
         "mad": mad,
         "z_log_rp2p": z_log_rp2p,
         "z_log_mad": z_log_mad,
@@ -628,6 +1033,180 @@ def compute_basic_channel_quality(
     }
 
 
+def compute_basic_channel_quality(
+    data: ArrayLike,
+    sfreq: float = 1200.0,
+    window_s: float = 2.0,
+    overlap: float = 0.5,
+    amplitude_z_threshold: float = 5.0,
+    relative_mad_threshold: float = 0.10,
+    flat_fraction_threshold: float = 0.95,
+    flat_epsilon: float | None = None,
+    nonstationarity_z_threshold: float = 5.0,
+    nonstationarity_minimum_ratio: float = 2.0,
+    dtype: DTypeLike | None = np.float64,
+    n_jobs: int | None = 1,
+    executor: str = "thread",
+) -> dict[str, NDArray]:
+    """
+    Ejecuta un control básico de calidad por canal y ventana.
+
+    La señal se convierte una sola vez al tipo de cómputo `dtype` (ver
+    _validate_eeg_data) y se comparte entre las cuatro métricas. Para
+    registros que no entran en memoria, ver
+    compute_basic_channel_quality_chunked.
+
+    Con n_jobs > 1 (None usa os.cpu_count()) los canales se reparten entre
+    n_jobs hilos (executor="thread", sin copias: numpy libera el GIL en los
+    ordenamientos) o procesos (executor="process", la señal se copia una vez
+    a memoria compartida). El resultado es el mismo que con n_jobs=1.
+    """
+    x = _validate_eeg_data(data, dtype)
+    n_jobs = _resolve_n_jobs(n_jobs)
+
+    starts, window_samples, times = _window_parameters(
+        n_samples=x.shape[1],
+        sfreq=sfreq,
+        window_s=window_s,
+        overlap=overlap,
+    )
+
+    with _channel_pool(n_jobs, executor) as pool:
+        stats = _sharded_window_statistics(x, starts, window_samples, flat_epsilon, pool, n_jobs)
+
+    return _quality_from_statistics(
+        stats,
+        times,
+        amplitude_z_threshold=amplitude_z_threshold,
+        relative_mad_threshold=relative_mad_threshold,
+        flat_fraction_threshold=flat_fraction_threshold,
+        nonstationarity_z_threshold=nonstationarity_z_threshold,
+        nonstationarity_minimum_ratio=nonstationarity_minimum_ratio,
+    )
+
+
+# Motor por bloques ──────────────────────────────────────────────────────
+
+def _iter_window_blocks(
+    starts: NDArray[np.int64],
+    window_samples: int,
+    chunk_windows: int,
+) -> Iterator[tuple[slice, int, int]]:
+    """
+    Agrupa las ventanas de a chunk_windows. Para cada bloque devuelve
+    (ventanas del bloque, primera muestra, última muestra + 1): el rango de
+    muestras cubre completas todas las ventanas del bloque, así que dos
+    bloques consecutivos comparten el solapamiento entre ventanas.
+    """
+    for first in range(0, len(starts), chunk_windows):
+        windows = slice(first, min(first + chunk_windows, len(starts)))
+        yield windows, int(starts[windows.start]), int(starts[windows.stop - 1]) + window_samples
+
+
+def compute_basic_channel_quality_chunked(
+    source: ArrayLike | Callable[[int, int], ArrayLike],
+    sfreq: float = 1200.0,
+    window_s: float = 2.0,
+    overlap: float = 0.5,
+    amplitude_z_threshold: float = 5.0,
+    relative_mad_threshold: float = 0.10,
+    flat_fraction_threshold: float = 0.95,
+    flat_epsilon: float | None = None,
+    nonstationarity_z_threshold: float = 5.0,
+    nonstationarity_minimum_ratio: float = 2.0,
+    dtype: DTypeLike | None = np.float64,
+    n_samples: int | None = None,
+    chunk_windows: int = 256,
+    n_jobs: int | None = 1,
+    executor: str = "thread",
+) -> dict[str, NDArray]:
+    """
+    Igual que compute_basic_channel_quality, pero recorriendo la señal por
+    bloques alineados a la grilla de ventanas, de modo que nunca hay en
+    memoria más de chunk_windows ventanas de señal. Los estadísticos por
+    ventana son idénticos a los de compute_basic_channel_quality (cada
+    ventana se calcula sobre las mismas muestras); los z-scores y criterios
+    se calculan al final sobre todas las ventanas.
+
+    Parameters
+    ----------
+    source : array-like or callable
+        Señal EEG ya filtrada, de forma (n_channels, n_samples), que admita
+        source[:, start:stop] sin cargarse completa (np.memmap,
+        RunBundle.eeg, ...); o una función read(start, stop) que devuelva
+        el bloque (n_channels, stop - start), p. ej.
+        ReportTrialsQuality.read_eeg (filtra por bloques desde el HDF5).
+    n_samples : int or None
+        Largo total de la señal. Obligatorio si source es una función.
+    chunk_windows : int
+        Ventanas por bloque. La memoria de trabajo es de alrededor de
+        n_channels * chunk_windows * paso entre ventanas muestras.
+    dtype : dtype or None
+        Tipo de cómputo de cada bloque (ver _validate_eeg_data).
+    n_jobs : int or None
+        Workers entre los que se reparten los canales de cada bloque (ver
+        compute_basic_channel_quality). El pool se crea una vez para todos
+        los bloques; con executor="process" cada bloque se copia a memoria
+        compartida.
+
+    El resto de los parámetros son los de compute_basic_channel_quality.
+    """
+    if callable(source):
+        if n_samples is None:
+            raise ValueError("n_samples es obligatorio cuando source es una función.")
+        read = source
+    else:
+        if len(source.shape) != 2:
+            raise ValueError("Los datos deben tener forma (n_channels, n_samples).")
+        n_samples = source.shape[1] if n_samples is None else n_samples
+
+        def read(start: int, stop: int) -> ArrayLike:
+            return source[:, start:stop]
+
+    if chunk_windows < 1:
+        raise ValueError("chunk_windows debe ser al menos 1.")
+    n_jobs = _resolve_n_jobs(n_jobs)
+
+    starts, window_samples, times = _window_parameters(
+        n_samples=n_samples,
+        sfreq=sfreq,
+        window_s=window_s,
+        overlap=overlap,
+    )
+
+    stats: dict[str, NDArray[np.float64]] | None = None
+
+    with _channel_pool(n_jobs, executor) as pool:
+        for windows, block_start, block_stop in _iter_window_blocks(starts, window_samples, chunk_windows):
+            x = _validate_eeg_data(read(block_start, block_stop), dtype)
+            if x.shape[1] != block_stop - block_start:
+                raise ValueError(
+                    f"El bloque [{block_start}, {block_stop}) tiene {x.shape[1]} muestras."
+                )
+
+            block_stats = _sharded_window_statistics(
+                x, starts[windows] - block_start, window_samples, flat_epsilon, pool, n_jobs
+            )
+
+            if stats is None:
+                stats = {
+                    key: np.full((x.shape[0], len(starts)), np.nan)
+                    for key in block_stats
+                }
+            for key, values in block_stats.items():
+                stats[key][:, windows] = values
+
+    return _quality_from_statistics(
+        stats,
+        times,
+        amplitude_z_threshold=amplitude_z_threshold,
+        relative_mad_threshold=relative_mad_threshold,
+        flat_fraction_threshold=flat_fraction_threshold,
+        nonstationarity_z_threshold=nonstationarity_z_threshold,
+        nonstationarity_minimum_ratio=nonstationarity_minimum_ratio,
+    )
+
+
 # ── Clase de reporte ──────────────────────────────────────────────────
 
 class ReportChannelsQuality:
@@ -639,8 +1218,12 @@ class ReportChannelsQuality:
     diseño completo de estas métricas.
 
     Espera una señal EEG ya filtrada (banda + notch) — reutiliza la que
-    construye ReportTrialsQuality.get_eeg_raw(), para no repetir la
-    selección de canales EEG ni el filtrado.
+    construye ReportTrialsQuality (get_eeg_raw(), o get_eeg_data() vía
+    ReportChannelsQuality.from_array() para trabajar en float32 sin pasar
+    por el float64 de MNE), para no repetir la selección de canales EEG ni
+    el filtrado. Para registros que no entran en memoria, from_reader()
+    recorre la señal por bloques (p. ej. ReportTrialsQuality.read_eeg, que
+    filtra cada bloque leyendo del HDF5).
 
     Qué criterios entran en el % de "ventanas malas" (y por lo tanto en el
     estado de cada canal) es elegible vía el parámetro `methods`: por
@@ -660,7 +1243,7 @@ class ReportChannelsQuality:
 
     def __init__(
         self,
-        eeg_raw: "mne.io.RawArray",
+        eeg_raw: "mne.io.BaseRaw | None",
         methods: Sequence[str] | None = None,
         window_s: float = 2.0,
         overlap: float = 0.5,
@@ -670,12 +1253,17 @@ class ReportChannelsQuality:
         flat_epsilon: float | None = None,
         nonstationarity_z_threshold: float = 5.0,
         nonstationarity_minimum_ratio: float = 2.0,
+        dtype: DTypeLike | None = None,
+        chunk_windows: int | None = None,
+        n_jobs: int | None = 1,
+        executor: str = "thread",
     ) -> None:
         """
         Parámetros
         ----------
-        eeg_raw : mne.io.RawArray
-            Señal EEG (solo canales EEG), ya filtrada en banda + notch.
+        eeg_raw : mne.io.BaseRaw | None
+            Señal EEG (solo canales EEG), ya filtrada en banda + notch. None
+            sólo desde from_array() / from_reader().
         methods : Sequence[str] | None
             Subconjunto de criterios a combinar para decidir si una ventana
             es "mala": alguno de "amplitude", "flat", "low_variability",
@@ -699,6 +1287,22 @@ class ReportChannelsQuality:
         nonstationarity_z_threshold, nonstationarity_minimum_ratio : float
             Umbrales para marcar transiciones abruptas de amplitud/potencia
             entre ventanas consecutivas.
+        dtype : dtype | None
+            Tipo de cómputo de las métricas (ver compute_basic_channel_quality).
+            None conserva el de la señal: float64 para un mne.io.Raw, float32
+            para un array float32 recibido en from_array().
+        chunk_windows : int | None
+            Si no es None, las métricas se calculan por bloques de
+            chunk_windows ventanas (compute_basic_channel_quality_chunked),
+            leyendo del Raw o del array sólo el bloque en curso. Los
+            resultados son los mismos que sin bloques.
+        n_jobs : int | None
+            Hilos/procesos entre los que evaluate() reparte los canales
+            (None usa os.cpu_count(); 1, default, todo en este proceso).
+            Útil para montajes de 64+ canales; los resultados son los mismos.
+        executor : str
+            "thread" (default: los hilos comparten la señal, sin copias) o
+            "process" (la señal se copia a memoria compartida).
         """
         if methods is None:
             methods = self._AVAILABLE_METHODS
@@ -712,6 +1316,10 @@ class ReportChannelsQuality:
             )
         if not methods:
             raise ValueError("methods no puede estar vacío: elegí al menos un criterio.")
+        if chunk_windows is not None and chunk_windows < 1:
+            raise ValueError("chunk_windows debe ser al menos 1.")
+        if executor not in ("process", "thread"):
+            raise ValueError("executor debe ser 'process' o 'thread'.")
 
         self.eeg_raw = eeg_raw
         self.methods = methods
@@ -723,10 +1331,109 @@ class ReportChannelsQuality:
         self.flat_epsilon = flat_epsilon
         self.nonstationarity_z_threshold = nonstationarity_z_threshold
         self.nonstationarity_minimum_ratio = nonstationarity_minimum_ratio
-
+        self.dtype = dtype
+        self.chunk_windows = chunk_windows
+        self.n_jobs = n_jobs
+        self.executor = executor
+
+        self._data: Any = None ##Señal recibida en from_array() (array) o from_reader() (función)
+        self._n_samples: int | None = None
+        self._sfreq: float | None = None
         self._result: dict[str, Any] | None = None
         self._ch_names: list[str] | None = None
 
+    @classmethod
+    def from_array(
+        cls,
+        data: ArrayLike,
+        sfreq: float,
+        ch_names: Sequence[str],
+        **kwargs: Any,
+    ) -> "ReportChannelsQuality":
+        """
+        Crea el reporte a partir de un array (n_channels, n_samples) de
+        canales EEG ya filtrados, sin construir un mne.io.Raw (que siempre
+        promueve la señal a float64). Con un array float32, p. ej. el de
+        ReportTrialsQuality(dtype=np.float32).get_eeg_data(), todas las
+        métricas se calculan en float32.
+
+        Con chunk_windows (en kwargs), data puede ser cualquier objeto que
+        admita data[:, start:stop] (np.memmap, RunBundle.eeg, ...): se lee
+        bloque por bloque sin cargarlo completo.
+
+        Parámetros
+        ----------
+        data : array-like, shape (n_channels, n_samples)
+            Señal EEG filtrada. No se copia.
+        sfreq : float
+            Frecuencia de muestreo en Hz.
+        ch_names : Sequence[str]
+            Nombre de cada canal (fila) de data.
+        kwargs
+            Resto de los argumentos del constructor (methods, window_s, ...).
+        """
+        if kwargs.get("chunk_windows") is None:
+            data = _validate_eeg_data(data, kwargs.get("dtype"))
+        elif len(data.shape) != 2:
+            raise ValueError("Los datos deben tener forma (n_channels, n_samples).")
+
+        if len(ch_names) != data.shape[0]:
+            raise ValueError(
+                f"ch_names tiene {len(ch_names)} nombres, pero data tiene {data.shape[0]} canales."
+            )
+
+        report = cls(None, **kwargs)
+        report._data = data
+        report._n_samples = int(data.shape[1])
+        report._sfreq = float(sfreq)
+        report._ch_names = list(ch_names)
+        return report
+
+    @classmethod
+    def from_reader(
+        cls,
+        read: Callable[[int, int], ArrayLike],
+        n_samples: int,
+        sfreq: float,
+        ch_names: Sequence[str],
+        chunk_windows: int = 256,
+        **kwargs: Any,
+    ) -> "ReportChannelsQuality":
+        """
+        Crea el reporte a partir de una función read(start, stop) que
+        devuelve el bloque (n_channels, stop - start) de señal EEG filtrada.
+        La señal se recorre por bloques de chunk_windows ventanas, así que la
+        memoria no depende del largo del registro. Uso típico, leyendo y
+        filtrando del HDF5 del g.HIAMP:
+
+            quality = ReportTrialsQuality(gmanager, lsl_manager, dtype=np.float32)
+            channels = ReportChannelsQuality.from_reader(
+                quality.read_eeg, quality.n_samples, gmanager.sample_rate,
+                quality.eeg_ch_names(),
+            )
+
+        Parámetros
+        ----------
+        read : callable
+            Función read(start, stop) -> array (n_channels, stop - start).
+        n_samples : int
+            Largo total de la señal.
+        sfreq : float
+            Frecuencia de muestreo en Hz.
+        ch_names : Sequence[str]
+            Nombre de cada canal (fila) de los bloques.
+        chunk_windows : int
+            Ventanas por bloque.
+        kwargs
+            Resto de los argumentos del constructor (methods, window_s, ...).
+        """
+        report = cls(None, chunk_windows=chunk_windows, **kwargs)
+        report._data = read
+        report._n_samples = int(n_samples)
+        report._sfreq = float(sfreq)
+        report._ch_names = list(ch_names)
+        return report
+
     @classmethod
     def available_methods(cls) -> tuple[str, ...]:
         """Nombres válidos para el parámetro `methods` del constructor."""
@@ -735,6 +1442,7 @@ class ReportChannelsQuality:
     def evaluate(self) -> dict[str, Any]:
         """
         Corre (una única vez, con memoización) compute_basic_channel_quality
+        (o compute_basic_channel_quality_chunked, si hay chunk_windows)
         sobre la señal EEG, y luego recombina "bad_windows"/"bad_fraction"
         usando únicamente los criterios elegidos en self.methods (en vez de
         los cuatro que compute_basic_channel_quality combina por defecto).
@@ -747,12 +1455,23 @@ class ReportChannelsQuality:
         if self._result is not None:
             return self._result
 
-        data = self.eeg_raw.get_data(picks="eeg")
-        self._ch_names = self.eeg_raw.copy().pick("eeg").ch_names
-
-        result = compute_basic_channel_quality(
-            data=data,
-            sfreq=self.eeg_raw.info["sfreq"],
+        if self._data is not None:
+            data, sfreq, n_samples = self._data, self._sfreq, self._n_samples
+        else:
+            raw = self.eeg_raw
+            sfreq, n_samples = raw.info["sfreq"], raw.n_times
+            self._ch_names = [
+                name for name, ch_type in zip(raw.ch_names, raw.get_channel_types())
+                if ch_type == "eeg"
+            ]
+            if self.chunk_windows is None:
+                data = raw.get_data(picks="eeg")
+            else:
+                def data(start: int, stop: int) -> NDArray[np.float64]:
+                    return raw.get_data(picks="eeg", start=start, stop=stop)
+
+        kwargs = dict(
+            sfreq=sfreq,
             window_s=self.window_s,
             overlap=self.overlap,
             amplitude_z_threshold=self.amplitude_z_threshold,
@@ -761,8 +1480,18 @@ class ReportChannelsQuality:
             flat_epsilon=self.flat_epsilon,
             nonstationarity_z_threshold=self.nonstationarity_z_threshold,
             nonstationarity_minimum_ratio=self.nonstationarity_minimum_ratio,
+            dtype=self.dtype,
+            n_jobs=self.n_jobs,
+            executor=self.executor,
         )
 
+        if self.chunk_windows is None:
+            result = compute_basic_channel_quality(data, **kwargs)
+        else:
+            result = compute_basic_channel_quality_chunked(
+                data, n_samples=n_samples, chunk_windows=self.chunk_windows, **kwargs
+            )
+
         criteria = {
             "amplitude": result["high_amplitude"] | result["low_amplitude"],
             "flat": result["flat"],
@@ -872,9 +1601,10 @@ if __name__ == "__main__":
     gmanager = GHiampDataManager(os.path.join(path, f"{file_stem}.hdf5"), normalize_time=True)
     lsl_manager = LSLDataManager(os.path.join(path, f"{file_stem}.xdf"))
 
-    trials_quality = ReportTrialsQuality(gmanager, lsl_manager)
-    channels_quality = ReportChannelsQuality(trials_quality.get_eeg_raw(),
-                                             methods=["amplitude","flat","low_variability"])
+    trials_quality = ReportTrialsQuality(gmanager, lsl_manager, dtype=np.float32)
+    eeg_data, ch_names = trials_quality.get_eeg_data()
+    channels_quality = ReportChannelsQuality.from_array(eeg_data, gmanager.sample_rate, ch_names,
+                                                        methods=["amplitude","flat","low_variability"])
 
     print(channels_quality.summary())
     print(channels_quality.channels_df())
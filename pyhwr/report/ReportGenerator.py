@@ -244,7 +244,9 @@ class ReportGenerator:
         """
         Inserta en self.context la sección 'Calidad de trials' generada por
         ReportTrialsQuality.to_context() (quality_summary,
-        quality_rejected_table, quality_channel_offenders_table).
+        quality_rejected_table, quality_channel_offenders_table y, si se
+        pidió el barrido de umbral, quality_threshold_sweep_table y
+        quality_threshold_sweep_plot).
 
         Igual que set_figures, reemplaza esas claves por completo: si no se
         evaluó calidad para esta ronda, se eliminan del contexto para que el
@@ -260,7 +262,8 @@ class ReportGenerator:
         -------
         None
         """
-        quality_keys = ("quality_summary", "quality_rejected_table", "quality_channel_offenders_table")
+        quality_keys = ("quality_summary", "quality_rejected_table", "quality_channel_offenders_table",
+                        "quality_threshold_sweep_table", "quality_threshold_sweep_plot")
         for key in quality_keys:
             self.context.pop(key, None)
 
@@ -344,7 +347,9 @@ if __name__ == "__main__":
     from pyhwr.report.ReportFigures import ReportFigureGenerator
     from pyhwr.report.ReportTrialsQuality import ReportTrialsQuality
     from pyhwr.report.ReportChannelsQuality import ReportChannelsQuality
+    from pyhwr.utils import RunCache
     import os
+    import numpy as np
 
     subject_id = 5
     session_id = 1
@@ -355,8 +360,9 @@ if __name__ == "__main__":
 
     path = f"D:\\dataset\\DataBase\\sub-{subject_id:02d}\\ses-{session_id:02d}"
     file_stem = f"sub-{subject_id:02d}_ses-{session_id:02d}_task-{round_type.lower()}_run-{round_id:02d}_eeg"
-    lsl_manager = LSLDataManager(os.path.join(path, f"{file_stem}.xdf"))
-    gmanager = GHiampDataManager(os.path.join(path, f"{file_stem}.hdf5"), normalize_time=True)
+    cache = RunCache()
+    lsl_manager = LSLDataManager(os.path.join(path, f"{file_stem}.xdf"), cache=cache)
+    gmanager = GHiampDataManager(os.path.join(path, f"{file_stem}.hdf5"), normalize_time=True, cache=cache)
 
     trials_description = lsl_manager.describe_trials()
     resumen_pendown = lsl_manager.penDown_delays_resume()
@@ -385,11 +391,15 @@ if __name__ == "__main__":
     figure_generator = ReportFigureGenerator(lsl_manager, generator.base_dir / "figures", file_prefix)
     generator.set_figures(figure_generator.generate_all())
 
-    quality = ReportTrialsQuality(gmanager, lsl_manager)
-    generator.set_quality(quality.to_context())
+    ##con cache, volver a generar el reporte (p. ej. con otro reject_threshold) no vuelve a filtrar la ronda
+    quality = ReportTrialsQuality(gmanager, lsl_manager, dtype=np.float32, cache=cache)
+    generator.set_quality(quality.to_context(
+        sweep_thresholds=np.arange(50, 301, 25), figures_dir=generator.base_dir / "figures", file_prefix=file_prefix,
+    ))
 
-    channels_quality = ReportChannelsQuality(
-        quality.get_eeg_raw(),
+    eeg_data, eeg_ch_names = quality.get_eeg_data()
+    channels_quality = ReportChannelsQuality.from_array(
+        eeg_data, gmanager.sample_rate, eeg_ch_names,
         methods=["amplitude", "flat", "low_variability"],
     )
     generator.set_channels_quality(channels_quality.to_context())
@@ -1,16 +1,87 @@
 from __future__ import annotations
 
 from collections import Counter
+from pathlib import Path
 from typing import Any, TYPE_CHECKING
 
+import matplotlib.pyplot as plt
 import mne
 import numpy as np
 import pandas as pd
+from numpy.typing import ArrayLike, DTypeLike, NDArray
+
+from pyhwr.utils.ClockSynchronizer import ClockSynchronizer
 
 mne.set_log_level("WARNING")
 
 if TYPE_CHECKING:
     from pyhwr.managers import GHiampDataManager, LSLDataManager
+    from pyhwr.utils import RunCache
+
+
+def eeg_channels(channels_info: dict[str, pd.DataFrame]) -> tuple[NDArray[np.int64], list[str]]:
+    """
+    Posiciones (columnas de GHiampDataManager.raw_data) y nombres
+    ("EEG01", ...) de los canales EEG, a partir de
+    GHiampDataManager.channels_info.
+    """
+    used = channels_info["used_channels"]
+    eeg_mask = (used["ChannelType"] == "EEG").to_numpy()
+    eeg_positions = np.where(eeg_mask)[0]
+
+    if eeg_positions.size == 0:
+        raise ValueError("No se encontraron canales EEG en channels_info['used_channels'].")
+
+    # "PhysicalChannelNumber" puede aparecer duplicada como columna en
+    # channels_info (ver GHiampDataManager._get_channels_info); nos
+    # quedamos con la primera ocurrencia.
+    physical_col = used.loc[eeg_mask, "PhysicalChannelNumber"]
+    if isinstance(physical_col, pd.DataFrame):
+        physical_col = physical_col.iloc[:, 0]
+    physical_numbers = physical_col.tolist()
+
+    return eeg_positions, [f"EEG{int(n):02d}" for n in physical_numbers]
+
+
+def segment_peak_to_peak(
+    data: NDArray[np.floating],
+    starts: NDArray[np.int64],
+    stops: NDArray[np.int64],
+) -> NDArray[np.float64]:
+    """
+    Amplitud pico a pico de cada canal de data (canales, muestras) en cada
+    segmento [starts[i], stops[i]), como (segmentos, canales) en float64.
+
+    Los segmentos pueden tener largos distintos y solaparse: se reducen
+    todos en una única llamada a np.maximum.reduceat / np.minimum.reduceat
+    sobre los índices (start, stop) intercalados, sin copiar la señal. El
+    máximo y el mínimo son exactos en el dtype de data y la resta se hace en
+    float64, igual que el reject de MNE sobre épocas float64; un NaN en el
+    segmento da NaN (no supera ningún umbral).
+    """
+    n_channels, n_samples = data.shape
+    starts = np.asarray(starts, dtype=np.int64)
+    stops = np.asarray(stops, dtype=np.int64)
+    if starts.size == 0:
+        return np.empty((0, n_channels), dtype=np.float64)
+    if np.any(starts < 0) or np.any(stops > n_samples) or np.any(stops <= starts):
+        raise ValueError(f"Segmentos fuera del registro (0 a {n_samples} muestras) o vacíos.")
+
+    # reduceat no admite n_samples como índice: los segmentos que llegan al
+    # final se reducen hasta la anteúltima muestra y la última se agrega aparte.
+    reaches_end = stops == n_samples
+    indices = np.column_stack([starts, np.where(reaches_end, n_samples - 1, stops)]).ravel()
+
+    # Cada par consecutivo de índices reduce data[:, i:j]; los pares
+    # (start, stop) son los segmentos y los (stop, start siguiente) se descartan.
+    maxima = np.asarray(np.maximum.reduceat(data, indices, axis=1)[:, ::2])
+    minima = np.asarray(np.minimum.reduceat(data, indices, axis=1)[:, ::2])
+    if reaches_end.any():
+        last = np.asarray(data[:, -1:])
+        maxima[:, reaches_end] = np.maximum(maxima[:, reaches_end], last)
+        minima[:, reaches_end] = np.minimum(minima[:, reaches_end], last)
+
+    return (maxima.astype(np.float64) - minima).T
 
 
 class ReportTrialsQuality:
@@ -21,22 +92,38 @@ class ReportTrialsQuality:
     https://mne.tools/stable/auto_tutorials/preprocessing/20_rejecting_bad_data.html
 
     Cada trial se define desde el marcador 'trialTablet' (g.HIAMP) hasta el
-    marcador de rest de ese trial (LSL, streamer Tablet_Markers), sincronizados
-    al reloj del g.HIAMP mediante el marcador 'startRun'. No se distingue
+    marcador de rest de ese trial (LSL, streamer Tablet_Markers), llevado al
+    reloj del g.HIAMP con un ClockSynchronizer (offset + deriva ajustados
+    entre trialStartTime y los triggers trialTablet). No se distingue
     Ejecutada/Imaginada: ambos tipos de ronda tienen estos marcadores.
 
-    Todos los trials se agrupan en un único objeto mne.Epochs (self._cleaned_epocas),
+    La señal EEG se filtra canal por canal y se guarda en el tipo `dtype`:
+    con np.float32 (el tipo nativo del g.HIAMP) la ronda completa nunca se
+    promueve a float64, y sólo las épocas (mne.EpochsArray) se llevan a
+    float64.
+
+    Todos los trials se agrupan en un único objeto mne.Epochs (get_epochs()),
     lo que exige una duración común de época entre trials (mne.Epochs no
     admite duraciones distintas por época). Esa duración común se calcula
     igual que en epocas_escritura_ejecutada.py: el mínimo entre las
     duraciones propias (trialTablet → rest) de los trials no-artefacto, con
     un piso absoluto. Como consecuencia, el chequeo de amplitud pico a pico
     no cubre necesariamente la ventana completa y propia de cada trial, sino
-    sólo los primeros `common_duration` segundos de cada uno.
+    sólo los primeros `common_duration` segundos de cada uno. Con
+    reject_window="trial" el pico a pico se mide en cambio sobre la ventana
+    propia completa de cada trial, directamente sobre la señal filtrada
+    (segment_peak_to_peak), y el mne.Epochs queda sólo para visualización.
+
+    Con un RunCache (parámetro `cache`) la señal filtrada se guarda en disco
+    la primera vez y las siguientes instancias sobre el mismo registro y con
+    el mismo filtrado la leen como memmap, sin volver a filtrar: repetir el
+    reporte con otro reject_threshold u otros criterios de canales no paga
+    de nuevo el filtrado de la ronda completa.
 
     La evaluación de calidad de canales (más allá del rechazo por trial) vive
     en la clase hermana ReportChannelsQuality (ReportChannelsQuality.py), que
-    puede reutilizar la señal EEG ya filtrada de esta clase vía get_eeg_raw().
+    puede reutilizar la señal EEG ya filtrada de esta clase vía get_eeg_data()
+    (ReportChannelsQuality.from_array) o get_eeg_raw().
     """
 
     #: IDs numéricos de marcador -> nombre, según el firmware del g.HIAMP.
@@ -52,6 +139,9 @@ class ReportTrialsQuality:
         notch_freq: float = 50.0,
         min_valid_duration: float = 2.0,
         common_duration_floor: float = 2.0,
+        dtype: DTypeLike = np.float64,
+        cache: "RunCache | None" = None,
+        reject_window: str = "common",
     ) -> None:
         """
         Parámetros
@@ -75,6 +165,20 @@ class ReportTrialsQuality:
             cómputo (pero igual se intentan epocar).
         common_duration_floor : float
             Piso absoluto (s) para la duración común de época.
+        dtype : DTypeLike
+            Tipo en el que se guarda la señal EEG filtrada: np.float64 o
+            np.float32 (mitad de memoria; el filtrado se hace igual en
+            float64, canal por canal).
+        cache : RunCache | None
+            Cache en disco para la señal EEG filtrada (ver pyhwr.utils.RunCache).
+            La entrada depende del archivo .hdf5, los canales EEG, l_freq,
+            h_freq, notch_freq, el diseño del filtro (firwin, versión de MNE)
+            y dtype; con np.float32 ocupa la mitad.
+        reject_window : str
+            Tramo de cada trial sobre el que se mide el pico a pico: "common"
+            (los primeros common_duration segundos, como las épocas de
+            mne.Epochs y epocas_escritura_ejecutada.py) o "trial" (la ventana
+            propia completa, trialTablet → rest, de largo distinto por trial).
         """
         if not gmanager.normalize_time:
             raise ValueError(
@@ -82,6 +186,12 @@ class ReportTrialsQuality:
                 "normalize_time=True (marcadores en segundos)."
             )
 
+        if np.dtype(dtype) not in (np.float32, np.float64):
+            raise ValueError("dtype debe ser np.float32 o np.float64.")
+
+        if reject_window not in ("common", "trial"):
+            raise ValueError('reject_window debe ser "common" o "trial".')
+
         self.gmanager = gmanager
         self.lsl_manager = lsl_manager
         self.reject_threshold = reject_threshold
@@ -90,12 +200,25 @@ class ReportTrialsQuality:
         self.notch_freq = notch_freq
         self.min_valid_duration = min_valid_duration
         self.common_duration_floor = common_duration_floor
-
+        self.dtype = np.dtype(dtype)
+        self.cache = cache
+        self.reject_window = reject_window
+
+        self._eeg_data: NDArray[np.floating] | None = None ##Señal EEG filtrada (canales, muestras) en self.dtype
+        self._eeg_positions: NDArray[np.int64] | None = None
+        self._ch_names: list[str] | None = None
+        self._margin: int | None = None ##Muestras de contexto de read_eeg()
         self._raw: mne.io.RawArray | None = None
         self._trials: list[dict[str, Any]] | None = None
-        self._full_epocas: mne.Epochs | None = None
-        self._cleaned_epocas: mne.Epochs | None = None ##Objeto con épocas filtradas según reject
+        self._peak_to_peak: NDArray[np.float64] | None = None ##(trials evaluados, canales), ver evaluate()
+        self._evaluated_windows: list[dict[str, Any]] | None = None ##Ventana de cada fila de _peak_to_peak
+        self._epoch_events: NDArray[np.int64] | None = None ##Eventos de las épocas de common_duration
+        self._letter_codes: dict[str, int] | None = None
+        self._epoch_windows: list[dict[str, Any]] | None = None ##Ventana de cada fila de _epoch_events
+        self._full_epocas: mne.BaseEpochs | None = None ##Épocas de todos los trials incluidos (sin reject), en get_epochs()
+        self._cleaned_epocas: mne.BaseEpochs | None = None ##Épocas aceptadas según reject, en get_epochs()
         self._common_duration: float | None = None
+        self._sync: ClockSynchronizer | None = None ##Sincronización tablet → g.HIAMP usada en las ventanas
 
     # ── Señal EEG ──────────────────────────────────────────────────────
 
@@ -104,78 +227,212 @@ class ReportTrialsQuality:
         if "trialTablet" not in markers or "startRun" not in markers:
             self.gmanager.changeMarkersNames(self._MARKER_NAMES)
 
-    def _build_eeg_raw(self) -> mne.io.RawArray:
-        used = self.gmanager.channels_info["used_channels"]
-        eeg_mask = (used["ChannelType"] == "EEG").to_numpy()
-        eeg_positions = np.where(eeg_mask)[0]
-
-        if eeg_positions.size == 0:
-            raise ValueError("No se encontraron canales EEG en channels_info['used_channels'].")
-
-        # "PhysicalChannelNumber" puede aparecer duplicada como columna en
-        # channels_info (ver GHiampDataManager._get_channels_info); nos
-        # quedamos con la primera ocurrencia.
-        physical_col = used.loc[eeg_mask, "PhysicalChannelNumber"]
-        if isinstance(physical_col, pd.DataFrame):
-            physical_col = physical_col.iloc[:, 0]
-        physical_numbers = physical_col.tolist()
-        ch_names = [f"EEG{int(n):02d}" for n in physical_numbers]
-
-        # gmanager.raw_data: (muestras, canales) → MNE espera (canales, muestras)
-        eeg_data = self.gmanager.raw_data[:, eeg_positions].T.astype(np.float64)
-
-        info = mne.create_info(ch_names=ch_names, sfreq=self.gmanager.sample_rate, ch_types="eeg")
-        raw = mne.io.RawArray(eeg_data, info, verbose=False)
-        raw.filter(l_freq=self.l_freq, h_freq=self.h_freq, picks="eeg", fir_design="firwin", verbose=False)
-        raw.notch_filter([self.notch_freq], picks="eeg", verbose=False)
-        return raw
-
-    def _ensure_raw(self) -> mne.io.RawArray:
-        if self._raw is None:
+    def _eeg_channels(self) -> tuple[NDArray[np.int64], list[str]]:
+        """Posiciones (columnas de gmanager.raw_data) y nombres de los canales EEG."""
+        if self._eeg_positions is None:
+            self._eeg_positions, self._ch_names = eeg_channels(self.gmanager.channels_info)
+        return self._eeg_positions, self._ch_names
+
+    def eeg_ch_names(self) -> list[str]:
+        """Nombres de los canales EEG, en el orden de get_eeg_data() y read_eeg()."""
+        return list(self._eeg_channels()[1])
+
+    @property
+    def n_samples(self) -> int:
+        """Muestras del registro (largo de get_eeg_data() y rango válido de read_eeg())."""
+        return self.gmanager.raw_data.shape[0]
+
+    def _filter_block(self, samples: NDArray) -> NDArray[np.floating]:
+        """
+        Filtra (banda + notch) un bloque (muestras, canales) y lo devuelve
+        como (canales, muestras) en self.dtype. Cada canal se filtra en
+        float64 (mismo resultado que raw.filter + raw.notch_filter, que
+        también filtran fila por fila), así que nunca hay más de un canal en
+        float64 en memoria.
+        """
+        sfreq = self.gmanager.sample_rate
+        filtered = np.empty((samples.shape[1], samples.shape[0]), dtype=self.dtype)
+
+        for idx in range(samples.shape[1]):
+            channel = samples[:, idx].astype(np.float64)[np.newaxis]
+            mne.filter.filter_data(channel, sfreq, self.l_freq, self.h_freq, fir_design="firwin",
+                                   copy=False, verbose=False)
+            mne.filter.notch_filter(channel, sfreq, [self.notch_freq], copy=False, verbose=False)
+            filtered[idx] = channel[0]
+
+        return filtered
+
+    def _filter_margin(self) -> int:
+        """
+        Muestras de contexto que read_eeg() lee a cada lado del bloque: el
+        largo del FIR pasa banda más el del notch (los filtros de fase cero
+        sólo miran medio largo hacia cada lado, así que sobra margen).
+        """
+        if self._margin is None:
+            sfreq = self.gmanager.sample_rate
+            bandpass = mne.filter.create_filter(None, sfreq, self.l_freq, self.h_freq,
+                                                fir_design="firwin", verbose=False)
+            # notch_filter arma un rechaza banda de ancho notch_freq/200 con
+            # 1 Hz de transición total.
+            half_band = self.notch_freq / 400.0 + 0.5
+            notch = mne.filter.create_filter(None, sfreq, self.notch_freq + half_band,
+                                             self.notch_freq - half_band, l_trans_bandwidth=0.5,
+                                             h_trans_bandwidth=0.5, fir_design="firwin", verbose=False)
+            self._margin = len(bandpass) + len(notch)
+        return self._margin
+
+    def _build_eeg_data(self) -> tuple[NDArray[np.floating], list[str]]:
+        eeg_positions, ch_names = self._eeg_channels()
+        # gmanager.raw_data: (muestras, canales) → (canales, muestras)
+        return self._filter_block(self.gmanager.raw_data[:, eeg_positions]), ch_names
+
+    def _eeg_cache_kind(self) -> str:
+        """Tipo de la entrada de cache: todo lo que determina la señal filtrada, además del archivo."""
+        eeg_positions, _ = self._eeg_channels()
+        return "|".join([
+            "eeg_filtered",
+            ",".join(str(position) for position in eeg_positions),
+            f"{self.l_freq}-{self.h_freq}",
+            f"notch{self.notch_freq}",
+            f"firwin-mne{mne.__version__}",
+            self.dtype.name,
+        ])
+
+    def _cached_eeg_data(self) -> NDArray[np.floating] | None:
+        """
+        Señal filtrada disponible sin filtrar: la ya construida, o la entrada
+        del cache (memmap copy-on-write: se puede modificar en memoria sin
+        tocar el archivo). None si no hay ninguna.
+        """
+        if self._eeg_data is None and self.cache is not None:
+            cached = self.cache.load_array(self.gmanager.filename, self._eeg_cache_kind(), mmap_mode="c")
+            expected = (len(self._eeg_channels()[0]), self.n_samples)
+            if cached is not None and cached.shape == expected and cached.dtype == self.dtype:
+                self._eeg_data = cached
+        return self._eeg_data
+
+    def _ensure_eeg_data(self) -> tuple[NDArray[np.floating], list[str]]:
+        if self._eeg_data is None:
             self._ensure_marker_names()
-            self._raw = self._build_eeg_raw()
-        return self._raw
+            if self._cached_eeg_data() is None:
+                self._eeg_data, _ = self._build_eeg_data()
+                if self.cache is not None:
+                    self.cache.save_array(self.gmanager.filename, self._eeg_cache_kind(), self._eeg_data)
+        return self._eeg_data, self._ch_names
+
+    def get_eeg_data(self) -> tuple[NDArray[np.floating], list[str]]:
+        """
+        Devuelve (señal, nombres de canal): la señal EEG (solo canales EEG,
+        filtrada en banda + notch) como array (canales, muestras) en
+        self.dtype, construida una única vez. Es la forma de reutilizarla en
+        ReportChannelsQuality.from_array() sin promoverla a float64.
+        """
+        return self._ensure_eeg_data()
+
+    def read_eeg(self, start: int, stop: int) -> NDArray[np.floating]:
+        """
+        Devuelve el bloque [start, stop) de la señal EEG filtrada, como
+        (canales, stop - start) en self.dtype, sin construir el registro
+        completo: se leen de gmanager.raw_data (del HDF5, si no está
+        precargado) unas muestras extra a cada lado del bloque, se filtra y
+        se recorta. Salvo redondeo, coincide con get_eeg_data()[0][:, start:stop].
+
+        Pensada para ReportChannelsQuality.from_reader() en registros que no
+        entran en memoria. Si la señal completa ya está construida o en el
+        cache, el bloque se copia de ahí, sin filtrar.
+        """
+        n_samples = self.n_samples
+        if not 0 <= start <= stop <= n_samples:
+            raise ValueError(f"Bloque [{start}, {stop}) fuera del registro (0 a {n_samples} muestras).")
+
+        available = self._cached_eeg_data()
+        if available is not None:
+            return np.array(available[:, start:stop])
+
+        eeg_positions, _ = self._eeg_channels()
+        margin = self._filter_margin()
+        first, last = max(start - margin, 0), min(stop + margin, n_samples)
+
+        filtered = self._filter_block(self.gmanager.raw_data[first:last, eeg_positions])
+        return filtered[:, start - first : stop - first]
 
     def get_eeg_raw(self) -> mne.io.RawArray:
         """
-        Devuelve la señal EEG (solo canales EEG, filtrada en banda + notch),
-        construyéndola una única vez. Pensada para reutilizarse en
-        ReportChannelsQuality sin repetir la selección de canales/filtrado.
+        Devuelve la señal de get_eeg_data() como mne.io.RawArray (construido
+        una única vez). MNE guarda siempre float64: con dtype=np.float64
+        comparte la memoria de get_eeg_data(), con np.float32 es una copia.
         """
-        return self._ensure_raw()
+        if self._raw is None:
+            eeg_data, ch_names = self._ensure_eeg_data()
+            info = mne.create_info(ch_names=ch_names, sfreq=self.gmanager.sample_rate, ch_types="eeg")
+            self._raw = mne.io.RawArray(eeg_data, info, verbose=False)
+        return self._raw
 
     # ── Ventanas de trial (trialTablet → rest) ────────────────────────
 
+    def _clock_sync(self) -> ClockSynchronizer | None:
+        """
+        Ajusta offset + deriva entre el reloj de la tablet (trialStartTime de
+        Tablet_Markers) y el del g.HIAMP (marcadores trialTablet). Devuelve
+        None si no hay pares suficientes para un ajuste confiable.
+        """
+        try:
+            return ClockSynchronizer.from_managers(self.gmanager, self.lsl_manager, "Tablet_Markers")
+        except ValueError:
+            return None
+
     def _trial_windows(self) -> list[dict[str, Any]]:
+        """
+        Ventanas (trialTablet → rest) de cada trial en el reloj del g.HIAMP.
+
+        El trialRestTime de la tablet se lleva al reloj del g.HIAMP con un
+        ClockSynchronizer ajustado entre trialStartTime y los triggers
+        trialTablet, de modo que la deriva entre relojes no se acumula en
+        rondas largas. Cada trial se ancla en su trigger trialTablet; si el
+        trigger se perdió, se usa su trialStartTime sincronizado. Si no se
+        puede ajustar el sincronizador se usa un único offset a partir del
+        marcador 'startRun' y los triggers se emparejan por orden.
+        """
         self._ensure_marker_names()
 
-        t0_gtec = self.gmanager.markers_info["startRun"][0]
-        trials_tablet = np.array(self.gmanager.markers_info["trialTablet"])
+        trials_tablet = np.asarray(self.gmanager.markers_info["trialTablet"], dtype=np.float64)
 
-        tablet_trials = self.lsl_manager.trials_info.get("Tablet_Markers", {})
-        if not tablet_trials:
+        table = self.lsl_manager._get_table("Tablet_Markers")
+        if table is None:
             raise ValueError(
                 "No hay datos de 'Tablet_Markers' en el LSLDataManager: no se "
                 "puede definir la ventana de trial (trialTablet → rest)."
             )
 
-        n_lsl_trials = len(tablet_trials)
-        letras = [tablet_trials[i]["letter"] for i in range(1, n_lsl_trials + 1)]
-
-        start_time_tablet = tablet_trials[1]["sessionStartTime"] / 1000
-        rest_times = np.array(self.lsl_manager["Tablet_Markers", "trialRestTime", :]) / 1000 - start_time_tablet
-        rest_times_gtec = rest_times + t0_gtec
-
-        n_trials = min(len(letras), len(trials_tablet), len(rest_times_gtec))
+        letras = table["letter"].tolist()
+        start_times = table.numeric("trialStartTime") / 1000
+        rest_times = table.numeric("trialRestTime") / 1000
+
+        sync = self._clock_sync()
+        if sync is not None:
+            starts_gtec = sync.transform(start_times)
+            source_idx, target_idx = sync.pairs
+            starts_gtec[source_idx[sync.inliers]] = trials_tablet[target_idx[sync.inliers]]
+            trial_indices = np.flatnonzero(~np.isnan(starts_gtec) & ~np.isnan(rest_times))
+        else:
+            t0_gtec = self.gmanager.markers_info["startRun"][0]
+            start_time_tablet = table["sessionStartTime"][0] / 1000
+            sync = ClockSynchronizer.from_offset(t0_gtec - start_time_tablet)
+            n_trials = min(len(letras), len(trials_tablet), len(rest_times))
+            starts_gtec = trials_tablet[:n_trials]
+            trial_indices = np.arange(n_trials)
+
+        self._sync = sync
+        rest_times_gtec = sync.transform(rest_times)
 
         return [
             {
-                "trial_id": i + 1,
+                "trial_id": int(i) + 1,
                 "letter": letras[i],
-                "start": float(trials_tablet[i]),
+                "start": float(starts_gtec[i]),
                 "end": float(rest_times_gtec[i]),
             }
-            for i in range(n_trials)
+            for i in trial_indices
         ]
 
     # ── Duración común de época ────────────────────────────────────────
@@ -196,23 +453,29 @@ class ReportTrialsQuality:
 
         return max(self.common_duration_floor, min(valid_durations))
 
-    # ── Construcción del Epochs combinado ─────────────────────────────
+    # ── Segmentos de cada trial ─────────────────────────────────────────
+
+    def _epoch_n_times(self, common_duration: float) -> int:
+        # Mismas muestras que mne.Epochs(tmin=0, tmax=common_duration).
+        return int(round(common_duration * self.gmanager.sample_rate)) + 1
 
-    def _build_combined_epochs(
+    def _epoch_layout(
         self,
-        raw: mne.io.RawArray,
         windows: list[dict[str, Any]],
         common_duration: float,
-    ) -> tuple[mne.Epochs | None, list[dict[str, Any]], list[dict[str, Any]]]:
+        n_samples: int,
+    ) -> tuple[NDArray[np.int64], dict[str, int], list[dict[str, Any]], list[dict[str, Any]]]:
         """
-        Arma un único mne.Epochs con un evento por trial (ancla: inicio de
-        trialTablet, duración: common_duration para todos). Devuelve
-        (epochs, ventanas_incluidas, ventanas_fuera_de_rango); epochs es None
-        si ninguna ventana entra en el raw. epochs.drop_log[i] corresponde en
-        orden a ventanas_incluidas[i].
+        Eventos de un único mne.EpochsArray con una época por trial (ancla:
+        inicio de trialTablet, duración: common_duration para todos).
+        Devuelve (events, letter_codes, ventanas_incluidas,
+        ventanas_fuera_de_rango); events[i] corresponde a
+        ventanas_incluidas[i] y no tiene filas si ninguna ventana entra en
+        la señal.
         """
-        sfreq = raw.info["sfreq"]
-        first_sample, last_sample = raw.first_samp, raw.last_samp
+        sfreq = self.gmanager.sample_rate
+        first_sample, last_sample = 0, n_samples - 1
+        n_times = self._epoch_n_times(common_duration)
 
         letters = sorted({w["letter"] for w in windows})
         letter_codes = {letter: idx + 1 for idx, letter in enumerate(letters)}
@@ -224,36 +487,56 @@ class ReportTrialsQuality:
         for window in windows:
             start_sample = int(round(window["start"] * sfreq))
             end_sample = int(round((window["start"] + common_duration) * sfreq))
-            if not (first_sample <= start_sample <= end_sample <= last_sample):
+            if not (first_sample <= start_sample <= end_sample <= last_sample) \
+                    or start_sample + n_times > last_sample + 1:
                 skipped.append(window)
                 continue
 
             events.append([start_sample, 0, letter_codes[window["letter"]]])
             included.append(window)
 
-        if not included:
-            return None, included, skipped
+        return np.array(events, dtype=np.int64).reshape(-1, 3), letter_codes, included, skipped
+
+    def _trial_segments(
+        self,
+        windows: list[dict[str, Any]],
+        n_samples: int,
+    ) -> tuple[NDArray[np.int64], NDArray[np.int64], list[dict[str, Any]], list[dict[str, Any]]]:
+        """
+        Ventana propia de cada trial (trialTablet → rest) en muestras, con
+        ambos extremos incluidos como en las épocas. Devuelve (starts, stops,
+        ventanas_incluidas, ventanas_fuera_de_rango), con los segmentos
+        [starts[i], stops[i]) de ventanas_incluidas[i].
+        """
+        sfreq = self.gmanager.sample_rate
 
+        included: list[dict[str, Any]] = []
+        skipped: list[dict[str, Any]] = []
+        starts, stops = [], []
 
-        self._full_epocas = epochs = mne.Epochs(
-                    raw, np.array(events, dtype=int), event_id=letter_codes,
-                    tmin=0, tmax=common_duration, baseline=None,
-                    reject=None, preload=True, verbose=False,
-                )
-        epochs = mne.Epochs(
-            raw, np.array(events, dtype=int), event_id=letter_codes,
-            tmin=0, tmax=common_duration, baseline=None,
-            reject={"eeg": self.reject_threshold}, preload=True, verbose=False,
-        )
-        return epochs, included, skipped
+        for window in windows:
+            start_sample = int(round(window["start"] * sfreq))
+            end_sample = int(round(window["end"] * sfreq))
+            if not (0 <= start_sample <= end_sample <= n_samples - 1):
+                skipped.append(window)
+                continue
+
+            starts.append(start_sample)
+            stops.append(end_sample + 1)
+            included.append(window)
+
+        return np.array(starts, dtype=np.int64), np.array(stops, dtype=np.int64), included, skipped
 
     # ── Evaluación pico a pico por trial ──────────────────────────────
 
     def evaluate(self) -> list[dict[str, Any]]:
         """
         Corre (una única vez, con memoización) la evaluación de amplitud pico
-        a pico, vía un único mne.Epochs (self._cleaned_epocas) con
-        reject={"eeg": ...} + drop_log.
+        a pico, con el mismo criterio que reject={"eeg": ...} + drop_log de
+        MNE pero calculada directamente sobre la señal filtrada
+        (segment_peak_to_peak), sin construir épocas: sobre los primeros
+        common_duration segundos de cada trial (reject_window="common") o
+        sobre su ventana propia completa (reject_window="trial").
 
         Devuelve una lista de dicts, uno por trial, con: trial_id, letter,
         start, end, duration, status ('aceptado' | 'rechazado' |
@@ -264,14 +547,26 @@ class ReportTrialsQuality:
         if self._trials is not None:
             return self._trials
 
-        raw = self._ensure_raw()
+        eeg_data, ch_names = self._ensure_eeg_data()
         windows = self._trial_windows()
 
         invalid_windows = [w for w in windows if (w["end"] - w["start"]) <= 0]
         ok_windows = [w for w in windows if (w["end"] - w["start"]) > 0]
 
         common_duration = self._compute_common_duration(ok_windows)
-        epochs, included, skipped = self._build_combined_epochs(raw, ok_windows, common_duration)
+        n_samples = eeg_data.shape[1]
+        events, letter_codes, epoch_windows, epoch_skipped = self._epoch_layout(
+            ok_windows, common_duration, n_samples,
+        )
+
+        if self.reject_window == "trial":
+            starts, stops, included, skipped = self._trial_segments(ok_windows, n_samples)
+        else:
+            starts, stops = events[:, 0], events[:, 0] + self._epoch_n_times(common_duration)
+            included, skipped = epoch_windows, epoch_skipped
+
+        peak_to_peak = segment_peak_to_peak(eeg_data, starts, stops)
+        over_threshold = peak_to_peak > self.reject_threshold
 
         results_by_trial_id: dict[int, dict[str, Any]] = {}
 
@@ -287,24 +582,75 @@ class ReportTrialsQuality:
                 window["end"] - window["start"], "fuera_de_rango",
             )
 
-        if epochs is not None:
-            for window, drop_reasons in zip(included, epochs.drop_log):
-                rejected = len(drop_reasons) > 0
-                result = self._trial_result(
-                    window["trial_id"], window["letter"], window["start"], window["end"],
-                    window["end"] - window["start"], "rechazado" if rejected else "aceptado",
-                )
-                result["rejected"] = rejected
-                result["channels"] = list(drop_reasons) if rejected else []
-                results_by_trial_id[window["trial_id"]] = result
+        for window, channels_over in zip(included, over_threshold):
+            # Canales en el orden de ch_names, como en drop_log.
+            channels = [ch_names[ch] for ch in np.flatnonzero(channels_over)]
+            rejected = len(channels) > 0
+            result = self._trial_result(
+                window["trial_id"], window["letter"], window["start"], window["end"],
+                window["end"] - window["start"], "rechazado" if rejected else "aceptado",
+            )
+            result["rejected"] = rejected
+            result["channels"] = channels
+            results_by_trial_id[window["trial_id"]] = result
 
         results = [results_by_trial_id[w["trial_id"]] for w in windows]
 
         self._trials = results
-        self._cleaned_epocas = epochs
+        self._peak_to_peak = peak_to_peak
+        self._evaluated_windows = included
+        self._epoch_events = events
+        self._letter_codes = letter_codes
+        self._epoch_windows = epoch_windows
         self._common_duration = common_duration
         return results
 
+    def get_epochs(self, cleaned: bool = False) -> mne.BaseEpochs | None:
+        """
+        Épocas de common_duration segundos de los trials (corre evaluate() si
+        hace falta); None si ningún trial entra en la señal. Se construyen
+        recién la primera vez que se piden, con una única copia de la señal
+        filtrada al array float64 de MNE.
+
+        Con cleaned=False devuelve el mne.Epochs con todos los trials
+        incluidos, sin rechazo. Con cleaned=True, sólo las épocas de los
+        trials aceptados por evaluate(), con el drop_log y selection que
+        daría drop_bad(reject={"eeg": ...}) (con reject_window="trial", el
+        rechazo es el de la ventana propia, y un trial cuya ventana propia
+        no entra en la señal figura como "fuera_de_rango"); se arman
+        indexando las épocas completas (mne.Epochs no admite vistas, así
+        que ahí sí se copian las aceptadas).
+        """
+        self.evaluate()
+        if self._full_epocas is None and len(self._epoch_events) > 0:
+            eeg_data, ch_names = self._ensure_eeg_data()
+            n_times = self._epoch_n_times(self._common_duration)
+            epochs_data = np.empty((len(self._epoch_events), len(ch_names), n_times), dtype=np.float64)
+            for epoch, start in zip(epochs_data, self._epoch_events[:, 0]):
+                epoch[...] = eeg_data[:, start:start + n_times]
+
+            info = mne.create_info(ch_names=ch_names, sfreq=self.gmanager.sample_rate, ch_types="eeg")
+            self._full_epocas = mne.EpochsArray(
+                epochs_data, info, events=self._epoch_events, tmin=0, event_id=self._letter_codes,
+                baseline=None, verbose=False,
+            )
+
+        if not cleaned or self._full_epocas is None:
+            return self._full_epocas
+
+        if self._cleaned_epocas is None:
+            results_by_trial_id = {t["trial_id"]: t for t in self._trials}
+            drop_log = []
+            for window in self._epoch_windows:
+                result = results_by_trial_id[window["trial_id"]]
+                drop_log.append(tuple(result["channels"]) if result["rejected"] is not None else (result["status"],))
+            accepted = [idx for idx, reasons in enumerate(drop_log) if not reasons]
+            cleaned_epochs = self._full_epocas[accepted]
+            cleaned_epochs.drop_log = tuple(drop_log)
+            cleaned_epochs.event_id = dict(self._full_epocas.event_id) ##el indexado descarta letras sin épocas
+            self._cleaned_epocas = cleaned_epochs
+        return self._cleaned_epocas
+
     @staticmethod
     def _trial_result(trial_id, letter, start, end, duration, status) -> dict[str, Any]:
         return {
@@ -329,6 +675,7 @@ class ReportTrialsQuality:
         total = len(evaluated)
         n_rejected = len(rejected)
         pct = (n_rejected / total * 100) if total else 0.0
+        jitter = self._sync.jitter if self._sync is not None else None
 
         return {
             "total_trials": total,
@@ -337,8 +684,10 @@ class ReportTrialsQuality:
             "unprocessable_trials": len(unprocessable),
             "reject_threshold": f"{self.reject_threshold:.0f} µV",
             "common_duration_s": (
-                f"{self._common_duration:.3f} s" if self._common_duration is not None else "Sin dato"
+                "Ventana completa de cada trial" if self.reject_window == "trial"
+                else f"{self._common_duration:.3f} s" if self._common_duration is not None else "Sin dato"
             ),
+            "clock_jitter": f"{jitter * 1000:.2f} ms" if jitter is not None else "Sin dato",
         }
 
     def rejected_trials_df(self) -> pd.DataFrame:
@@ -364,12 +713,129 @@ class ReportTrialsQuality:
         rows = [{"Canal": ch, "Trials rechazados": n} for ch, n in counter.most_common()]
         return pd.DataFrame(rows)
 
+    # ── Barrido de umbral ──────────────────────────────────────────────
+
+    def threshold_sweep(self, thresholds: ArrayLike) -> dict[str, Any]:
+        """
+        Rechazo por trial para varios umbrales a la vez, sin volver a
+        evaluar: reutiliza el pico a pico por trial y canal de evaluate()
+        (calculado una única vez, según reject_window) y lo compara contra
+        todos los umbrales en una única operación vectorizada. La fila de
+        reject_threshold, si está entre los umbrales, coincide con evaluate().
+
+        Devuelve un dict con:
+        - thresholds: (umbrales,) en µV, de menor a mayor.
+        - rejected, rejected_pct: (umbrales,) trials rechazados y su
+          porcentaje sobre los trials evaluados.
+        - letters, letter_trials: letras y trials evaluados de cada una.
+        - letter_acceptance: (umbrales, letras) fracción de trials aceptados.
+        - ch_names, channel_offenders: (umbrales, canales) trials rechazados
+          en los que cada canal supera el umbral (como channel_offenders_df()).
+        - channel_ranking: (umbrales, canales) índices de canal de más a
+          menos responsable (empates en el orden de ch_names).
+        """
+        self.evaluate()
+        thresholds = np.sort(np.asarray(thresholds, dtype=np.float64).ravel())
+        peak_to_peak = self._peak_to_peak
+        n_trials = peak_to_peak.shape[0]
+
+        letters = sorted({w["letter"] for w in self._evaluated_windows})
+        letter_codes = {letter: idx for idx, letter in enumerate(letters)}
+        letter_onehot = np.zeros((n_trials, len(letters)))
+        letter_onehot[np.arange(n_trials), [letter_codes[w["letter"]] for w in self._evaluated_windows]] = 1.0
+        letter_trials = letter_onehot.sum(axis=0)
+
+        # (umbrales, trials, canales); NaN no supera ningún umbral, como en evaluate().
+        over_threshold = peak_to_peak[np.newaxis] > thresholds[:, np.newaxis, np.newaxis]
+        rejected_trials = over_threshold.any(axis=2)
+        channel_offenders = over_threshold.sum(axis=1)
+        rejected = rejected_trials.sum(axis=1)
+
+        return {
+            "thresholds": thresholds,
+            "rejected": rejected,
+            "rejected_pct": rejected / n_trials * 100 if n_trials else np.zeros(len(thresholds)),
+            "letters": letters,
+            "letter_trials": letter_trials.astype(np.int64),
+            "letter_acceptance": (~rejected_trials).astype(np.float64) @ letter_onehot / letter_trials,
+            "ch_names": list(self._ch_names),
+            "channel_offenders": channel_offenders,
+            "channel_ranking": np.argsort(-channel_offenders, axis=1, kind="stable"),
+        }
+
+    def threshold_sweep_df(self, thresholds: ArrayLike, top_channels: int = 3) -> pd.DataFrame:
+        """
+        Tabla de threshold_sweep(): una fila por umbral con los trials
+        rechazados, la letra con menor aceptación y los `top_channels`
+        canales más responsables de rechazo (con su cantidad de trials).
+        """
+        sweep = self.threshold_sweep(thresholds)
+        rows = []
+        for idx, threshold in enumerate(sweep["thresholds"]):
+            offenders = [
+                f"{sweep['ch_names'][ch]} ({sweep['channel_offenders'][idx, ch]})"
+                for ch in sweep["channel_ranking"][idx, :top_channels]
+                if sweep["channel_offenders"][idx, ch] > 0
+            ]
+            worst_letter = None
+            if sweep["letters"]:
+                letter_idx = int(np.argmin(sweep["letter_acceptance"][idx]))
+                worst_letter = (f"{sweep['letters'][letter_idx]} "
+                                f"({sweep['letter_acceptance'][idx, letter_idx] * 100:.0f}% aceptados)")
+            rows.append({
+                "Umbral (µV)": f"{threshold:.0f}",
+                "Trials rechazados": int(sweep["rejected"][idx]),
+                "% rechazados": f"{sweep['rejected_pct'][idx]:.1f}%",
+                "Letra con menor aceptación": worst_letter or "Sin dato",
+                "Canales responsables": ", ".join(offenders),
+            })
+        return pd.DataFrame(rows)
+
+    def plot_threshold_sweep(self, thresholds: ArrayLike, show: bool = False):
+        """
+        Curva de aceptación de threshold_sweep(): % de trials aceptados según
+        el umbral (total y por letra), con reject_threshold marcado. Devuelve
+        (fig, ax), o (None, None) si no hay trials evaluados.
+        """
+        sweep = self.threshold_sweep(thresholds)
+        if not sweep["letters"] or sweep["thresholds"].size == 0:
+            return None, None
+
+        fig, ax = plt.subplots(figsize=(8, 5))
+        for idx, letter in enumerate(sweep["letters"]):
+            ax.plot(sweep["thresholds"], sweep["letter_acceptance"][:, idx] * 100,
+                    linewidth=1, alpha=0.35, label=letter)
+        ax.plot(sweep["thresholds"], 100 - sweep["rejected_pct"], color="black", linewidth=2.5, label="Total")
+        ax.axvline(self.reject_threshold, color="#9d1212", linestyle="--", linewidth=1.5,
+                   label=f"Umbral actual ({self.reject_threshold:.0f} µV)")
+
+        ax.set_xlabel("Umbral pico a pico (µV)")
+        ax.set_ylabel("Trials aceptados (%)")
+        ax.set_ylim(-2, 102)
+        ax.set_title("Aceptación de trials según el umbral de rechazo")
+        ax.legend(fontsize=8, ncol=2, loc="lower right", title="Letra", title_fontsize=9, framealpha=0.8)
+
+        if show:
+            plt.show()
+        return fig, ax
+
     # ── Contexto para ReportGenerator ─────────────────────────────────
 
-    def to_context(self) -> dict[str, Any]:
+    def to_context(
+        self,
+        sweep_thresholds: ArrayLike | None = None,
+        figures_dir: Path | str | None = None,
+        file_prefix: str = "quality",
+    ) -> dict[str, Any]:
         """
         Arma el fragmento de contexto listo para ReportGenerator.set_quality():
         quality_summary, quality_rejected_table, quality_channel_offenders_table.
+
+        Con sweep_thresholds agrega el barrido de umbral
+        (quality_threshold_sweep_table) y, si además se pasa figures_dir, la
+        curva de aceptación guardada como {file_prefix}_threshold_sweep.png
+        (quality_threshold_sweep_plot, con la ruta relativa ../figures/ que
+        usa ReportFigureGenerator).
         """
         context: dict[str, Any] = {"quality_summary": self.summary()}
 
@@ -385,6 +851,25 @@ class ReportTrialsQuality:
                 index=False, classes="dataframe", border=0, escape=False
             )
 
+        if sweep_thresholds is not None:
+            sweep_df = self.threshold_sweep_df(sweep_thresholds)
+            if not sweep_df.empty:
+                context["quality_threshold_sweep_table"] = sweep_df.to_html(
+                    index=False, classes="dataframe", border=0, escape=False
+                )
+
+            fig, _ = self.plot_threshold_sweep(sweep_thresholds) if figures_dir is not None else (None, None)
+            if fig is not None:
+                path = Path(figures_dir) / f"{file_prefix}_threshold_sweep.png"
+                path.parent.mkdir(parents=True, exist_ok=True)
+                fig.savefig(path, dpi=150, bbox_inches="tight")
+                plt.close(fig)
+                context["quality_threshold_sweep_plot"] = {
+                    "title": "Aceptación según el umbral",
+                    "path": f"../figures/{path.name}",
+                    "caption": "Trials aceptados (total y por letra) para cada umbral pico a pico.",
+                }
+
         return context
 
 
@@ -408,8 +893,9 @@ if __name__ == "__main__":
     print(quality.summary())
     print(quality.rejected_trials_df())
     print(quality.channel_offenders_df())
+    print(quality.threshold_sweep_df(np.arange(50, 301, 25)))
 
-    epocas = quality._full_epocas  # un único mne.Epochs con todos los trials
+    epocas = quality.get_epochs()  # un único mne.Epochs con todos los trials
     epocas.plot(scalings=150)
     epocas.plot_image(combine="mean")
     # epocas['a'].average().plot()  # ejemplo: indexado por letra + promedio
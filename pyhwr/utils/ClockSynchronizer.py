@@ -0,0 +1,266 @@
+import numpy as np
+
+#marcador de hardware del g.HIAMP que corresponde al trialStartTime de cada streamer
+DEFAULT_MARKERS = {"Tablet_Markers": "trialTablet", "Laptop_Markers": "trialLaptop"}
+
+#constante para estimar el desvío estándar a partir de la MAD (distribución normal)
+_MAD_TO_STD = 1.4826
+
+def _nearest_pairs(source, target, predicted, tolerance):
+    """
+    Empareja cada tiempo de source con el tiempo de target más cercano a su valor predicho, si está a
+    menos de tolerance. Cada evento de target se usa a lo sumo una vez (se queda el par más cercano).
+    target debe estar ordenado. Retorna (índices de source, índices de target).
+    """
+    if len(source) == 0 or len(target) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    right = np.clip(np.searchsorted(target, predicted), 1, len(target) - 1) if len(target) > 1 \
+        else np.zeros(len(predicted), dtype=np.int64)
+    left = np.maximum(right - 1, 0)
+    nearest = np.where(np.abs(target[left] - predicted) <= np.abs(target[right] - predicted), left, right)
+    distance = np.abs(target[nearest] - predicted)
+
+    source_idx = np.flatnonzero(distance <= tolerance)
+    target_idx = nearest[source_idx]
+    distance = distance[source_idx]
+
+    #si dos eventos de source caen sobre el mismo de target, se queda el más cercano
+    order = np.lexsort((distance, target_idx))
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = target_idx[order][1:] != target_idx[order][:-1]
+    order = np.sort(order[keep])
+    return source_idx[order], target_idx[order]
+
+def _offset_candidates(source, target, tolerance, n_candidates):
+    """
+    Offsets candidatos entre dos series: los centros de las n_candidates ventanas de ancho 2 * tolerance
+    (separadas entre sí) que contienen más diferencias target - source. Con eventos emparejables, el
+    offset verdadero acumula una diferencia por par y los demás quedan dispersos.
+    """
+    differences = np.sort((target[None, :] - source[:, None]).ravel())
+    if len(differences) == 0:
+        return []
+
+    counts = np.searchsorted(differences, differences + 2 * tolerance, side="right") - np.arange(len(differences))
+    starts = []
+    for start in np.argsort(-counts, kind="stable"):
+        if all(abs(differences[start] - differences[other]) > 2 * tolerance for other in starts):
+            starts.append(start)
+            if len(starts) == n_candidates:
+                break
+    return [float(np.median(differences[start:start + counts[start]])) for start in starts]
+
+class ClockSynchronizer():
+    """
+    Transformación lineal (offset + deriva) entre dos relojes, ajustada por regresión robusta sobre
+    eventos emparejados. El caso típico es llevar los tiempos de la tablet o la laptop (trialStartTime,
+    trialRestTime, ... de LSL) al reloj del g.HIAMP, usando como pares los triggers de hardware
+    trialTablet/trialLaptop que el g.HIAMP registra al inicio de cada trial.
+
+        target = intercept + slope * (source - source_ref)
+
+    El ajuste descarta iterativamente los pares cuyo residuo supera threshold desvíos robustos (MAD), de
+    modo que un trigger perdido o duplicado no sesga la recta. Los residuos de los pares que quedan
+    (jitter) indican la precisión de la sincronización.
+
+    Uso:
+        sync = ClockSynchronizer.from_managers(ghiamp_manager, lsl_manager, "Tablet_Markers")
+        rest_gtec = sync.transform(lsl_manager.trials_tables["Tablet_Markers"].numeric("trialRestTime") / 1000)
+        print(sync.summary())
+    """
+
+    def __init__(self, slope=1.0, intercept=0.0, source_ref=0.0, residuals=None, inliers=None, pairs=None):
+        """
+        Parámetros
+        ----------
+        slope: float. Pendiente (1 + deriva) de la transformación.
+        intercept: float. Tiempo de target que corresponde a source_ref.
+        source_ref: float. Tiempo de referencia de source (se resta antes de aplicar la pendiente para no
+            perder precisión con timestamps absolutos grandes).
+        residuals: np.ndarray | None. Residuos (target - transformado) de cada par usado en el ajuste.
+        inliers: np.ndarray | None. Máscara booleana de los pares que quedaron en el ajuste.
+        pairs: tuple(np.ndarray, np.ndarray) | None. Índices (source, target) de cada par.
+        """
+        self.slope = float(slope)
+        self.intercept = float(intercept)
+        self.source_ref = float(source_ref)
+        self.residuals = np.empty(0) if residuals is None else np.asarray(residuals, dtype=np.float64)
+        self.inliers = np.ones(len(self.residuals), dtype=bool) if inliers is None else np.asarray(inliers, dtype=bool)
+        self.pairs = pairs
+
+    @classmethod
+    def from_offset(cls, offset):
+        """Sincronizador sin deriva: target = source + offset."""
+        return cls(slope=1.0, intercept=offset, source_ref=0.0)
+
+    @classmethod
+    def fit(cls, source, target, pairing="nearest", tolerance=0.1, threshold=3.0, max_iter=20, min_fraction=0.5):
+        """
+        Ajusta offset y deriva entre dos series de eventos.
+
+        Parámetros
+        ----------
+        source: array-like. Tiempos de los eventos en el reloj de origen (segundos).
+        target: array-like. Tiempos de los mismos eventos en el reloj de destino (segundos).
+        pairing: str. "nearest" empareja cada evento con el más cercano en target (tolera eventos
+            perdidos o extra en cualquiera de las dos series); "index" empareja por posición, recortando
+            ambas series al largo de la más corta.
+        tolerance: float. Con pairing="nearest", distancia máxima (s) entre un evento y su par.
+        threshold: float. Residuo máximo, en desvíos robustos, para que un par quede en el ajuste.
+        max_iter: int. Iteraciones máximas del ajuste robusto.
+        min_fraction: float. Fracción mínima de eventos de la serie más corta que deben quedar emparejados
+            y como inliers del ajuste. Por debajo se considera que el emparejamiento no es confiable.
+
+        Lanza ValueError si quedan menos de dos pares o menos de min_fraction de los eventos.
+        """
+        source = np.asarray(source, dtype=np.float64).reshape(-1)
+        target = np.asarray(target, dtype=np.float64).reshape(-1)
+
+        if pairing == "index":
+            n_pairs = min(len(source), len(target))
+            valid = ~np.isnan(source[:n_pairs]) & ~np.isnan(target[:n_pairs])
+            source_idx = target_idx = np.flatnonzero(valid)
+        elif pairing == "nearest":
+            source_idx, target_idx = cls._pair_nearest(source, target, tolerance)
+        else:
+            raise ValueError("pairing debe ser 'nearest' o 'index'.")
+
+        if len(source_idx) < 2:
+            raise ValueError("Se necesitan al menos dos eventos emparejados para sincronizar los relojes.")
+
+        x = source[source_idx]
+        y = target[target_idx]
+        source_ref = float(np.median(x))
+        x_centered = x - source_ref
+
+        inliers = np.ones(len(x), dtype=bool)
+        for _ in range(max_iter):
+            slope, intercept = np.polyfit(x_centered[inliers], y[inliers], 1)
+            residuals = y - (intercept + slope * x_centered)
+            scale = _MAD_TO_STD * np.median(np.abs(residuals[inliers] - np.median(residuals[inliers])))
+            #piso de escala: con residuos casi nulos no se descartan pares por diferencias de redondeo
+            new_inliers = np.abs(residuals) <= threshold * max(scale, 1e-6)
+            if new_inliers.sum() < 2 or np.array_equal(new_inliers, inliers):
+                break
+            inliers = new_inliers
+
+        #un emparejamiento que deja afuera la mayoría de los eventos es casi seguro un offset equivocado
+        n_events = min(np.count_nonzero(~np.isnan(source)), np.count_nonzero(~np.isnan(target)))
+        if inliers.sum() < max(2, min_fraction * n_events):
+            raise ValueError(f"Sólo {inliers.sum()} de {n_events} eventos quedaron emparejados en el ajuste; "
+                             "no se puede sincronizar los relojes de forma confiable.")
+
+        return cls(slope, intercept, source_ref, residuals, inliers, (source_idx, target_idx))
+
+    @staticmethod
+    def _pair_nearest(source, target, tolerance, n_candidates=5):
+        """
+        Empareja eventos cuando los relojes tienen un offset desconocido (p. ej. milisegundos Unix contra
+        segundos desde el inicio del registro). Los offsets candidatos son las modas del histograma de todas
+        las diferencias target - source (ventanas de ancho 2 * tolerance con más diferencias), de modo que
+        el offset correcto aparece aunque falten los primeros eventos de cualquiera de las dos series. Se
+        queda el candidato que más pares logra y luego se re-empareja con la recta ajustada, para seguir la
+        deriva en rondas largas.
+        """
+        source_valid = np.flatnonzero(~np.isnan(source))
+        target_order = np.argsort(target, kind="stable")
+        target_order = target_order[~np.isnan(target[target_order])]
+        sorted_target = target[target_order]
+        x = source[source_valid]
+
+        best = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64))
+        for offset in _offset_candidates(x, sorted_target, tolerance, n_candidates):
+            pairs = _nearest_pairs(x, sorted_target, x + offset, tolerance)
+            if len(pairs[0]) > len(best[0]):
+                best = pairs
+
+        #re-emparejado con offset + deriva
+        for _ in range(2):
+            if len(best[0]) < 2:
+                break
+            slope, intercept = np.polyfit(x[best[0]] - x[best[0]].mean(), sorted_target[best[1]], 1)
+            best = _nearest_pairs(x, sorted_target, intercept + slope * (x - x[best[0]].mean()), tolerance)
+
+        return source_valid[best[0]], target_order[best[1]]
+
+    @classmethod
+    def from_managers(cls, gmanager, lsl_manager, streamer="Tablet_Markers", marker=None, **kwargs):
+        """
+        Ajusta el reloj de un streamer de LSL (segundos, a partir de trialStartTime en ms) al reloj del
+        g.HIAMP (markers_info, en segundos), usando el marcador de hardware de ese streamer.
+
+        Parámetros
+        ----------
+        gmanager: GHiampDataManager. Con normalize_time=True y los marcadores ya nombrados (changeMarkersNames).
+        lsl_manager: LSLDataManager.
+        streamer: str. "Tablet_Markers" o "Laptop_Markers".
+        marker: str | None. Marcador del g.HIAMP a usar. None usa DEFAULT_MARKERS[streamer].
+        kwargs: argumentos de fit() (pairing, tolerance, threshold).
+        """
+        if not gmanager.normalize_time:
+            raise ValueError("El GHiampDataManager debe tener normalize_time=True (marcadores en segundos).")
+
+        marker = marker if marker is not None else DEFAULT_MARKERS.get(streamer)
+        if marker not in gmanager.markers_info:
+            raise ValueError(f"No existe el marcador '{marker}' en el g.HIAMP. ¿Se llamó a changeMarkersNames?")
+
+        table = lsl_manager._get_table(streamer)
+        start_times = table.numeric("trialStartTime") if table is not None else None
+        if start_times is None:
+            raise ValueError(f"El streamer '{streamer}' no tiene trialStartTime.")
+
+        return cls.fit(start_times / 1000, gmanager.markers_info[marker], **kwargs)
+
+    def transform(self, times):
+        """Lleva tiempos (escalar o array, en segundos) del reloj de origen al de destino."""
+        return self.intercept + self.slope * (np.asarray(times, dtype=np.float64) - self.source_ref)
+
+    def inverse(self, times):
+        """Lleva tiempos (escalar o array, en segundos) del reloj de destino al de origen."""
+        return (np.asarray(times, dtype=np.float64) - self.intercept) / self.slope + self.source_ref
+
+    @property
+    def offset(self):
+        """Diferencia target - source en source_ref (s)."""
+        return self.intercept - self.source_ref
+
+    @property
+    def drift_ppm(self):
+        """Deriva del reloj de destino respecto del de origen, en partes por millón."""
+        return (self.slope - 1.0) * 1e6
+
+    @property
+    def n_pairs(self):
+        return len(self.residuals)
+
+    @property
+    def n_inliers(self):
+        return int(self.inliers.sum())
+
+    @property
+    def jitter(self):
+        """Desvío estándar (s) de los residuos de los pares usados en el ajuste."""
+        residuals = self.residuals[self.inliers]
+        return float(np.std(residuals)) if len(residuals) else None
+
+    @property
+    def max_residual(self):
+        """Residuo absoluto máximo (s) entre los pares usados en el ajuste."""
+        residuals = self.residuals[self.inliers]
+        return float(np.max(np.abs(residuals))) if len(residuals) else None
+
+    def summary(self):
+        """Resumen del ajuste: pares, offset, deriva y jitter (en ms)."""
+        return {
+            "pairs": self.n_pairs,
+            "inliers": self.n_inliers,
+            "offset_s": self.offset,
+            "drift_ppm": round(self.drift_ppm, 3),
+            "jitter_ms": round(self.jitter * 1000, 3) if self.jitter is not None else None,
+            "max_residual_ms": round(self.max_residual * 1000, 3) if self.max_residual is not None else None,
+        }
+
+    def __repr__(self):
+        return (f"ClockSynchronizer(offset={self.offset:.6f} s, drift={self.drift_ppm:.2f} ppm, "
+                f"pares={self.n_inliers}/{self.n_pairs})")
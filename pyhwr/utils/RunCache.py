@@ -0,0 +1,323 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+#versión del formato de las entradas; cambiarla invalida todas las entradas existentes
+CACHE_VERSION = 1
+
+_META_KEY = "__meta__"
+
+def default_cache_dir():
+    """
+    Carpeta por defecto del cache: la variable de entorno PYHWR_CACHE_DIR si está definida,
+    o ~/.cache/pyhwr en otro caso.
+    """
+    return Path(os.environ.get("PYHWR_CACHE_DIR", Path.home() / ".cache" / "pyhwr"))
+
+def frame_to_json(df):
+    """Convierte un DataFrame en un diccionario serializable a JSON (columnas, tipos y datos)."""
+    return {
+        "columns": [str(column) for column in df.columns],
+        "dtypes": [str(dtype) for dtype in df.dtypes],
+        "data": json.loads(df.to_json(orient="values")),
+    }
+
+def frame_from_json(payload):
+    """Inversa de frame_to_json(). Admite columnas con nombre repetido."""
+    df = pd.DataFrame(payload["data"], columns=range(len(payload["columns"])), dtype=object)
+    try:
+        df = df.astype(dict(enumerate(payload["dtypes"])))
+    except (TypeError, ValueError):
+        logging.debug("No se pudieron restaurar los tipos de las columnas; se dejan como object.")
+    df.columns = payload["columns"]
+    return df
+
+class RunCache():
+    """
+    Cache en disco de los registros ya parseados (marcadores, trazos, información de canales, eventos).
+
+    Cada entrada es un archivo .npz (sin pickle) con los arrays del registro y un diccionario de
+    metadatos en JSON. La clave de cada entrada se arma con la ruta absoluta, el tamaño y la fecha de
+    modificación del archivo original (o con un hash de su contenido si use_hash=True), de modo que si
+    el archivo cambia la entrada vieja deja de usarse.
+
+    Además se pueden guardar arrays grandes (p. ej. la señal EEG filtrada, ver ReportTrialsQuality) como
+    entradas .npy, que se leen como memmap de sólo lectura sin cargarlas en memoria (save_array/load_array).
+
+    El tamaño total del cache se limita a max_bytes: al guardar una entrada se eliminan las usadas hace
+    más tiempo (LRU), nunca la recién guardada. Una entrada que por sí sola supera max_bytes no se guarda
+    (se registra un warning) y el resto del cache queda intacto. Cada lectura actualiza la fecha de
+    modificación de la entrada, que es lo que se usa para ordenar.
+
+    Uso:
+        cache = RunCache()
+        lsl_manager = LSLDataManager(filename, cache=cache)
+        ghiamp_manager = GHiampDataManager(filename, cache=cache)
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=2 * 1024**3, use_hash=False):
+        """
+        Parámetros
+        ----------
+        cache_dir: str | Path | None. Carpeta donde se guardan las entradas. None usa default_cache_dir().
+        max_bytes: int. Tamaño máximo del cache en bytes. None para no limitar.
+        use_hash: bool. Si es True la clave usa un hash SHA-1 del contenido del archivo en lugar de
+            tamaño y fecha de modificación (más lento, pero robusto a copias que cambian la fecha).
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.use_hash = use_hash
+
+    def _file_signature(self, filename):
+        stat = os.stat(filename)
+        if not self.use_hash:
+            return f"{os.path.abspath(filename)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+        digest = hashlib.sha1()
+        with open(filename, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        return f"{stat.st_size}|{digest.hexdigest()}"
+
+    def key(self, filename, kind):
+        """
+        Retorna la clave de la entrada para un archivo y un tipo de contenido (p. ej. "lsl" o "ghiamp").
+        """
+        signature = f"{CACHE_VERSION}|{kind}|{self._file_signature(filename)}"
+        return hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, filename, kind):
+        return self.cache_dir / f"{self.key(filename, kind)}.npz"
+
+    def _array_path(self, filename, kind):
+        return self.cache_dir / f"{self.key(filename, kind)}.npy"
+
+    def load(self, filename, kind):
+        """
+        Busca la entrada de un archivo.
+
+        Retorna
+        -------
+        tuple(dict[str, np.ndarray], dict) | None
+            (arrays, metadatos) si la entrada existe, None si no existe o no se pudo leer.
+        """
+        path = self._entry_path(filename, kind)
+        if not path.exists():
+            return None
+
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files}
+            meta = json.loads(str(arrays.pop(_META_KEY)))
+        except FileNotFoundError:
+            return None #otro proceso la eliminó entre exists() y la lectura
+        except Exception as error:
+            logging.warning(f"Entrada de cache ilegible ({path.name}): {error}. Se descarta.")
+            path.unlink(missing_ok=True)
+            return None
+
+        self._touch(path)
+        return arrays, meta
+
+    def save(self, filename, kind, arrays, meta=None):
+        """
+        Guarda (o reemplaza) la entrada de un archivo y aplica el límite de tamaño del cache.
+
+        Parámetros
+        ----------
+        filename: str | Path. Archivo original (.xdf, .hdf5).
+        kind: str. Tipo de contenido guardado.
+        arrays: dict[str, np.ndarray]. Arrays a guardar (no se admiten arrays de tipo object).
+        meta: dict | None. Metadatos serializables a JSON.
+
+        Retorna
+        -------
+        Path | None
+            Ruta de la entrada, None si supera max_bytes y no se guardó.
+        """
+        path = self._entry_path(filename, kind)
+        payload = dict(arrays)
+        payload[_META_KEY] = np.array(json.dumps(meta or {}))
+
+        #se escribe a un temporal y se renombra, para no dejar entradas a medio escribir
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez(f, **payload)
+        except Exception:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        #el tamaño del .npz sólo se conoce después de escribirlo
+        if not self._fits(Path(tmp_name).stat().st_size, path.name):
+            Path(tmp_name).unlink(missing_ok=True)
+            return None
+        os.replace(tmp_name, path)
+
+        self.evict(keep=path)
+        return path
+
+    def load_array(self, filename, kind, mmap_mode="r"):
+        """
+        Busca la entrada de array (ver save_array()) de un archivo.
+
+        Parámetros
+        ----------
+        filename: str | Path. Archivo original (.xdf, .hdf5).
+        kind: str. Tipo de contenido, el mismo usado en save_array().
+        mmap_mode: str. "r" (sólo lectura) o "c" (copy-on-write: las modificaciones quedan en memoria y
+            no llegan al archivo).
+
+        Retorna
+        -------
+        np.memmap | None
+            El array como memmap (no se carga en memoria), None si la entrada no existe o no se pudo
+            leer.
+        """
+        path = self._array_path(filename, kind)
+        if not path.exists():
+            return None
+
+        try:
+            array = np.load(path, mmap_mode=mmap_mode, allow_pickle=False)
+        except FileNotFoundError:
+            return None #otro proceso la eliminó entre exists() y la lectura
+        except Exception as error:
+            logging.warning(f"Entrada de cache ilegible ({path.name}): {error}. Se descarta.")
+            path.unlink(missing_ok=True)
+            return None
+
+        self._touch(path)
+        return array
+
+    def save_array(self, filename, kind, array):
+        """
+        Guarda (o reemplaza) un array como entrada .npy de un archivo, para leerlo después como memmap
+        con load_array(), y aplica el límite de tamaño del cache.
+
+        Parámetros
+        ----------
+        filename: str | Path. Archivo original (.xdf, .hdf5).
+        kind: str. Tipo de contenido guardado; debe incluir todo lo que determina el array (p. ej. los
+            parámetros de filtrado).
+        array: np.ndarray. Array numérico a guardar (se guarda con su tipo).
+
+        Retorna
+        -------
+        Path | None
+            Ruta de la entrada, None si el array supera max_bytes y no se guardó (no se escribe nada).
+        """
+        path = self._array_path(filename, kind)
+        array = np.asarray(array)
+        if not self._fits(array.nbytes, path.name):
+            return None
+
+        fd, tmp_name = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, array, allow_pickle=False)
+            os.replace(tmp_name, path)
+        except Exception:
+            Path(tmp_name).unlink(missing_ok=True)
+            raise
+
+        self.evict(keep=path)
+        return path
+
+    def _fits(self, nbytes, name):
+        """
+        Retorna False (y registra un warning) si una entrada de nbytes supera por sí sola max_bytes: en
+        ese caso no se guarda, en vez de vaciar el resto del cache para hacerle lugar.
+        """
+        if self.max_bytes is None or nbytes <= self.max_bytes:
+            return True
+        logging.warning(f"La entrada de cache {name} ({nbytes / 2**20:.1f} MiB) supera max_bytes "
+                        f"({self.max_bytes / 2**20:.1f} MiB); no se guarda.")
+        return False
+
+    @staticmethod
+    def _touch(path):
+        """Marca una entrada como usada recientemente, para el orden LRU."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass #otro proceso que comparte el cache la eliminó; lo ya leído sigue siendo válido
+
+    def _stat_entries(self):
+        """
+        Lista (ruta, stat) de las entradas, de la usada hace más tiempo a la más reciente. Cada archivo se
+        consulta una sola vez y se saltean los que otro proceso eliminó mientras tanto.
+        """
+        entries = []
+        for path in [*self.cache_dir.glob("*.npz"), *self.cache_dir.glob("*.npy")]:
+            try:
+                entries.append((path, path.stat()))
+            except FileNotFoundError:
+                continue
+        return sorted(entries, key=lambda entry: entry[1].st_mtime_ns)
+
+    def entries(self):
+        """Lista las entradas del cache, de la usada hace más tiempo a la más reciente."""
+        return [path for path, _ in self._stat_entries()]
+
+    @property
+    def size(self):
+        """Tamaño total del cache en bytes."""
+        return sum(stat.st_size for _, stat in self._stat_entries())
+
+    def evict(self, keep=None):
+        """
+        Elimina las entradas usadas hace más tiempo hasta que el cache no supere max_bytes.
+
+        Parámetros
+        ----------
+        keep: Path | None. Entrada que no se elimina (la recién guardada por save/save_array).
+        """
+        if self.max_bytes is None:
+            return
+
+        entries = self._stat_entries()
+        total = sum(stat.st_size for _, stat in entries)
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            if keep is not None and path == Path(keep):
+                continue
+            if self._remove(path):
+                total -= stat.st_size
+
+    @staticmethod
+    def _remove(path):
+        """
+        Elimina una entrada. En Windows un .npy abierto como memmap no se puede borrar: se deja para
+        una próxima limpieza y retorna False.
+        """
+        try:
+            path.unlink(missing_ok=True)
+        except PermissionError:
+            logging.debug(f"Entrada de cache en uso ({path.name}); no se elimina.")
+            return False
+        return True
+
+    def invalidate(self, filename, kind):
+        """Elimina la entrada (registro parseado y/o array) de un archivo, si existe."""
+        self._remove(self._entry_path(filename, kind))
+        self._remove(self._array_path(filename, kind))
+
+    def clear(self):
+        """Elimina todas las entradas del cache."""
+        for path in self.entries():
+            self._remove(path)
+
+    def __len__(self):
+        return len(self.entries())
+
+    def __repr__(self):
+        return f"RunCache(cache_dir={str(self.cache_dir)!r}, entradas={len(self)}, bytes={self.size})"
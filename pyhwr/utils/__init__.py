@@ -1,4 +1,9 @@
 from .SessionInfo import SessionInfo
 from .hdf5_fixer import fix_hdf5_filenames
+from .xdf_reader import XDFStreamReader, iter_marker_samples
+from .marker_decoder import decode_trial_message, available_backends
+from .RunCache import RunCache
+from .ClockSynchronizer import ClockSynchronizer
 
-__all__ = ["SessionInfo", "fix_hdf5_filenames"]
+__all__ = ["SessionInfo", "fix_hdf5_filenames", "XDFStreamReader", "iter_marker_samples",
+           "decode_trial_message", "available_backends", "RunCache", "ClockSynchronizer"]
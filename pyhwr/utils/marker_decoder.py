@@ -0,0 +1,176 @@
+import json
+import logging
+import re
+from itertools import chain
+
+import numpy as np
+
+#Decodificación de los mensajes JSON que envían la tablet y la laptop por LSL (un mensaje por trial).
+#
+#El campo "coordinates" de Tablet_Markers trae miles de ternas [x, y, t] por trial y se entrega como un
+#array float64 de forma (n, 3). Con orjson/msgspec el mensaje completo se decodifica en C y las ternas se
+#vuelcan al array con np.fromiter (sin pasar por np.array sobre listas anidadas). Con json de la librería
+#estándar, que es lento para listas grandes, el texto de las coordenadas se recorta del mensaje y se
+#convierte directamente con np.fromstring; sólo el resto del mensaje pasa por json.loads.
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+#backends disponibles: nombre -> función que recibe str/bytes y retorna el objeto decodificado
+_BACKENDS = {"json": json.loads}
+
+if msgspec is not None:
+    _BACKENDS["msgspec"] = msgspec.json.Decoder().decode
+
+if orjson is not None:
+    _BACKENDS["orjson"] = orjson.loads
+
+_PREFERRED_BACKENDS = ("orjson", "msgspec", "json")
+
+_COORDINATES_KEY = re.compile(r'"coordinates"\s*:\s*\[')
+#caracteres que pueden formar parte de un número (o espacios); al quitarlos queda la estructura de la lista
+_NUMBER_CHARS = str.maketrans("", "", "0123456789.-+eE \t\r\n")
+
+def available_backends():
+    """Retorna los nombres de los backends JSON disponibles, en orden de preferencia."""
+    return [name for name in _PREFERRED_BACKENDS if name in _BACKENDS]
+
+def get_backend(name=None):
+    """
+    Retorna la función de decodificación del backend pedido. Si name es None se usa el más rápido disponible.
+    """
+    if name is None:
+        name = available_backends()[0]
+
+    if name not in _BACKENDS:
+        raise ValueError(f"Backend JSON '{name}' no disponible. Disponibles: {available_backends()}")
+
+    return _BACKENDS[name]
+
+def _normalize_raw(raw):
+    """
+    Limpia el mensaje crudo: decodifica bytes, quita espacios y comillas exteriores agregadas por logging.
+    Retorna None si el mensaje está vacío.
+    """
+    if isinstance(raw, (bytes, bytearray)):
+        raw = raw.decode("utf-8", errors="replace")
+
+    if raw is None or raw == "":
+        return None
+
+    raw = raw.strip()
+    if raw and raw[0] in "\"'" and raw[-1] == raw[0]:
+        raw = raw[1:-1]
+
+    return raw
+
+def _find_coordinates(raw):
+    """
+    Busca la lista de coordenadas dentro del texto del mensaje.
+    Retorna (inicio, fin) del texto de la lista (incluyendo corchetes) o None si no está.
+    """
+    match = _COORDINATES_KEY.search(raw)
+    if match is None:
+        return None
+
+    start = match.end() - 1
+    if raw.startswith("[]", start):
+        return start, start + 2
+
+    #en una lista de ternas numéricas el primer "]]" cierra la lista
+    end = raw.find("]]", start)
+    if end < 0:
+        return None
+
+    return start, end + 2
+
+def coordinates_to_array(text):
+    """
+    Convierte el texto de una lista JSON de ternas "[[x, y, t], ...]" en un array float64 de forma (n, 3).
+    Lanza ValueError si el texto no es una lista de ternas numéricas.
+    """
+    structure = text.translate(_NUMBER_CHARS)
+    n_points = structure.count("[") - 1
+    if structure != "[" + ",".join(["[,,]"] * n_points) + "]":
+        raise ValueError("Las coordenadas no son ternas (x, y, t).")
+
+    if n_points == 0:
+        return np.empty((0, 3), dtype=np.float64)
+
+    values = text.replace("[", " ").replace("]", " ")
+    return np.fromstring(values, dtype=np.float64, sep=",").reshape(-1, 3)
+
+def coordinates_from_list(coordinates):
+    """
+    Convierte una lista (ya decodificada) de ternas [x, y, t] en un array float64 de forma (n, 3).
+    Lanza ValueError o TypeError si la lista no es de ternas numéricas (incluye valores null).
+    """
+    if any(len(point) != 3 for point in coordinates):
+        raise ValueError("Las coordenadas no son ternas (x, y, t).")
+
+    array = np.fromiter(chain.from_iterable(coordinates), dtype=np.float64, count=3 * len(coordinates))
+    #np.fromiter convierte null en NaN; sólo en ese caso (poco frecuente) se revisan los valores
+    if np.isnan(array).any() and any(value is None for value in chain.from_iterable(coordinates)):
+        raise TypeError("Las coordenadas tienen valores null.")
+    return array.reshape(-1, 3)
+
+def _decode_with_array(raw, loads):
+    """Decodifica el mensaje completo con el backend y convierte "coordinates" a array."""
+    message = loads(raw)
+    if isinstance(message, dict) and isinstance(message.get("coordinates"), list):
+        try:
+            message["coordinates"] = coordinates_from_list(message["coordinates"])
+        except (TypeError, ValueError):
+            logging.debug("Coordenadas con formato inesperado; se mantienen como lista.")
+    return message
+
+def decode_trial_message(raw, backend=None, coordinates_as_array=True):
+    """
+    Decodifica el mensaje JSON de un trial.
+
+    Parámetros
+    ----------
+    raw: str | bytes. Mensaje tal como se leyó del stream.
+    backend: str | None. Backend JSON a usar ("orjson", "msgspec" o "json"). None usa el más rápido disponible.
+    coordinates_as_array: bool. Si es True, "coordinates" se entrega como np.ndarray float64 de forma (n, 3).
+        Si es False se entrega como lo decodifica el backend (listas de listas).
+
+    Retorna
+    -------
+    dict con la información del trial, o [] si el mensaje está vacío.
+    """
+    if backend is None:
+        backend = available_backends()[0]
+    loads = get_backend(backend)
+    raw = _normalize_raw(raw)
+
+    if raw is None:
+        return []
+
+    if not coordinates_as_array:
+        return loads(raw)
+
+    if backend != "json":
+        return _decode_with_array(raw, loads)
+
+    span = _find_coordinates(raw)
+    if span is None:
+        return _decode_with_array(raw, loads)
+
+    start, end = span
+    try:
+        #se decodifica el resto del mensaje con la lista de coordenadas vacía
+        message = loads(raw[:start] + "[]" + raw[end:])
+        message["coordinates"] = coordinates_to_array(raw[start:end])
+    except (TypeError, ValueError):
+        #p. ej. valores null o ternas incompletas: se decodifica el mensaje completo
+        return _decode_with_array(raw, loads)
+
+    return message
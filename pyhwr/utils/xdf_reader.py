@@ -0,0 +1,240 @@
+import gzip
+import logging
+import struct
+from collections import defaultdict
+from pathlib import Path
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+#Tags de los chunks del formato XDF (https://github.com/sccn/xdf/wiki/Specifications)
+_TAG_FILE_HEADER = 1
+_TAG_STREAM_HEADER = 2
+_TAG_SAMPLES = 3
+_TAG_CLOCK_OFFSET = 4
+_TAG_STREAM_FOOTER = 6
+
+_VARLEN_FORMATS = {1: "<B", 4: "<I", 8: "<Q"}
+
+
+def _xml2dict(element):
+    """
+    Convierte un elemento XML sin atributos en un diccionario con la misma forma que usa pyxdf
+    (cada valor es una lista), para que data["info"]["name"][0] siga funcionando.
+    """
+    children = defaultdict(list)
+    for child in map(_xml2dict, list(element)):
+        for key, value in child.items():
+            children[key].append(value)
+    return {element.tag: children or element.text}
+
+
+def _read_varlen_int(f):
+    """Lee un entero de largo variable desde el archivo. Lanza EOFError al final del archivo."""
+    nbytes = f.read(1)
+    if not nbytes:
+        raise EOFError()
+    fmt = _VARLEN_FORMATS.get(nbytes[0])
+    if fmt is None:
+        raise RuntimeError("Entero de largo variable inválido en el archivo XDF.")
+    return struct.unpack(fmt, f.read(nbytes[0]))[0]
+
+
+def _unpack_varlen_int(buffer, offset):
+    """Igual que _read_varlen_int pero sobre un buffer en memoria. Retorna (valor, nuevo_offset)."""
+    nbytes = buffer[offset]
+    fmt = _VARLEN_FORMATS.get(nbytes)
+    if fmt is None:
+        raise RuntimeError("Entero de largo variable inválido en el archivo XDF.")
+    return struct.unpack_from(fmt, buffer, offset + 1)[0], offset + 1 + nbytes
+
+
+def open_xdf(filename):
+    """
+    Abre un archivo .xdf (o .xdfz / .xdf.gz) en modo binario y verifica los bytes mágicos.
+    """
+    filename = Path(filename)
+    if filename.suffix == ".xdfz" or filename.suffixes[-2:] == [".xdf", ".gz"]:
+        f = gzip.open(filename, "rb")
+    else:
+        f = open(filename, "rb")
+
+    if f.read(4) != b"XDF:":
+        f.close()
+        raise IOError(f"El archivo {filename} no es un XDF válido.")
+    return f
+
+
+class XDFStreamReader():
+    """
+    Lector secuencial de archivos XDF que decodifica sólo los streams pedidos.
+
+    A diferencia de pyxdf.load_xdf, que decodifica todos los streams y todos los chunks, este lector
+    descarta (sin decodificar) los chunks de los streams no seleccionados, p. ej. el stream de EEG, y
+    entrega las muestras de los streams de marcadores a medida que las lee del archivo. El costo de abrir
+    un registro queda así proporcional a los datos de marcadores y no al tamaño del archivo.
+
+    Sólo se decodifican streams de formato "string" (marcadores). Los timestamps se entregan tal como
+    están en el archivo (reloj LSL de cada stream), sin sincronización ni dejitter; los clock offsets
+    quedan disponibles en streams[...]["clock_times"] / ["clock_values"].
+    """
+
+    def __init__(self, filename, select_streams=None):
+        """
+        Parámetros
+        ----------
+        filename: str | Path. Ruta al archivo .xdf.
+        select_streams: list[str] | None. Nombres de los streams a decodificar. Si es None se decodifican
+            todos los streams de formato string.
+        """
+        self.filename = filename
+        self.select_streams = None if select_streams is None else set(select_streams)
+        self.header = None
+        self.streams = {} #stream_id -> diccionario con info/footer/time_series/time_stamps
+
+    def _is_selected(self, info):
+        name = info["name"][0]
+        channel_format = info.get("channel_format", ["string"])[0]
+
+        if self.select_streams is not None and name not in self.select_streams:
+            return False
+
+        if channel_format != "string":
+            if self.select_streams is not None:
+                logging.warning(f"El stream '{name}' no es de tipo string y no se decodificará.")
+            return False
+
+        return True
+
+    def _parse_samples(self, content, stream):
+        """
+        Decodifica el contenido (sin el StreamId) de un chunk de muestras string ya leído en memoria.
+        Retorna listas de timestamps y valores.
+        """
+        n_samples, offset = _unpack_varlen_int(content, 0)
+        n_channels = stream["n_channels"]
+
+        stamps = []
+        values = []
+        for _ in range(n_samples):
+            if content[offset] != 0:
+                stream["last_timestamp"] = struct.unpack_from("<d", content, offset + 1)[0]
+                offset += 9
+            else:
+                stream["last_timestamp"] += stream["tdiff"]
+                offset += 1
+
+            sample = []
+            for _ in range(n_channels):
+                length, offset = _unpack_varlen_int(content, offset)
+                sample.append(bytes(content[offset:offset + length]).decode("utf-8", errors="replace"))
+                offset += length
+
+            stamps.append(stream["last_timestamp"])
+            values.append(sample)
+
+        return stamps, values
+
+    def iter_samples(self):
+        """
+        Recorre el archivo una vez y entrega las muestras de los streams seleccionados a medida que
+        se leen, como tuplas (nombre_stream, timestamp, valores) donde valores es la lista de strings
+        de la muestra (un elemento por canal).
+
+        Al terminar el recorrido, self.header y self.streams quedan completos (encabezados, footers y
+        clock offsets de los streams seleccionados).
+        """
+        selected = {}
+        skipped = set()
+
+        with open_xdf(self.filename) as f:
+            while True:
+                try:
+                    chunk_length = _read_varlen_int(f)
+                except EOFError:
+                    break
+
+                tag = struct.unpack("<H", f.read(2))[0]
+
+                if tag == _TAG_FILE_HEADER:
+                    self.header = _xml2dict(ET.fromstring(f.read(chunk_length - 2)))
+                    continue
+
+                if tag not in (_TAG_STREAM_HEADER, _TAG_SAMPLES, _TAG_CLOCK_OFFSET, _TAG_STREAM_FOOTER):
+                    f.seek(chunk_length - 2, 1) #boundary u otros chunks sin interés
+                    continue
+
+                stream_id = struct.unpack("<I", f.read(4))[0]
+
+                if tag == _TAG_STREAM_HEADER:
+                    info = _xml2dict(ET.fromstring(f.read(chunk_length - 6).decode("utf-8", "replace")))
+                    if not self._is_selected(info["info"]):
+                        skipped.add(stream_id)
+                        continue
+                    srate = float(info["info"].get("nominal_srate", ["0"])[0] or 0)
+                    selected[stream_id] = {
+                        "n_channels": int(info["info"].get("channel_count", ["1"])[0]),
+                        "tdiff": 1.0 / srate if srate > 0 else 0.0,
+                        "last_timestamp": 0.0,
+                    }
+                    self.streams[stream_id] = {
+                        "info": info["info"],
+                        "footer": None,
+                        "time_series": [],
+                        "time_stamps": [],
+                        "clock_times": [],
+                        "clock_values": [],
+                    }
+                    continue
+
+                if stream_id not in selected:
+                    #chunk de un stream no seleccionado (o sin encabezado): se salta sin decodificar
+                    f.seek(chunk_length - 6, 1)
+                    continue
+
+                stream = self.streams[stream_id]
+                if tag == _TAG_SAMPLES:
+                    content = memoryview(f.read(chunk_length - 6))
+                    stamps, values = self._parse_samples(content, selected[stream_id])
+                    name = stream["info"]["name"][0]
+                    stream["time_stamps"].extend(stamps)
+                    stream["time_series"].extend(values)
+                    for stamp, value in zip(stamps, values):
+                        yield name, stamp, value
+                elif tag == _TAG_CLOCK_OFFSET:
+                    clock_time, clock_value = struct.unpack("<dd", f.read(16))
+                    stream["clock_times"].append(clock_time)
+                    stream["clock_values"].append(clock_value)
+                else:
+                    footer = f.read(chunk_length - 6)
+                    try:
+                        stream["footer"] = _xml2dict(ET.fromstring(footer))
+                    except ET.ParseError:
+                        logging.warning(f"Footer corrupto en el stream '{stream['info']['name'][0]}' de {self.filename}.")
+
+        if skipped:
+            logging.debug(f"Streams descartados sin decodificar en {self.filename}: {sorted(skipped)}")
+
+    def read(self):
+        """
+        Lee el archivo completo y retorna (streams, header) con la misma forma que pyxdf.load_xdf:
+        streams es una lista (en orden de aparición) de diccionarios con "info", "footer",
+        "time_series" (lista de muestras) y "time_stamps" (np.ndarray).
+        """
+        for _ in self.iter_samples():
+            pass
+
+        streams = []
+        for stream in self.streams.values():
+            stream["time_stamps"] = np.asarray(stream["time_stamps"], dtype=np.float64)
+            streams.append(stream)
+
+        return streams, self.header
+
+
+def iter_marker_samples(filename, select_streams=None):
+    """
+    Generador sobre las muestras de los streams de marcadores de un archivo .xdf.
+    Atajo de XDFStreamReader(filename, select_streams).iter_samples().
+    """
+    return XDFStreamReader(filename, select_streams).iter_samples()
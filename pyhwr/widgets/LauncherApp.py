@@ -1,5 +1,5 @@
 from PyQt5 import uic
-from PyQt5.QtWidgets import QApplication, QMainWindow
+from PyQt5.QtWidgets import QApplication, QMainWindow, QLabel
 from PyQt5.QtCore import pyqtSignal, Qt
 import sys
 import os
@@ -11,6 +11,8 @@ class LauncherApp(QMainWindow):
     stop_session_signal = pyqtSignal()
     quit_session_signal = pyqtSignal()
     back_to_config_signal = pyqtSignal()
+    ##estado de calidad de canales (updates de ChannelsQualityMonitor); se puede emitir desde otro hilo
+    channels_quality_signal = pyqtSignal(object)
 
     def __init__(self):
         super().__init__()
@@ -76,6 +78,14 @@ class LauncherApp(QMainWindow):
             self.lslstreamers_cbox,
         ]
 
+        ##calidad de canales en vivo, oculta hasta recibir el primer update
+        self.channels_quality_label = QLabel(self)
+        self.channels_quality_label.setObjectName("channels_quality_label")
+        self.channels_quality_label.setWordWrap(True)
+        self.channels_quality_label.hide()
+        self.mainLayout.addWidget(self.channels_quality_label)
+        self.channels_quality_signal.connect(self.update_channels_quality)
+
     def update_session_info(self, sub="01", task="basal", n_runs="1",
                             ses="01", run = "01",
                             bids_file="sub-[sub]_ses-[ses]_task-[task]_run-[run]_[suffix]",
@@ -94,6 +104,28 @@ class LauncherApp(QMainWindow):
         self.ses_label.setText(str(ses))
         self.run_label.setText(str(run))
 
+    def update_channels_quality(self, update):
+        """
+        Muestra el estado de los canales EEG de un update de ChannelsQualityMonitor
+        (cantidad de canales por estado y los que no están "Bueno"; la tabla completa
+        en el tooltip). Conectado a channels_quality_signal.
+        """
+        estados = ["Malo", "Problemático", "Revisar", "Bueno"]
+        por_estado = {estado: [] for estado in estados}
+        for name, estado, fraction in zip(update["ch_names"], update["status"], update["bad_fraction"]):
+            por_estado[estado].append((name, fraction))
+
+        resumen = " · ".join(f"{len(por_estado[e])} {e}" for e in estados if por_estado[e])
+        detalle = " | ".join(f"{e}: {', '.join(name for name, _ in por_estado[e])}"
+                             for e in estados[:-1] if por_estado[e])
+        texto = f"Calidad de canales ({update['time']:.0f} s): {resumen}"
+        self.channels_quality_label.setText(f"{texto}\n{detalle}" if detalle else texto)
+        self.channels_quality_label.setToolTip("\n".join(
+            f"{name}: {estado} ({fraction:.0%} ventanas malas)"
+            for name, estado, fraction in zip(update["ch_names"], update["status"], update["bad_fraction"])
+        ))
+        self.channels_quality_label.show()
+
     def check_all(self):
         """
         Marca todos los checkboxes como verificados.
@@ -0,0 +1,76 @@
+import os
+import time
+import numpy as np
+from pyhwr.report.ReportChannelsQuality import (compute_basic_channel_quality, _window_parameters,
+                                                _quality_from_statistics)
+
+## Compara el tiempo de compute_basic_channel_quality (ventanas procesadas por lotes vectorizados, con
+## funciones nan* sólo en las ventanas con NaN) contra el camino anterior: un ciclo de Python por ventana
+## con nanpercentile/nanmedian. Señal sintética con un canal plano y algunos tramos con NaN.
+## Al final, un montaje de 64 canales con los canales repartidos entre hilos/procesos (n_jobs).
+
+sfreq = 1200.0
+n_canales = 32
+duracion_s = 20 * 60
+repeticiones = 3
+
+def camino_anterior(x):
+    starts, window_samples, times = _window_parameters(x.shape[1], sfreq, 2.0, 0.5)
+    stats = {key: np.full((x.shape[0], len(starts)), np.nan)
+             for key in ("rp2p", "p2p", "mad", "median", "flat_fraction", "power")}
+    for w, start in enumerate(starts):
+        segment = x[:, start:start + window_samples]
+        stats["rp2p"][:, w] = np.nanpercentile(segment, 99.0, axis=1) - np.nanpercentile(segment, 1.0, axis=1)
+        stats["p2p"][:, w] = np.nanmax(segment, axis=1) - np.nanmin(segment, axis=1)
+        median = np.nanmedian(segment, axis=1)
+        stats["median"][:, w] = median
+        stats["mad"][:, w] = 1.4826 * np.nanmedian(np.abs(segment - median[:, np.newaxis]), axis=1)
+        differences = np.diff(segment, axis=1)
+        valid = np.isfinite(differences)
+        denominator = np.sum(valid, axis=1)
+        stats["flat_fraction"][:, w] = np.divide(np.sum((differences == 0.0) & valid, axis=1), denominator,
+                                                 out=np.full(x.shape[0], np.nan), where=denominator > 0)
+        stats["power"][:, w] = np.nanmean(segment**2, axis=1, dtype=np.float64)
+    return _quality_from_statistics(stats, times)
+
+def medir(funcion, x):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion(x)
+        tiempos.append(time.perf_counter() - t0)
+    return resultado, np.min(tiempos)
+
+## con executor="process" los workers importan este módulo: todo lo que sigue sólo en el proceso principal
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    senal = rng.standard_normal((n_canales, int(duracion_s * sfreq))) * 10
+    senal[3] = 0.0
+    senal[7, 50000:50500] = np.nan
+    senal[12, 900000:960000] *= 20
+
+    print(f"{n_canales} canales x {duracion_s / 60:.0f} min a {sfreq:.0f} Hz, ventanas de 2 s con 50% de solapamiento")
+    for dtype in (np.float64, np.float32):
+        x = senal.astype(dtype)
+        esperado, tiempo_anterior = medir(camino_anterior, x)
+        resultado, tiempo_nuevo = medir(lambda datos: compute_basic_channel_quality(datos, dtype=dtype), x)
+
+        ## mismo resultado, bit a bit
+        for clave in esperado:
+            assert np.array_equal(esperado[clave], resultado[clave], equal_nan=True), clave
+
+        print(f"{np.dtype(dtype).name}: por ventana {tiempo_anterior:7.2f} s  vectorizado {tiempo_nuevo:6.2f} s  "
+              f"({tiempo_anterior / tiempo_nuevo:.1f}x)")
+
+    ## 64 canales: n_jobs=1 contra todos los núcleos, con hilos y con procesos
+    montaje = np.tile(senal[:, :int(5 * 60 * sfreq)], (2, 1)).astype(np.float32)
+    n_jobs = os.cpu_count() or 1
+    print(f"\n{montaje.shape[0]} canales x 5 min (float32), n_jobs={n_jobs}")
+    esperado, tiempo_serie = medir(lambda datos: compute_basic_channel_quality(datos, dtype=None), montaje)
+    print(f"n_jobs=1: {tiempo_serie:6.2f} s")
+    for executor in ("thread", "process"):
+        resultado, tiempo = medir(lambda datos: compute_basic_channel_quality(datos, dtype=None, n_jobs=n_jobs,
+                                                                             executor=executor), montaje)
+        for clave in esperado:
+            assert np.array_equal(esperado[clave], resultado[clave], equal_nan=True), clave
+        print(f"{executor}: {tiempo:6.2f} s  ({tiempo_serie / tiempo:.1f}x)")
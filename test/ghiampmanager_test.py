@@ -15,9 +15,9 @@ gmanager.changeMarkersNames({1: "inicioSesión", 2: "trialTablet", 3: "penDown",
 markers_info = gmanager.markers_info
 print(markers_info)
 
-trials_tablet = np.array(markers_info["trialTablet"]) if markers_info.get("trialTablet") else None
-trials_laptop = np.array(markers_info["trialLaptop"]) if markers_info.get("trialLaptop") else None
-penDown_markers = np.array(markers_info["penDown"]) if markers_info.get("penDown") else None
+trials_tablet = np.array(markers_info["trialTablet"]) if markers_info.get("trialTablet") is not None else None
+trials_laptop = np.array(markers_info["trialLaptop"]) if markers_info.get("trialLaptop") is not None else None
+penDown_markers = np.array(markers_info["penDown"]) if markers_info.get("penDown") is not None else None
 
 print(len(trials_tablet)) if trials_tablet is not None else print("No hay triggers de tablet")
 print(len(trials_laptop)) if trials_laptop is not None else print("No hay triggers de laptop")
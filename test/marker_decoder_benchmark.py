@@ -0,0 +1,45 @@
+import os
+import time
+import json
+import numpy as np
+from pyhwr.utils import XDFStreamReader
+from pyhwr.utils.marker_decoder import available_backends, decode_trial_message
+
+## Compara la decodificación de los mensajes de Tablet_Markers de un registro:
+## json.loads + conversión de las coordenadas a numpy (camino anterior) contra decode_trial_message
+## con cada backend disponible (coordenadas directo a un array float64 (n, 3)).
+
+path = "D:\\dataset\\DataBase\\sub-06\\ses-01"
+lsl_filename = "sub-06_ses-01_task-ejecutada_run-01_eeg.xdf"
+repeticiones = 20
+
+streams, _ = XDFStreamReader(os.path.join(path, lsl_filename), select_streams=["Tablet_Markers"]).read()
+mensajes = [sample[0] for sample in streams[0]["time_series"]]
+n_puntos = sum(len(json.loads(m).get("coordinates", [])) for m in mensajes if m)
+print(f"{len(mensajes)} mensajes, {n_puntos} coordenadas, backends: {available_backends()}")
+
+def camino_anterior(raw):
+    mensaje = json.loads(raw)
+    mensaje["coordinates"] = np.array(mensaje["coordinates"])
+    return mensaje
+
+def medir(funcion):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        for raw in mensajes:
+            if raw:
+                funcion(raw)
+        tiempos.append(time.perf_counter() - t0)
+    return np.median(tiempos) * 1000
+
+## chequeo de que ambos caminos dan las mismas coordenadas
+for raw in mensajes:
+    if raw:
+        esperado = np.asarray(json.loads(raw)["coordinates"], dtype=np.float64).reshape(-1, 3)
+        assert np.array_equal(decode_trial_message(raw)["coordinates"], esperado)
+
+print(f"json.loads + np.array: {medir(camino_anterior):8.2f} ms")
+print(f"json.loads (listas):   {medir(lambda raw: decode_trial_message(raw, 'json', False)):8.2f} ms")
+for backend in available_backends():
+    print(f"{backend:<8} -> ndarray:  {medir(lambda raw: decode_trial_message(raw, backend)):8.2f} ms")
@@ -11,7 +11,7 @@ gmanager = GHiampDataManager(os.path.join(path, gtec_filename), normalize_time=T
 lsl_manager = LSLDataManager(os.path.join(path, lsl_filename))
 
 ### Gtec
-data = gmanager.raw_data.swapaxes(1,0)
+data = np.asarray(gmanager.raw_data).T #raw_data es un SamplesView perezoso: se lee el registro completo
 # print(data.shape)
 print("Nombre de los marcadores:", gmanager.markers_info.keys())
 print("Tiempos de los marcadores:", gmanager.markers_info.values())
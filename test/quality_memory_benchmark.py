@@ -0,0 +1,66 @@
+import os
+import time
+import tracemalloc
+import numpy as np
+from pyhwr.managers import GHiampDataManager, LSLDataManager
+from pyhwr.report.ReportTrialsQuality import ReportTrialsQuality
+from pyhwr.report.ReportChannelsQuality import ReportChannelsQuality
+
+## Compara la memoria pico (tracemalloc registra las reservas de numpy) y el tiempo de la evaluación de
+## calidad de una ronda completa: filtrado EEG + épocas + rechazo por trial + calidad de canales.
+## float64: camino anterior, vía get_eeg_raw() (mne.io.RawArray, siempre float64).
+## float32: señal filtrada en float32 (get_eeg_data()) y métricas en float32 vía from_array().
+## por bloques: calidad de canales filtrando y leyendo del HDF5 de a bloques (read_eeg + from_reader),
+## sin armar la señal completa; la memoria no depende del largo del registro.
+
+path = "D:\\dataset\\DataBase\\sub-06\\ses-01"
+file_stem = "sub-06_ses-01_task-ejecutada_run-01_eeg"
+
+gmanager = GHiampDataManager(os.path.join(path, f"{file_stem}.hdf5"), normalize_time=True, preload=True)
+gmanager_lazy = GHiampDataManager(os.path.join(path, f"{file_stem}.hdf5"), normalize_time=True)
+lsl_manager = LSLDataManager(os.path.join(path, f"{file_stem}.xdf"))
+print(f"{gmanager.raw_data.shape[0]} muestras x {gmanager.raw_data.shape[1]} canales "
+      f"({gmanager.raw_data.dtype}, {gmanager.raw_data.nbytes / 2**20:.1f} MiB)")
+
+def evaluar_float64():
+    quality = ReportTrialsQuality(gmanager, lsl_manager)
+    quality.evaluate()
+    channels = ReportChannelsQuality(quality.get_eeg_raw())
+    return quality, channels.evaluate()
+
+def evaluar_float32():
+    quality = ReportTrialsQuality(gmanager, lsl_manager, dtype=np.float32)
+    quality.evaluate()
+    eeg_data, ch_names = quality.get_eeg_data()
+    channels = ReportChannelsQuality.from_array(eeg_data, gmanager.sample_rate, ch_names)
+    return quality, channels.evaluate()
+
+def evaluar_por_bloques():
+    quality = ReportTrialsQuality(gmanager_lazy, lsl_manager, dtype=np.float32)
+    channels = ReportChannelsQuality.from_reader(quality.read_eeg, quality.n_samples, gmanager_lazy.sample_rate,
+                                                 quality.eeg_ch_names(), chunk_windows=128)
+    return channels.evaluate()
+
+def medir(funcion):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    resultado = funcion()
+    tiempo = time.perf_counter() - t0
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, pico / 2**20, tiempo
+
+(quality64, channels64), pico64, tiempo64 = medir(evaluar_float64)
+(quality32, channels32), pico32, tiempo32 = medir(evaluar_float32)
+channels_bloques, pico_bloques, tiempo_bloques = medir(evaluar_por_bloques)
+
+## mismos trials rechazados y mismas ventanas malas por canal
+assert quality64.evaluate() == quality32.evaluate()
+print(f"ventanas malas iguales: {np.array_equal(channels64['bad_windows'], channels32['bad_windows'])}, "
+      f"diferencia máx. rP2P: {np.nanmax(np.abs(channels32['rp2p'] - channels64['rp2p'])):.2e} "
+      f"(rP2P máx. {np.nanmax(channels64['rp2p']):.1f})")
+print(f"ventanas malas iguales por bloques: {np.array_equal(channels32['bad_windows'], channels_bloques['bad_windows'])}")
+
+print(f"float64: pico {pico64:8.1f} MiB  {tiempo64:6.2f} s")
+print(f"float32: pico {pico32:8.1f} MiB  {tiempo32:6.2f} s  ({pico32 / pico64:.0%} del pico float64)")
+print(f"bloques: pico {pico_bloques:8.1f} MiB  {tiempo_bloques:6.2f} s  (sólo calidad de canales)")
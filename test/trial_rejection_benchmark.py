@@ -0,0 +1,64 @@
+import time
+import mne
+import numpy as np
+from pyhwr.report.ReportTrialsQuality import segment_peak_to_peak
+
+## Compara el rechazo pico a pico por trial: el camino anterior (mne.EpochsArray + drop_bad sobre los
+## primeros common_duration segundos de cada trial) contra segment_peak_to_peak, que recorre la ventana
+## propia completa de cada trial (largos distintos) con una única llamada a reduceat sobre la señal.
+## Señal sintética con artefactos en la segunda mitad de algunos trials: sólo los ve la ventana completa.
+
+mne.set_log_level("ERROR")
+
+sfreq = 1200.0
+n_canales = 32
+duracion_s = 20 * 60
+n_trials = 140
+umbral = 150.0
+repeticiones = 3
+
+rng = np.random.default_rng(0)
+senal = (rng.standard_normal((n_canales, int(duracion_s * sfreq))) * 10).astype(np.float32)
+ch_names = [f"EEG{ch + 1:02d}" for ch in range(n_canales)]
+
+starts = ((np.arange(n_trials) * 8.0 + 1.0) * sfreq).astype(np.int64)  # un trial cada 8 s
+stops = starts + (rng.uniform(3.0, 7.5, n_trials) * sfreq).astype(np.int64)
+common_duration = 3.0
+n_times = int(round(common_duration * sfreq)) + 1
+
+for trial in rng.choice(n_trials, 20, replace=False):
+    senal[rng.integers(n_canales), stops[trial] - 500:stops[trial] - 400] += 300.0
+
+def camino_anterior():
+    events = np.column_stack([starts, np.zeros(n_trials, dtype=np.int64), np.ones(n_trials, dtype=np.int64)])
+    datos = np.stack([senal[:, start:start + n_times] for start in starts])
+    info = mne.create_info(ch_names=ch_names, sfreq=sfreq, ch_types="eeg")
+    epochs = mne.EpochsArray(datos, info, events=events, tmin=0, baseline=None)
+    return epochs.copy().drop_bad(reject={"eeg": umbral}).drop_log
+
+def por_trial():
+    return np.array([senal[:, start:stop].max(axis=1).astype(np.float64) - senal[:, start:stop].min(axis=1)
+                     for start, stop in zip(starts, stops)])
+
+def medir(funcion):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return resultado, np.min(tiempos)
+
+drop_log, tiempo_mne = medir(camino_anterior)
+esperado, tiempo_ciclo = medir(por_trial)
+resultado, tiempo_reduceat = medir(lambda: segment_peak_to_peak(senal, starts, stops))
+
+## mismo pico a pico que recortando cada ventana por separado
+assert np.array_equal(esperado, resultado, equal_nan=True)
+
+print(f"{n_canales} canales x {duracion_s / 60:.0f} min, {n_trials} trials de "
+      f"{(stops - starts).min() / sfreq:.1f} a {(stops - starts).max() / sfreq:.1f} s (float32)")
+print(f"mne.Epochs + drop_bad ({common_duration:.0f} s):   {tiempo_mne * 1000:7.1f} ms  "
+      f"rechazados: {sum(len(reasons) > 0 for reasons in drop_log)}")
+print(f"ciclo por trial (ventana propia): {tiempo_ciclo * 1000:7.1f} ms")
+print(f"reduceat (ventana propia):        {tiempo_reduceat * 1000:7.1f} ms  "
+      f"rechazados: {int(np.any(resultado > umbral, axis=1).sum())}  ({tiempo_mne / tiempo_reduceat:.1f}x vs MNE)")
@@ -0,0 +1,60 @@
+import os
+import time
+import numpy as np
+import pyxdf
+from pyhwr.utils import XDFStreamReader
+
+## Compara XDFStreamReader (el lector que usa LSLDataManager) contra pyxdf.load_xdf sobre un registro
+## con stream de EEG: los streams de marcadores tienen que salir iguales (time_series, time_stamps,
+## footers con first_timestamp/last_timestamp, clock offsets, encabezados) y el EEG se saltea sin
+## decodificar. pyxdf se llama sin sincronización ni dejitter, porque el lector entrega los timestamps
+## tal como están en el archivo. pyxdf sigue como dependencia para esta verificación.
+
+path = "D:\\dataset\\DataBase\\sub-06\\ses-01"
+lsl_filename = "sub-06_ses-01_task-ejecutada_run-01_eeg.xdf"
+marcadores = ["Tablet_Markers", "Laptop_Markers"]
+repeticiones = 3
+
+filename = os.path.join(path, lsl_filename)
+
+def con_pyxdf():
+    return pyxdf.load_xdf(filename, synchronize_clocks=False, dejitter_timestamps=False)
+
+def con_lector():
+    return XDFStreamReader(filename, select_streams=marcadores).read()
+
+def medir(funcion):
+    tiempos = []
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - t0)
+    return resultado, np.min(tiempos)
+
+(streams_pyxdf, header_pyxdf), tiempo_pyxdf = medir(con_pyxdf)
+(streams_lector, header_lector), tiempo_lector = medir(con_lector)
+
+por_nombre = {stream["info"]["name"][0]: stream for stream in streams_pyxdf}
+otros = sorted(set(por_nombre) - set(marcadores))
+assert [stream["info"]["name"][0] for stream in streams_lector] == [n for n in por_nombre if n in marcadores]
+assert header_lector == header_pyxdf
+
+for stream in streams_lector:
+    nombre = stream["info"]["name"][0]
+    esperado = por_nombre[nombre]
+
+    assert stream["time_series"] == esperado["time_series"], nombre
+    assert np.array_equal(stream["time_stamps"], esperado["time_stamps"]), nombre
+    assert stream["footer"] == esperado["footer"], nombre
+    assert stream["footer"]["info"]["first_timestamp"] == esperado["footer"]["info"]["first_timestamp"], nombre
+    assert np.array_equal(stream["clock_times"], esperado["clock_times"]), nombre
+    assert np.array_equal(stream["clock_values"], esperado["clock_values"]), nombre
+    ## pyxdf agrega a info claves calculadas (effective_srate, segments, ...); el resto viene del XML
+    assert all(stream["info"][clave] == esperado["info"][clave] for clave in stream["info"]), nombre
+
+    print(f"{nombre}: {len(stream['time_series'])} muestras iguales, "
+          f"first_timestamp {stream['footer']['info']['first_timestamp'][0]}")
+
+print(f"streams salteados sin decodificar: {', '.join(otros) or 'ninguno'}")
+print(f"pyxdf.load_xdf: {tiempo_pyxdf:6.2f} s  XDFStreamReader: {tiempo_lector:6.2f} s  "
+      f"({tiempo_pyxdf / tiempo_lector:.1f}x)")